@@ -1,16 +1,74 @@
 """
 API routes for dashboard
 """
-from flask import jsonify
+import numpy as np
+from flask import jsonify, request
 from datetime import datetime
 from utils.logger import setup_logger
 
 logger = setup_logger("routes")
 
 
+def _compute_mdd(closed_trades, initial_capital: float) -> dict:
+    """Walk the equity curve (trades in entry-time order) and return max drawdown stats"""
+    current_capital = initial_capital
+    equity_curve = [initial_capital]
+    peak_capital = initial_capital
+    max_drawdown_pct = 0.0
+    max_drawdown_usd = 0.0
+    
+    # Sort trades by time
+    sorted_trades = sorted(closed_trades, key=lambda x: x.get('entry_time', ''))
+    
+    for trade in sorted_trades:
+        profit = trade['_net']
+        current_capital += profit
+        equity_curve.append(current_capital)
+        
+        # Update peak
+        if current_capital > peak_capital:
+            peak_capital = current_capital
+        
+        # Calculate drawdown
+        drawdown_usd = peak_capital - current_capital
+        drawdown_pct = (drawdown_usd / peak_capital * 100) if peak_capital > 0 else 0.0
+        
+        # Update max drawdown
+        if drawdown_pct > max_drawdown_pct:
+            max_drawdown_pct = drawdown_pct
+            max_drawdown_usd = drawdown_usd
+    
+    return {
+        'max_drawdown_pct': max_drawdown_pct,
+        'max_drawdown_usd': max_drawdown_usd,
+        'peak_capital': peak_capital,
+        'current_capital': current_capital,
+        'equity_curve': equity_curve
+    }
+
+
 def setup_routes(app, bot):
     """Setup Flask routes"""
     
+    @app.after_request
+    def add_cache_headers(response):
+        """ETag + short private caching on API GETs so unchanged polls get a bodyless 304"""
+        if request.method == 'GET' and request.path.startswith('/api/') and response.status_code == 200:
+            if 'ETag' not in response.headers:
+                response.add_etag()
+            response.headers['Cache-Control'] = 'private, max-age=2'
+            response.make_conditional(request)
+        return response
+    
+    def _not_modified(etag: str):
+        """304 for endpoints that depend only on closed-trade history (skips building the body)"""
+        if etag in request.if_none_match:
+            response = app.response_class(status=304)
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, max-age=2'
+            return response
+        return None
+    
     @app.route('/')
     def dashboard():
         """Serve dashboard HTML"""
@@ -29,7 +87,7 @@ def setup_routes(app, bot):
             total_pnl = current_capital - initial_capital
             
             # Calculate net total PnL (after all costs)
-            net_total_pnl = sum(t.get('net_profit', t.get('pnl', 0.0)) for t in closed_trades)
+            net_total_pnl = sum(t['_net'] for t in closed_trades)
             
             return jsonify({
                 'current_capital': current_capital,
@@ -55,7 +113,7 @@ def setup_routes(app, bot):
             
             # Add closed trades (use net_profit if available)
             for trade in closed_trades:
-                net_profit = trade.get('net_profit', trade.get('pnl', 0.0))
+                net_profit = trade['_net']
                 all_trades.append({
                     'symbol': trade.get('symbol'),
                     'strategy': trade.get('strategy'),
@@ -97,18 +155,17 @@ def setup_routes(app, bot):
     def get_trades_by_date():
         """Get all trades grouped by date"""
         try:
-            closed_trades = bot.trade_storage.get_all_trades()
+            etag = bot.trade_storage.etag
+            cached = _not_modified(etag)
+            if cached:
+                return cached
+            
+            daily_stats = bot.trade_storage.get_daily_stats()
             
-            # Group by date
+            # Trades are already grouped by date in storage
             trades_by_date = {}
-            for trade in closed_trades:
-                entry_time = trade.get('entry_time', '')
-                trade_date = entry_time.split('T')[0] if 'T' in entry_time else entry_time.split(' ')[0]
-                
-                if trade_date not in trades_by_date:
-                    trades_by_date[trade_date] = []
-                
-                trades_by_date[trade_date].append({
+            for trade_date, stats in daily_stats.items():
+                trades_by_date[trade_date] = [{
                     'time': trade.get('entry_time', ''),
                     'symbol': trade.get('symbol', ''),
                     'strategy': trade.get('strategy', ''),
@@ -116,21 +173,18 @@ def setup_routes(app, bot):
                     'entry_price': trade.get('entry_price', 0.0),
                     'exit_price': trade.get('exit_price', 0.0),
                     'quantity': trade.get('quantity', 0.0),
-                    'profit_usd': trade.get('net_profit', trade.get('pnl', 0.0)),
+                    'profit_usd': trade['_net'],
                     'profit_pct': trade.get('pnl_pct', 0.0),
                     'exit_time': trade.get('exit_time', '')
-                })
-            
-            # Sort dates (newest first)
-            sorted_dates = sorted(trades_by_date.keys(), reverse=True)
+                } for trade in stats['trades']]
             
-            return jsonify({
-                'trades_by_date': {
-                    date: trades_by_date[date] for date in sorted_dates
-                },
-                'total_days': len(sorted_dates),
-                'dates': sorted_dates
+            # Storage returns dates newest first, so keys are already ordered
+            response = jsonify({
+                'trades_by_date': trades_by_date,
+                'total_days': len(trades_by_date)
             })
+            response.set_etag(etag)
+            return response
         except Exception as e:
             logger.error(f"[ERROR] Error getting trades by date: {e}")
             return jsonify({'error': str(e)}), 500
@@ -139,43 +193,17 @@ def setup_routes(app, bot):
     def get_daily_performance():
         """Get daily performance summary"""
         try:
-            closed_trades = bot.trade_storage.get_all_trades()
+            etag = bot.trade_storage.etag
+            cached = _not_modified(etag)
+            if cached:
+                return cached
             
-            # Group by date and calculate metrics
-            daily_stats = {}
-            
-            for trade in closed_trades:
-                entry_time = trade.get('entry_time', '')
-                trade_date = entry_time.split('T')[0] if 'T' in entry_time else entry_time.split(' ')[0]
-                profit = trade.get('net_profit', trade.get('pnl', 0.0))
-                strategy = trade.get('strategy', '')
-                
-                if trade_date not in daily_stats:
-                    daily_stats[trade_date] = {
-                        'date': trade_date,
-                        'total_trades': 0,
-                        'winning_trades': 0,
-                        'losing_trades': 0,
-                        'total_profit': 0.0,
-                        'strategies_used': set(),
-                        'symbols_traded': set()
-                    }
-                
-                stats = daily_stats[trade_date]
-                stats['total_trades'] += 1
-                stats['total_profit'] += profit
-                
-                if profit > 0:
-                    stats['winning_trades'] += 1
-                else:
-                    stats['losing_trades'] += 1
-                
-                stats['strategies_used'].add(strategy)
-                stats['symbols_traded'].add(trade.get('symbol', ''))
+            # Per-date aggregates are maintained incrementally by storage
+            daily_stats = bot.trade_storage.get_daily_stats()
             
             # Calculate win rate and convert sets to lists
             result = []
-            for date, stats in sorted(daily_stats.items(), reverse=True):
+            for date, stats in daily_stats.items():  # Newest first
                 win_rate = (stats['winning_trades'] / stats['total_trades'] * 100) if stats['total_trades'] > 0 else 0
                 
                 result.append({
@@ -190,7 +218,9 @@ def setup_routes(app, bot):
                     'avg_profit_per_trade': round(stats['total_profit'] / stats['total_trades'], 2) if stats['total_trades'] > 0 else 0.0
                 })
             
-            return jsonify({'daily_performance': result})
+            response = jsonify({'daily_performance': result})
+            response.set_etag(etag)
+            return response
         except Exception as e:
             logger.error(f"[ERROR] Error getting daily performance: {e}")
             return jsonify({'error': str(e)}), 500
@@ -199,43 +229,21 @@ def setup_routes(app, bot):
     def get_strategy_performance():
         """Get performance breakdown by strategy"""
         try:
-            closed_trades = bot.trade_storage.get_all_trades()
-            
-            # Group by strategy
-            strategy_stats = {}
+            etag = bot.trade_storage.etag
+            cached = _not_modified(etag)
+            if cached:
+                return cached
             
-            for trade in closed_trades:
-                strategy = trade.get('strategy', 'unknown')
-                profit = trade.get('net_profit', trade.get('pnl', 0.0))
-                
-                if strategy not in strategy_stats:
-                    strategy_stats[strategy] = {
-                        'strategy': strategy,
-                        'total_trades': 0,
-                        'winning_trades': 0,
-                        'losing_trades': 0,
-                        'total_profit': 0.0,
-                        'profits': [],
-                        'losses': []
-                    }
-                
-                stats = strategy_stats[strategy]
-                stats['total_trades'] += 1
-                stats['total_profit'] += profit
-                if profit > 0:
-                    stats['profits'].append(profit)
-                    stats['winning_trades'] += 1
-                else:
-                    stats['losses'].append(profit)
-                    stats['losing_trades'] += 1
+            # Per-strategy aggregates are maintained incrementally by storage
+            strategy_stats = bot.trade_storage.get_strategy_stats()
             
             # Calculate metrics
             result = []
             for strategy, stats in strategy_stats.items():
                 win_rate = (stats['winning_trades'] / stats['total_trades'] * 100) if stats['total_trades'] > 0 else 0
-                avg_profit = sum(stats['profits']) / len(stats['profits']) if stats['profits'] else 0.0
-                avg_loss = sum(stats['losses']) / len(stats['losses']) if stats['losses'] else 0.0
-                profit_factor = abs(sum(stats['profits']) / sum(stats['losses'])) if stats['losses'] and sum(stats['losses']) != 0 else 0.0
+                avg_profit = stats['profit_sum'] / stats['winning_trades'] if stats['winning_trades'] else 0.0
+                avg_loss = stats['loss_sum'] / stats['losing_trades'] if stats['losing_trades'] else 0.0
+                profit_factor = abs(stats['profit_sum'] / stats['loss_sum']) if stats['losing_trades'] and stats['loss_sum'] != 0 else 0.0
                 
                 result.append({
                     'strategy': strategy,
@@ -253,7 +261,9 @@ def setup_routes(app, bot):
             # Sort by total profit (descending)
             result.sort(key=lambda x: x['total_profit'], reverse=True)
             
-            return jsonify({'strategy_performance': result})
+            response = jsonify({'strategy_performance': result})
+            response.set_etag(etag)
+            return response
         except Exception as e:
             logger.error(f"[ERROR] Error getting strategy performance: {e}")
             return jsonify({'error': str(e)}), 500
@@ -263,42 +273,23 @@ def setup_routes(app, bot):
         """Calculate Maximum Drawdown (MDD)"""
         try:
             closed_trades = bot.trade_storage.get_all_trades()
-            
-            # Calculate cumulative equity curve
-            initial_capital = bot.initial_capital
-            current_capital = initial_capital
-            
-            equity_curve = [initial_capital]
-            peak_capital = initial_capital
-            max_drawdown_pct = 0.0
-            max_drawdown_usd = 0.0
-            
-            # Sort trades by time
-            sorted_trades = sorted(closed_trades, key=lambda x: x.get('entry_time', ''))
-            
-            for trade in sorted_trades:
-                profit = trade.get('net_profit', trade.get('pnl', 0.0))
-                current_capital += profit
-                equity_curve.append(current_capital)
-                
-                # Update peak
-                if current_capital > peak_capital:
-                    peak_capital = current_capital
-                
-                # Calculate drawdown
-                drawdown_usd = peak_capital - current_capital
-                drawdown_pct = (drawdown_usd / peak_capital * 100) if peak_capital > 0 else 0.0
-                
-                # Update max drawdown
-                if drawdown_pct > max_drawdown_pct:
-                    max_drawdown_pct = drawdown_pct
-                    max_drawdown_usd = drawdown_usd
+            mdd = _compute_mdd(closed_trades, bot.initial_capital)
+            equity_curve = mdd['equity_curve']
+            
+            # Optional ?downsample=N: return at most ~N points of the equity curve
+            downsample = request.args.get('downsample', type=int)
+            if downsample and downsample > 0 and len(equity_curve) > downsample:
+                stride = max(1, len(equity_curve) // downsample)
+                sampled = equity_curve[::stride]
+                if (len(equity_curve) - 1) % stride:
+                    sampled.append(equity_curve[-1])  # Always keep the latest point
+                equity_curve = sampled
             
             return jsonify({
-                'max_drawdown_pct': round(max_drawdown_pct, 2),
-                'max_drawdown_usd': round(max_drawdown_usd, 2),
-                'peak_capital': round(peak_capital, 2),
-                'current_capital': round(current_capital, 2),
+                'max_drawdown_pct': round(mdd['max_drawdown_pct'], 2),
+                'max_drawdown_usd': round(mdd['max_drawdown_usd'], 2),
+                'peak_capital': round(mdd['peak_capital'], 2),
+                'current_capital': round(mdd['current_capital'], 2),
                 'equity_curve': equity_curve
             })
         except Exception as e:
@@ -311,35 +302,33 @@ def setup_routes(app, bot):
         try:
             closed_trades = bot.trade_storage.get_all_trades()
             
-            # Calculate totals
+            # Calculate totals (one pass to build the PnL array, the rest is vectorized)
             total_trades = len(closed_trades)
-            profits = [t.get('net_profit', t.get('pnl', 0.0)) for t in closed_trades if t.get('net_profit', t.get('pnl', 0.0)) > 0]
-            losses = [t.get('net_profit', t.get('pnl', 0.0)) for t in closed_trades if t.get('net_profit', t.get('pnl', 0.0)) < 0]
-            winning_trades = len(profits)
-            losing_trades = len(losses)
-            
-            total_profit = sum(t.get('net_profit', t.get('pnl', 0.0)) for t in closed_trades)
+            pnl = np.fromiter(
+                (t['_net'] for t in closed_trades),
+                dtype=np.float64,
+                count=total_trades
+            )
+            profits = pnl[pnl > 0]
+            losses = pnl[pnl < 0]
+            winning_trades = int(profits.size)
+            losing_trades = int(losses.size)
+            
+            total_profit = float(pnl.sum())
+            profit_sum = float(profits.sum())
+            loss_sum = float(losses.sum())
             
             win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-            avg_profit = sum(profits) / len(profits) if profits else 0.0
-            avg_loss = sum(losses) / len(losses) if losses else 0.0
-            profit_factor = abs(sum(profits) / sum(losses)) if losses and sum(losses) != 0 else 0.0
+            avg_profit = profit_sum / winning_trades if winning_trades else 0.0
+            avg_loss = loss_sum / losing_trades if losing_trades else 0.0
+            profit_factor = abs(profit_sum / loss_sum) if losing_trades and loss_sum != 0 else 0.0
             
-            # Get MDD
+            # Get MDD (same calculation as /api/performance/mdd)
             initial_capital = bot.initial_capital
             current_capital = initial_capital + total_profit
-            equity_curve = [initial_capital]
-            peak_capital = initial_capital
-            
-            sorted_trades = sorted(closed_trades, key=lambda x: x.get('entry_time', ''))
-            for trade in sorted_trades:
-                profit = trade.get('net_profit', trade.get('pnl', 0.0))
-                equity_curve.append(equity_curve[-1] + profit)
-                if equity_curve[-1] > peak_capital:
-                    peak_capital = equity_curve[-1]
-            
-            max_drawdown_usd = peak_capital - min(equity_curve) if equity_curve else 0.0
-            max_drawdown_pct = (max_drawdown_usd / peak_capital * 100) if peak_capital > 0 else 0.0
+            mdd = _compute_mdd(closed_trades, initial_capital)
+            max_drawdown_usd = mdd['max_drawdown_usd']
+            max_drawdown_pct = mdd['max_drawdown_pct']
             
             return jsonify({
                 'total_trades': total_trades,
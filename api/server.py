@@ -2,20 +2,54 @@
 Flask server for dashboard
 """
 from flask import Flask
+from flask.json.provider import DefaultJSONProvider
 from api.routes import setup_routes
 from utils.logger import setup_logger
 
+try:
+    from waitress import serve as waitress_serve
+except ImportError:
+    waitress_serve = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = setup_logger("api_server")
 
-app = Flask(__name__)
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson (used by jsonify for every route)"""
+    
+    def dumps(self, obj, **kwargs):
+        # Keys keep insertion order (e.g. newest-first dates); unknown types use Flask's default
+        return orjson.dumps(obj, default=self.default, option=orjson.OPT_SERIALIZE_NUMPY).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+class OrjsonFlask(Flask):
+    """Flask app that serializes JSON with orjson"""
+    json_provider_class = OrjsonProvider
 
 
-def run_server(bot, port: int = 10000, host: str = "0.0.0.0"):
-    """Run Flask server"""
+app = OrjsonFlask(__name__) if orjson is not None else Flask(__name__)
+
+
+def run_server(bot, port: int = 10000, host: str = "0.0.0.0", threads: int = 8):
+    """Run Flask server (waitress if installed, Werkzeug dev server otherwise)"""
     try:
         setup_routes(app, bot)
         logger.info(f"[OK] Dashboard starting on http://{host}:{port}")
-        app.run(host=host, port=port, debug=False, threaded=True)
+
+        # Waitress is a production WSGI server that runs fine inside the bot's
+        # background thread (gunicorn/gevent need the main thread and monkey-patching)
+        if waitress_serve is not None:
+            waitress_serve(app, host=host, port=port, threads=threads, ident=None)
+        else:
+            logger.warning("[WARN] waitress not installed, using Flask development server")
+            app.run(host=host, port=port, debug=False, threaded=True)
     except Exception as e:
         logger.error(f"[ERROR] Error starting Flask server: {e}", exc_info=True)
-
@@ -1,23 +1,61 @@
 """
 Binance API client with retry and error handling
 """
+import json
 import time
+import asyncio
+import math
 import hmac
 import hashlib
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlencode
-from typing import Optional, Dict, Any, Tuple
+from typing import Optional, Dict, Any, Tuple, List, Callable, Mapping
 from utils.errors import APIError
 from utils.validators import validate_price
 from utils.logger import setup_logger
 
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
 logger = setup_logger("api_client")
 
 
+def create_session(max_retries: int = 3, pool_connections: int = 20, pool_maxsize: int = 20) -> requests.Session:
+    """
+    Keep-alive session; urllib3 retries timeouts, 429 and 5xx with exponential backoff
+    (POST is not retried so orders are never sent twice)
+    """
+    retry = Retry(
+        total=max(0, max_retries - 1),
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    return session
+
+
 class BinanceAPIClient:
     """Binance API client with retry and error handling"""
     
-    def __init__(self, api_key: str, secret_key: str, testnet: bool = True, max_retries: int = 3):
+    def __init__(
+        self,
+        api_key: str,
+        secret_key: str,
+        testnet: bool = True,
+        max_retries: int = 3,
+        session: Optional[requests.Session] = None
+    ):
         self.api_key = api_key
         self.secret_key = secret_key
         self.testnet = testnet
@@ -29,21 +67,48 @@ class BinanceAPIClient:
         else:
             self.base_url = "https://api.binance.com"
         
+        # HTTP session (may be shared between clients: the API key is sent per request,
+        # so several keys can reuse the same pooled TLS connections)
+        self.session = session if session is not None else create_session(max_retries)
+        
+        # Optional hook called with each response's headers (e.g. APIRotator
+        # reads X-MBX-USED-WEIGHT-1M from it)
+        self.on_response: Optional[Callable[[Mapping[str, str]], None]] = None
+        
+        # Async HTTP client (httpx), created on first async call in each event loop
+        self._async_client = None
+        self._async_client_loop = None
+        
         # Symbol info cache
         self.symbol_info_cache: Dict[str, Dict] = {}
         
+        # Short-lived price cache: symbol -> (price, monotonic fetch time)
+        self.price_cache_ttl = 0.4
+        self._price_cache: Dict[str, Tuple[float, float]] = {}
+        
+        # Pre-keyed HMAC: copying it skips the ipad/opad key setup on every signature
+        self._hmac_template = hmac.new(self.secret_key.encode('utf-8'), digestmod=hashlib.sha256)
+        
         logger.info(f"[OK] Binance API Client initialized (testnet={testnet})")
     
+    def _sign(self, query_string: str) -> str:
+        """HMAC SHA256 hex digest of an already-encoded query string"""
+        h = self._hmac_template.copy()
+        h.update(query_string.encode('utf-8'))
+        return h.hexdigest()
+    
     def _create_signature(self, params: Dict[str, Any]) -> str:
         """Create HMAC SHA256 signature"""
+        try:
+            return self._sign(urlencode(params))
+        except Exception as e:
+            raise APIError(f"Failed to create signature: {e}") from e
+    
+    def _sign_query(self, params: Dict[str, Any]) -> str:
+        """Encode params once and append the signature (query string ready to send)"""
         try:
             query_string = urlencode(params)
-            signature = hmac.new(
-                self.secret_key.encode('utf-8'),
-                query_string.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest()
-            return signature
+            return f"{query_string}&signature={self._sign(query_string)}"
         except Exception as e:
             raise APIError(f"Failed to create signature: {e}") from e
     
@@ -55,70 +120,72 @@ class BinanceAPIClient:
         signed: bool = False,
         timeout: int = 10
     ) -> requests.Response:
-        """Make HTTP request with retry logic"""
+        """Make HTTP request (retries/backoff are handled by the session's HTTPAdapter)"""
         if params is None:
             params = {}
         
         url = f"{self.base_url}{endpoint}"
+        method = method.upper()
+        if method not in ('GET', 'POST', 'DELETE'):
+            raise ValueError(f"Unsupported HTTP method: {method}")
         
-        for attempt in range(self.max_retries):
-            try:
-                # Add signature if needed
-                if signed:
-                    params['timestamp'] = int(time.time() * 1000)
-                    params['signature'] = self._create_signature(params)
-                
-                # Add API key to headers
-                headers = {}
+        # Add signature and API key header if needed
+        # (signed payloads are url-encoded once and sent as-is, not re-encoded by requests)
+        headers = {}
+        payload: Any = params
+        if signed:
+            params['timestamp'] = int(time.time() * 1000)
+            payload = self._sign_query(params)
+            headers['X-MBX-APIKEY'] = self.api_key
+        
+        try:
+            if method == 'POST':
                 if signed:
-                    headers['X-MBX-APIKEY'] = self.api_key
-                
-                # Make request
-                if method.upper() == 'GET':
-                    response = requests.get(url, params=params, headers=headers, timeout=timeout)
-                elif method.upper() == 'POST':
-                    response = requests.post(url, data=params, headers=headers, timeout=timeout)
-                elif method.upper() == 'DELETE':
-                    response = requests.delete(url, params=params, headers=headers, timeout=timeout)
-                else:
-                    raise ValueError(f"Unsupported HTTP method: {method}")
-                
-                response.raise_for_status()
-                return response
-                
-            except requests.exceptions.Timeout:
-                if attempt == self.max_retries - 1:
-                    raise APIError(f"Request timeout after {self.max_retries} attempts")
-                wait_time = 2 ** attempt
-                time.sleep(wait_time)
-                
-            except requests.exceptions.HTTPError as e:
-                # Handle 400 errors (symbol not available) gracefully
-                if e.response.status_code == 400:
-                    error_msg = str(e).lower()
-                    if 'bad request' in error_msg or 'symbol' in error_msg:
-                        # Symbol not available on testnet - return None instead of raising
-                        logger.debug(f"[SKIP] Symbol not available on testnet (400 error): {endpoint}")
-                        return None  # Return None for unavailable symbols
-                
-                if e.response.status_code == 429:  # Rate limit
-                    if attempt == self.max_retries - 1:
-                        raise APIError("Rate limit exceeded")
-                    wait_time = 2 ** attempt
-                    time.sleep(wait_time)
-                else:
-                    raise APIError(f"HTTP error: {e}") from e
-                    
-            except requests.exceptions.RequestException as e:
-                if attempt == self.max_retries - 1:
-                    raise APIError(f"Request failed: {e}") from e
-                wait_time = 2 ** attempt
-                time.sleep(wait_time)
-        
-        raise APIError("Max retries exceeded")
+                    headers['Content-Type'] = 'application/x-www-form-urlencoded'
+                response = self.session.post(url, data=payload, headers=headers, timeout=timeout)
+            else:
+                response = self.session.request(method, url, params=payload, headers=headers, timeout=timeout)
+            
+            if self.on_response is not None:
+                self.on_response(response.headers)
+            response.raise_for_status()
+            return response
+            
+        except requests.exceptions.Timeout as e:
+            raise APIError(f"Request timeout after {self.max_retries} attempts") from e
+            
+        except requests.exceptions.HTTPError as e:
+            # Handle 400 errors (symbol not available) gracefully
+            if e.response.status_code == 400:
+                error_msg = str(e).lower()
+                if 'bad request' in error_msg or 'symbol' in error_msg:
+                    # Symbol not available on testnet - return None instead of raising
+                    logger.debug(f"[SKIP] Symbol not available on testnet (400 error): {endpoint}")
+                    return None  # Return None for unavailable symbols
+            
+            if e.response.status_code == 429:  # Rate limit (still limited after retries)
+                raise APIError("Rate limit exceeded") from e
+            raise APIError(f"HTTP error: {e}") from e
+            
+        except requests.exceptions.RequestException as e:
+            raise APIError(f"Request failed: {e}") from e
     
-    def get_current_price(self, symbol: str) -> Optional[float]:
-        """Get current price for symbol"""
+    def get_current_price(self, symbol: str, max_age: Optional[float] = None) -> Optional[float]:
+        """
+        Get current price for symbol
+        
+        Prices are cached per symbol for price_cache_ttl seconds so several
+        callers in the same tick share one request. Pass max_age=0 to force
+        a fresh fetch (or any other max age in seconds).
+        """
+        if max_age is None:
+            max_age = self.price_cache_ttl
+        
+        if max_age > 0:
+            cached = self._price_cache.get(symbol)
+            if cached and time.monotonic() - cached[1] < max_age:
+                return cached[0]
+        
         try:
             response = self._make_request('GET', '/api/v3/ticker/price', {'symbol': symbol})
             
@@ -133,6 +200,7 @@ class BinanceAPIClient:
             if not validate_price(price):
                 raise ValueError(f"Invalid price: {price}")
             
+            self._price_cache[symbol] = (price, time.monotonic())
             return price
         except (ValueError, KeyError, TypeError) as e:
             logger.debug(f"[SKIP] Error getting price for {symbol}: {e}")
@@ -146,34 +214,172 @@ class BinanceAPIClient:
             logger.error(f"[ERROR] Error getting price for {symbol}: {e}")
             return None
     
-    def get_klines(self, symbol: str, interval: str = "5m", limit: int = 200) -> Optional[Tuple]:
-        """Get kline/candlestick data"""
+    def get_prices_batch(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        """
+        Prices for several symbols from one /api/v3/ticker/price request
+        
+        Fills the per-symbol price cache, so later get_current_price calls in
+        the same tick are served without a request. Symbols missing from the
+        response map to None.
+        """
+        if not symbols:
+            return {}
         try:
-            params = {
-                'symbol': symbol,
-                'interval': interval,
-                'limit': limit
-            }
-            response = self._make_request('GET', '/api/v3/klines', params)
-            
-            # Handle None response (symbol not available)
+            response = self._make_request(
+                'GET', '/api/v3/ticker/price', {'symbols': json.dumps(symbols, separators=(',', ':'))}
+            )
             if response is None:
+                return {}
+            
+            now = time.monotonic()
+            prices: Dict[str, Optional[float]] = dict.fromkeys(symbols)
+            for ticker in response.json():
+                price = float(ticker.get('price', 0.0))
+                symbol = ticker.get('symbol')
+                if symbol in prices and validate_price(price):
+                    prices[symbol] = price
+                    self._price_cache[symbol] = (price, now)
+            return prices
+        except Exception as e:
+            logger.debug(f"[SKIP] Batch price request failed ({e}), falling back to per-symbol requests")
+            return {}
+    
+    def _get_async_client(self):
+        """
+        httpx.AsyncClient for the running event loop (keep-alive pool, HTTP/2 when h2 is installed)
+        
+        Pooled connections belong to the loop that opened them, so a client left
+        over from another (e.g. an already closed asyncio.run) loop is replaced,
+        never reused. Whoever owns the loop should await aclose() before it ends.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            limits = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            try:
+                self._async_client = httpx.AsyncClient(limits=limits, http2=True, timeout=30.0)
+            except ImportError:
+                self._async_client = httpx.AsyncClient(limits=limits, timeout=30.0)
+            self._async_client_loop = loop
+        return self._async_client
+    
+    async def get_current_price_async(self, symbol: str, max_age: Optional[float] = None) -> Optional[float]:
+        """
+        Async version of get_current_price (shares the same price cache)
+        
+        Uses httpx if installed, otherwise runs the sync call in a worker thread.
+        """
+        if httpx is None:
+            return await asyncio.to_thread(self.get_current_price, symbol, max_age)
+        
+        if max_age is None:
+            max_age = self.price_cache_ttl
+        
+        if max_age > 0:
+            cached = self._price_cache.get(symbol)
+            if cached and time.monotonic() - cached[1] < max_age:
+                return cached[0]
+        
+        try:
+            response = await self._get_async_client().get(
+                f"{self.base_url}/api/v3/ticker/price", params={'symbol': symbol}
+            )
+            if self.on_response is not None:
+                self.on_response(response.headers)
+            if response.status_code == 400:
+                logger.debug(f"[SKIP] {symbol} not available on testnet")
                 return None
+            response.raise_for_status()
             
-            klines = response.json()
+            price = float(response.json().get('price', 0.0))
+            if not validate_price(price):
+                raise ValueError(f"Invalid price: {price}")
             
-            # Parse klines
-            closes = [float(k[4]) for k in klines]
-            highs = [float(k[2]) for k in klines]
-            lows = [float(k[3]) for k in klines]
-            volumes = [float(k[5]) for k in klines]
-            opens = [float(k[1]) for k in klines]
+            self._price_cache[symbol] = (price, time.monotonic())
+            return price
+        except (ValueError, KeyError, TypeError) as e:
+            logger.debug(f"[SKIP] Error getting price for {symbol}: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"[ERROR] Error getting price for {symbol}: {e}")
+            return None
+    
+    async def aclose(self):
+        """Close the async HTTP client (call from the event loop that used it, before it ends)"""
+        if self._async_client is not None:
+            client, self._async_client, self._async_client_loop = self._async_client, None, None
+            await client.aclose()
+    
+    def get_raw_klines(self, symbol: str, interval: str = "5m", limit: int = 200) -> Optional[List[List]]:
+        """Get klines as returned by Binance ([open_time, open, high, low, close, volume, ...] rows)"""
+        params = {
+            'symbol': symbol,
+            'interval': interval,
+            'limit': limit
+        }
+        response = self._make_request('GET', '/api/v3/klines', params)
+        
+        # Handle None response (symbol not available)
+        if response is None:
+            return None
+        
+        return response.json()
+    
+    def get_klines(
+        self,
+        symbol: str,
+        interval: str = "5m",
+        limit: int = 200,
+        with_open_time: bool = False
+    ) -> Optional[Tuple]:
+        """
+        Get kline/candlestick data
+        
+        Returns (closes, highs, lows, volumes, opens), plus open_times (ms)
+        as a sixth array when with_open_time is True.
+        """
+        try:
+            klines = self.get_raw_klines(symbol, interval, limit)
+            if not klines:
+                return None
+            
+            # Parse klines in one pass: columns 0-5 are open_time, open, high, low, close, volume
+            # (only those are boxed, then transposed to one contiguous row per field,
+            # so indicator code gets plain arrays)
+            ohlcv = np.array([k[0:6] for k in klines], dtype=object).astype(np.float64)
+            open_times, opens, highs, lows, closes, volumes = np.ascontiguousarray(ohlcv.T)
             
+            if with_open_time:
+                return closes, highs, lows, volumes, opens, open_times
             return closes, highs, lows, volumes, opens
         except Exception as e:
             logger.error(f"[ERROR] Error getting klines for {symbol}: {e}")
             return None
     
+    def get_klines_batch(
+        self,
+        symbols: List[str],
+        interval: str = "5m",
+        limit: int = 200,
+        max_workers: int = 10,
+        with_open_time: bool = False
+    ) -> Dict[str, Optional[Tuple]]:
+        """
+        Get klines for several symbols concurrently
+        
+        Requests run on a small thread pool so N symbols cost about one
+        round-trip instead of N sequential ones.
+        
+        Returns:
+            Dict of symbol -> klines tuple (or None if unavailable)
+        """
+        if not symbols:
+            return {}
+        
+        workers = max(1, min(max_workers, len(symbols)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(lambda s: self.get_klines(s, interval, limit, with_open_time), symbols)
+            return dict(zip(symbols, results))
+    
     def get_account_info(self) -> Optional[Dict[str, Any]]:
         """Get account information"""
         try:
@@ -183,6 +389,14 @@ class BinanceAPIClient:
             logger.error(f"[ERROR] Error getting account info: {e}")
             return None
     
+    @staticmethod
+    def _step_precision(step: float) -> int:
+        """Number of decimals implied by a step/tick size (0.001 -> 3)"""
+        if step <= 0:
+            return 8
+        # Small epsilon guards against log10 landing just below an integer
+        return max(0, -int(math.floor(math.log10(step) + 1e-9)))
+    
     def _format_quantity(self, symbol: str, quantity: float) -> str:
         """Format quantity according to Binance precision"""
         try:
@@ -194,12 +408,10 @@ class BinanceAPIClient:
             lot_size = symbol_info.get('lot_size_filter', {})
             step_size = float(lot_size.get('stepSize', '0.001'))
             
-            # Calculate precision
-            precision = 0
-            temp = step_size
-            while temp < 1:
-                temp *= 10
-                precision += 1
+            # Precision is precomputed when symbol info is loaded
+            precision = symbol_info.get('qty_precision')
+            if precision is None:
+                precision = self._step_precision(step_size)
             
             # Round to step size
             rounded = round(quantity / step_size) * step_size
@@ -219,12 +431,10 @@ class BinanceAPIClient:
             price_filter = symbol_info.get('price_filter', {})
             tick_size = float(price_filter.get('tickSize', '0.01'))
             
-            # Calculate precision
-            precision = 0
-            temp = tick_size
-            while temp < 1:
-                temp *= 10
-                precision += 1
+            # Precision is precomputed when symbol info is loaded
+            precision = symbol_info.get('price_precision')
+            if precision is None:
+                precision = self._step_precision(tick_size)
             
             # Round to tick size
             rounded = round(price / tick_size) * tick_size
@@ -318,6 +528,21 @@ class BinanceAPIClient:
             logger.error(f"[ERROR] Order placement failed: {e}", exc_info=True)
             return None
     
+    def _parse_symbol_info(self, s: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a symbol_info_cache entry from an exchangeInfo symbol record"""
+        filters = {f['filterType']: f for f in s.get('filters', [])}
+        lot_size_filter = filters.get('LOT_SIZE', {})
+        price_filter = filters.get('PRICE_FILTER', {})
+        return {
+            'baseAssetPrecision': s.get('baseAssetPrecision', 8),
+            'quoteAssetPrecision': s.get('quoteAssetPrecision', 8),
+            'lot_size_filter': lot_size_filter,
+            'price_filter': price_filter,
+            'min_notional': filters.get('MIN_NOTIONAL', {}).get('minNotional', '0'),
+            'qty_precision': self._step_precision(float(lot_size_filter.get('stepSize', '0.001'))),
+            'price_precision': self._step_precision(float(price_filter.get('tickSize', '0.01')))
+        }
+    
     def _load_symbol_info(self, symbol: str):
         """Load symbol trading rules from Binance"""
         try:
@@ -330,15 +555,51 @@ class BinanceAPIClient:
             data = response.json()
             for s in data.get('symbols', []):
                 if s.get('symbol') == symbol.upper():
-                    filters = {f['filterType']: f for f in s.get('filters', [])}
-                    self.symbol_info_cache[symbol] = {
-                        'baseAssetPrecision': s.get('baseAssetPrecision', 8),
-                        'quoteAssetPrecision': s.get('quoteAssetPrecision', 8),
-                        'lot_size_filter': filters.get('LOT_SIZE', {}),
-                        'price_filter': filters.get('PRICE_FILTER', {}),
-                        'min_notional': filters.get('MIN_NOTIONAL', {}).get('minNotional', '0')
-                    }
+                    self.symbol_info_cache[symbol] = self._parse_symbol_info(s)
                     break
         except Exception as e:
             logger.warning(f"[WARN] Could not load symbol info for {symbol}: {e}")
-
+    
+    def preload_all_symbol_info(self, cache_dir: str = "data", ttl_seconds: int = 86400) -> int:
+        """
+        Load trading rules for ALL symbols in one request
+        
+        The result is persisted to disk and reused for ttl_seconds (24h default),
+        so restarts don't hit the heavy exchangeInfo endpoint again.
+        
+        Returns:
+            Number of symbols in the cache
+        """
+        suffix = 'testnet' if self.testnet else 'mainnet'
+        cache_file = Path(cache_dir) / f"symbol_info_{suffix}.json"
+        
+        # Reuse on-disk cache if fresh
+        try:
+            if cache_file.exists() and time.time() - cache_file.stat().st_mtime < ttl_seconds:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    self.symbol_info_cache.update(json.load(f))
+                logger.info(f"[OK] Loaded symbol info for {len(self.symbol_info_cache)} symbols from {cache_file}")
+                return len(self.symbol_info_cache)
+        except Exception as e:
+            logger.warning(f"[WARN] Could not read symbol info cache {cache_file}: {e}")
+        
+        try:
+            response = self._make_request('GET', '/api/v3/exchangeInfo')
+            if response is None:
+                return len(self.symbol_info_cache)
+            
+            data = response.json()
+            for s in data.get('symbols', []):
+                symbol = s.get('symbol')
+                if symbol:
+                    self.symbol_info_cache[symbol] = self._parse_symbol_info(s)
+            
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump(self.symbol_info_cache, f)
+            
+            logger.info(f"[OK] Preloaded symbol info for {len(self.symbol_info_cache)} symbols")
+        except Exception as e:
+            logger.warning(f"[WARN] Could not preload symbol info: {e}")
+        
+        return len(self.symbol_info_cache)
@@ -1,21 +1,99 @@
 """
 Round-robin API key rotation for distributing load across multiple keys
 """
+import math
 import time
-from threading import Lock
-from typing import List, Tuple, Optional
-from core.api_client import BinanceAPIClient
+import random
+import asyncio
+from functools import partial
+from contextvars import ContextVar
+from itertools import count
+from threading import Lock, Thread
+from typing import List, Mapping, Tuple, Optional
+import numpy as np
+from core.api_client import BinanceAPIClient, create_session
 from utils.logger import setup_logger
 
 logger = setup_logger("api_rotator")
 
 
+class _WeightState:
+    """
+    Per-key weight bookkeeping for APIRotator (sliding buckets and window sums)
+    
+    Kept in one slotted object so the hot methods work on local attributes only.
+    Weights live in a preallocated int64 array, so the least-loaded lookup is a
+    single numpy argmin.
+    """
+    __slots__ = ('weights', 'bucket_count', 'buckets', 'head', 'slot_locks', 'lock', 'threshold')
+    
+    def __init__(self, n: int, bucket_count: int, threshold: int):
+        # weights[i] is the window sum; buckets is a ring of bucket_count columns, head = newest
+        self.weights = np.zeros(n, dtype=np.int64)
+        self.bucket_count = bucket_count
+        self.buckets = np.zeros((n, bucket_count), dtype=np.int64)
+        self.head = 0
+        self.slot_locks = [Lock() for _ in range(n)]  # Per-key locks for weight updates
+        self.lock = Lock()  # Serialises least-loaded selection and window rolls
+        self.threshold = threshold
+    
+    def select(self) -> Tuple[int, int]:
+        """Return (weight, client_index) of the least-loaded client"""
+        i = int(self.weights.argmin())
+        return int(self.weights[i]), i
+    
+    def select_fitting(self, expected_weight: int, limit: int) -> Optional[int]:
+        """Least-loaded client that can take expected_weight without exceeding limit, or None"""
+        fits = self.weights <= limit - expected_weight
+        if not fits.any():
+            return None
+        return int(np.where(fits, self.weights, np.iinfo(np.int64).max).argmin())
+    
+    def add(self, i: int, weight: int) -> int:
+        """Add weight to key i in the newest bucket; returns its new window sum"""
+        # Always locked: numpy += is a read-modify-write even under the GIL
+        with self.slot_locks[i]:
+            self.buckets[i, self.head] += weight
+            self.weights[i] += weight
+            return int(self.weights[i])
+    
+    def sync(self, i: int, used: int) -> int:
+        """Set key i's window sum to the server-reported value (the difference goes to the newest bucket)"""
+        with self.slot_locks[i]:
+            self.buckets[i, self.head] += used - self.weights[i]
+            self.weights[i] = used
+        return used
+    
+    def roll(self, steps: int) -> bool:
+        """Shift every key's window by steps buckets; returns True if any key is still near the limit"""
+        with self.lock:
+            for slot_lock in self.slot_locks:
+                slot_lock.acquire()
+            try:
+                if steps >= self.bucket_count:
+                    # Whole window expired (idle for a minute or more)
+                    self.buckets.fill(0)
+                    self.weights.fill(0)
+                else:
+                    for _ in range(steps):
+                        self.head = (self.head + 1) % self.bucket_count
+                        self.buckets[:, self.head] = 0  # Oldest bucket becomes the new one
+                    self.buckets.sum(axis=1, out=self.weights)
+            finally:
+                for slot_lock in self.slot_locks:
+                    slot_lock.release()
+            return bool((self.weights >= self.threshold).any())
+
+
 class APIRotator:
     """
     Round-robin API key rotation
     Distributes load across multiple API keys to avoid rate limits
     """
     
+    BUCKET_NS = 10_000_000_000  # 10 seconds
+    BUCKET_COUNT = 6  # 6 x 10s = Binance's rolling 1-minute weight window
+    
     def __init__(self, api_keys: List[Tuple[str, str]], testnet: bool = True):
         """
         Initialize with list of (api_key, secret_key) tuples
@@ -30,7 +108,11 @@ class APIRotator:
         self.api_keys = api_keys
         self.testnet = testnet
         self.current_index = 0
-        self.lock = Lock()
+        self._reset_lock = Lock()
+        
+        # One keep-alive session for all keys (same host), so rotating keys
+        # never costs a new TLS handshake
+        self._session = create_session(max_retries=3, pool_connections=len(api_keys), pool_maxsize=32)
         
         # Initialize clients
         self.clients: List[BinanceAPIClient] = []
@@ -39,63 +121,312 @@ class APIRotator:
                 api_key=api_key,
                 secret_key=secret_key,
                 testnet=testnet,
-                max_retries=3
+                max_retries=3,
+                session=self._session
             )
             self.clients.append(client)
         
-        # Track weight usage per client
-        self.weights = [0] * len(self.clients)
-        self.last_reset = time.time()
-        self.weight_limit = 1000  # Binance limit: 1000 weight per minute
+        # Track weight usage per client over a sliding one-minute window
+        # (BUCKET_COUNT buckets of BUCKET_NS each)
+        self._state = _WeightState(len(self.clients), self.BUCKET_COUNT, 0)
+        self.weights = self._state.weights  # Same buffer; never reallocated
+        self.lock = self._state.lock
+        self.weight_limit = 1000  # Binance limit: 1000 weight per minute (also sets _rotate_threshold)
+        # Integer monotonic nanoseconds, so the hot-path check is a plain int compare.
+        # The bucket phase is randomised so processes started together don't
+        # roll (and free up weight) at the same instant.
+        self._bucket_start = time.monotonic_ns() - random.randrange(self.BUCKET_NS)
+        self._next_roll = self._bucket_start + self.BUCKET_NS  # Deadline for the next bucket roll
+        
+        # Round-robin counter (next() on itertools.count is atomic under the GIL);
+        # the least-loaded scan is only used once some client is near its limit
+        self._rr = count()
+        self._near_limit = False
+        self.latencies_ms: List[Optional[int]] = [None] * len(self.clients)  # Set by aping_test
+        
+        # Long-lived event loop (own thread) for ping_test, so the keys' httpx
+        # pools stay open between cycles instead of being rebuilt per asyncio.run
+        self._ping_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ping_thread: Optional[Thread] = None
+        self._ping_loop_lock = Lock()
+        
+        # EWMA of observed latency per key (inf = never measured); once any key
+        # has a measurement, it breaks ties between keys with similar load
+        self._ewma_latency: List[float] = [math.inf] * len(self.clients)
+        self._has_latency = False
+        
+        # Binance reports the authoritative used weight on every response
+        for i, client in enumerate(self.clients):
+            client.on_response = partial(self.sync_weight_from_headers, i)
         
-        logger.info(f"[API-ROTATOR] Initialized with {len(self.clients)} API keys")
+        # Key bound to the current thread/task as (index, client); index -1 = not bound yet
+        # (stored with the client itself so the hot path needs no list lookup)
+        self._sticky: ContextVar[Tuple[int, Optional[BinanceAPIClient]]] = ContextVar(
+            f"api_key_{id(self)}", default=(-1, None)
+        )
+        
+        logger.info("[API-ROTATOR] Initialized with %d API keys", len(self.clients))
     
-    def get_client(self) -> BinanceAPIClient:
-        """Get next client in round-robin fashion"""
-        with self.lock:
-            # Reset weights every minute
-            if time.time() - self.last_reset > 60:
-                self.weights = [0] * len(self.clients)
-                self.last_reset = time.time()
+    @property
+    def weight_limit(self) -> int:
+        return self._weight_limit
+    
+    @weight_limit.setter
+    def weight_limit(self, value: int):
+        self._weight_limit = value
+        self._rotate_threshold = (value * 8) // 10  # 80% threshold, kept as int for the hot path
+        self._load_band = value // 10  # Keys within 10% of the least-loaded one count as equally loaded
+        self._state.threshold = self._rotate_threshold
+    
+    def _roll_buckets(self):
+        """Advance the sliding window when a bucket expires (double-checked so only one thread rolls)"""
+        now = time.monotonic_ns()
+        if now < self._next_roll:
+            return
+        with self._reset_lock:
+            if now < self._next_roll:
+                return
+            steps = (now - self._bucket_start) // self.BUCKET_NS
+            self._bucket_start += steps * self.BUCKET_NS
+            self._next_roll = self._bucket_start + self.BUCKET_NS
             
+            self._near_limit = self._state.roll(steps)
+    
+    def observe_latency(self, client_index: int, latency_ms: float):
+        """Fold a latency sample into the key's EWMA (alpha = 0.2)"""
+        if not 0 <= client_index < len(self._ewma_latency):
+            return
+        previous = self._ewma_latency[client_index]
+        if previous == math.inf:
+            self._ewma_latency[client_index] = float(latency_ms)
+        else:
+            self._ewma_latency[client_index] = 0.8 * previous + 0.2 * latency_ms
+        self._has_latency = True
+    
+    def _fastest_of_least_loaded(self) -> Optional[int]:
+        """
+        Lowest-latency key among those within _load_band of the least-loaded one
+        
+        Load decides first and latency only breaks near-ties, so new bindings
+        keep spreading across keys instead of piling onto the fastest one.
+        Returns None if every key is at the rotate threshold.
+        """
+        weights = self.weights
+        least_loaded = int(weights.argmin())
+        threshold = self._rotate_threshold
+        if weights[least_loaded] >= threshold:
+            return None
+        
+        cutoff = weights[least_loaded] + self._load_band
+        best_index, best_ms = least_loaded, self._ewma_latency[least_loaded]
+        for i, ms in enumerate(self._ewma_latency):
+            if ms < best_ms and weights[i] <= cutoff and weights[i] < threshold:
+                best_index, best_ms = i, ms
+        return best_index
+    
+    def get_client(self, expected_weight: int = 1) -> BinanceAPIClient:
+        """
+        Get the key bound to the calling thread/task, picking a new one when needed
+        
+        Each context (thread or asyncio task) sticks to one key until that key
+        reaches the rotate threshold, so the steady-state path takes no lock.
+        New bindings go to the least-loaded key, with latency breaking ties
+        between similarly loaded keys (round-robin until latencies are known).
+        
+        expected_weight is the weight of the request about to be made: it is
+        pre-charged to the chosen key, and a key is only handed out if it still
+        fits within weight_limit (otherwise this blocks until the window rolls).
+        """
+        self._roll_buckets()
+        
+        client_index, client = self._sticky.get()
+        if client_index < 0 or self.weights[client_index] >= self._rotate_threshold:
+            client_index = self._select_new()
+            client = self.clients[client_index]
+            self._sticky.set((client_index, client))
+        
+        if self.weights[client_index] + expected_weight > self._weight_limit:
+            client_index = self._wait_for_capacity(expected_weight)
+            client = self.clients[client_index]
+            self._sticky.set((client_index, client))
+        
+        self.add_weight(client_index, expected_weight)
+        self.current_index = client_index
+        return client
+    
+    def _select_new(self) -> int:
+        """Choose a key for a new (or rebalanced) sticky binding"""
+        if self._has_latency:
+            client_index = self._fastest_of_least_loaded()
+            if client_index is not None:
+                return client_index
+        
+        # Plain round-robin, no lock
+        if not self._near_limit:
+            return next(self._rr) % len(self.clients)
+        
+        with self.lock:
             # Find client with lowest weight
-            min_weight = min(self.weights)
-            client_index = self.weights.index(min_weight)
+            min_weight, client_index = self._state.select()
             
             # Rotate if weight limit approaching
-            if min_weight >= self.weight_limit * 0.8:  # 80% threshold
+            if min_weight >= self._rotate_threshold:
                 client_index = (self.current_index + 1) % len(self.clients)
-                logger.warning(f"[API-ROTATOR] Weight limit approaching, rotating to key {client_index + 1}")
+                logger.warning("[API-ROTATOR] Weight limit approaching, rotating to key %d", client_index + 1)
+            return client_index
+    
+    def _wait_for_capacity(self, expected_weight: int) -> int:
+        """Pick the least-loaded key that fits expected_weight, sleeping until a bucket expires if none does"""
+        while True:
+            with self.lock:
+                client_index = self._state.select_fitting(expected_weight, self._weight_limit)
+            if client_index is not None:
+                return client_index
             
-            self.current_index = client_index
-            return self.clients[client_index]
+            wait = max(0, self._next_roll - time.monotonic_ns()) / 1e9
+            logger.warning("[API-ROTATOR] All keys at weight limit, waiting %.1fs", wait)
+            time.sleep(wait)
+            self._roll_buckets()
     
     def add_weight(self, client_index: int, weight: int):
         """Add weight to client (tracking API usage)"""
-        with self.lock:
-            if 0 <= client_index < len(self.weights):
-                self.weights[client_index] += weight
+        if not 0 <= client_index < len(self.weights):
+            return
+        
+        self._roll_buckets()
+        new_weight = self._state.add(client_index, weight)
+        
+        if new_weight >= self._rotate_threshold:
+            self._near_limit = True
+    
+    def sync_weight_from_headers(self, client_index: int, headers: Mapping[str, str]):
+        """Replace the local weight estimate with Binance's X-MBX-USED-WEIGHT-1M, if present"""
+        used = headers.get('X-MBX-USED-WEIGHT-1M')
+        if used is None or not 0 <= client_index < len(self.weights):
+            return
+        try:
+            used = int(used)
+        except ValueError:
+            return
+        
+        self._roll_buckets()
+        self._state.sync(client_index, used)
+        if used >= self._rotate_threshold:
+            self._near_limit = True
+    
+    async def get_client_async(self, expected_weight: int = 1) -> BinanceAPIClient:
+        """Async-friendly get_client (a capacity wait runs in a worker thread)"""
+        return await asyncio.to_thread(self.get_client, expected_weight)
+    
+    async def _ping_one(self, client_index: int) -> Optional[int]:
+        """Ping one key (uncached price fetch); returns latency in ms or None"""
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        price = await self.clients[client_index].get_current_price_async('BTCUSDT', max_age=0)
+        if not price:
+            return None
+        latency_ms = int((loop.time() - start_time) * 1000)
+        self.observe_latency(client_index, latency_ms)
+        return latency_ms
+    
+    async def ping_all(self, max_latency_ms: int = 100) -> List[Tuple[bool, Optional[int]]]:
+        """
+        Ping every key concurrently (feeds the latency EWMA)
+        Returns: [(success, latency_ms)] per key
+        """
+        results = await asyncio.gather(
+            *(self._ping_one(i) for i in range(len(self.clients))), return_exceptions=True
+        )
+        latencies = [r if isinstance(r, int) else None for r in results]
+        self.latencies_ms = latencies
+        return [(ms is not None and ms <= max_latency_ms, ms) for ms in latencies]
+    
+    async def aping_test(self, max_latency_ms: int = 100) -> Tuple[bool, Optional[int]]:
+        """
+        Ping every key concurrently and make the fastest one the current client
+        
+        The clients keep their async HTTP pools open on the calling loop: run
+        this on a long-lived loop (ping_test uses the rotator's own), or await
+        aclose() before a short-lived loop ends.
+        Returns: (success, best_latency_ms)
+        """
+        try:
+            await self.ping_all(max_latency_ms)
+            
+            valid = [(ms, i) for i, ms in enumerate(self.latencies_ms) if ms is not None]
+            if not valid:
+                logger.error("[API-ROTATOR] Ping test failed on all keys")
+                return False, None
+            
+            best_ms, best_index = min(valid)
+            self.current_index = best_index
+            if best_ms <= max_latency_ms:
+                return True, best_ms
+            logger.warning("[API-ROTATOR] High latency: %dms (limit: %dms)", best_ms, max_latency_ms)
+            return False, best_ms
+        
+        except Exception as e:
+            logger.error("[API-ROTATOR] Ping test failed: %s", e)
+            return False, None
+    
+    def _get_ping_loop(self) -> asyncio.AbstractEventLoop:
+        """The rotator's ping event loop (started on first use, runs until close())"""
+        with self._ping_loop_lock:
+            if self._ping_loop is None:
+                loop = asyncio.new_event_loop()
+                thread = Thread(target=loop.run_forever, name="api-ping", daemon=True)
+                thread.start()
+                self._ping_loop, self._ping_thread = loop, thread
+            return self._ping_loop
+    
+    async def aclose(self):
+        """Close every key's async HTTP client (on the loop that used them)"""
+        await asyncio.gather(*(c.aclose() for c in self.clients), return_exceptions=True)
+    
+    def close(self):
+        """Close the async HTTP clients, stop the ping loop and close the shared session"""
+        with self._ping_loop_lock:
+            loop, self._ping_loop = self._ping_loop, None
+            thread, self._ping_thread = self._ping_thread, None
+        
+        if loop is not None:
+            try:
+                asyncio.run_coroutine_threadsafe(self.aclose(), loop).result(timeout=5)
+            except Exception as e:
+                logger.debug("[API-ROTATOR] Error closing async clients: %s", e)
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+            loop.close()
+        
+        self._session.close()
     
     def ping_test(self, max_latency_ms: int = 100) -> Tuple[bool, Optional[int]]:
         """
-        Test API latency
+        Test API latency (all keys in parallel; result for the fastest key)
         Returns: (success, latency_ms)
         """
         try:
-            start_time = time.time()
+            asyncio.get_running_loop()
+        except RuntimeError:
+            future = asyncio.run_coroutine_threadsafe(self.aping_test(max_latency_ms), self._get_ping_loop())
+            return future.result()
+        
+        # Called from inside an event loop: fall back to probing one key synchronously
+        try:
+            start_time = time.perf_counter()
             client = self.get_client()
-            price = client.get_current_price('BTCUSDT')
-            end_time = time.time()
-            
-            latency_ms = int((end_time - start_time) * 1000)
+            client_index = self.current_index
+            price = client.get_current_price('BTCUSDT', max_age=0)  # Bypass price cache to measure real latency
+            latency_ms = int((time.perf_counter() - start_time) * 1000)
+            if price:
+                self.observe_latency(client_index, latency_ms)
             
             if price and latency_ms <= max_latency_ms:
                 return True, latency_ms
             else:
-                logger.warning(f"[API-ROTATOR] High latency: {latency_ms}ms (limit: {max_latency_ms}ms)")
+                logger.warning("[API-ROTATOR] High latency: %dms (limit: %dms)", latency_ms, max_latency_ms)
                 return False, latency_ms
                 
         except Exception as e:
-            logger.error(f"[API-ROTATOR] Ping test failed: {e}")
+            logger.error("[API-ROTATOR] Ping test failed: %s", e)
             return False, None
-
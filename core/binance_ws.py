@@ -0,0 +1,249 @@
+"""
+Binance WebSocket market streams (push-based prices and rolling klines)
+"""
+import json
+import time
+import asyncio
+from threading import Thread, Event, Lock
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from utils.logger import setup_logger
+
+try:
+    import websockets
+except ImportError:
+    websockets = None
+
+logger = setup_logger("binance_ws")
+
+
+class _KlineBuffer:
+    """
+    Preallocated kline window with one row per field (open_time, o, h, l, c, v)
+
+    Has room for 2*limit candles. When appends reach the end, the newest
+    limit-1 candles are moved back to the front, so appends are amortised
+    O(1) and the newest `limit` candles are always one slice.
+    """
+
+    __slots__ = ('data', 'end', 'limit')
+
+    def __init__(self, candles: np.ndarray, limit: int):
+        """candles: (n, 6) array of open_time, o, h, l, c, v, oldest first"""
+        candles = candles[-limit:]
+        self.limit = limit
+        self.data = np.empty((6, 2 * limit), dtype=np.float64)
+        self.data[:, :len(candles)] = candles.T
+        self.end = len(candles)
+
+    def apply(self, candle: Sequence[float]):
+        """Update the current candle, or append a newer one (stale updates are ignored)"""
+        end = self.end
+        last_open = self.data[0, end - 1] if end else None
+        if last_open == candle[0]:
+            self.data[:, end - 1] = candle
+        elif last_open is None or candle[0] > last_open:
+            if end == self.data.shape[1]:
+                keep = self.limit - 1
+                self.data[:, :keep] = self.data[:, end - keep:end]
+                end = keep
+            self.data[:, end] = candle
+            self.end = end + 1
+
+    def window(self) -> np.ndarray:
+        """Copy of the newest `limit` candles as a (6, n) array (each row contiguous)"""
+        return self.data[:, max(0, self.end - self.limit):self.end].copy()
+
+
+class BinanceMarketStream:
+    """
+    Keep last prices and rolling klines up to date from Binance combined streams
+
+    One connection carries <symbol>@miniTicker and <symbol>@kline_<interval>
+    for every symbol. Klines are seeded from REST, then each kline message
+    either updates the last candle or starts a new one in a preallocated
+    per-symbol buffer. Reads return None when the data is stale, so callers
+    can fall back to REST.
+
+    Subclasses for other exchanges override url, _fetch_candles,
+    _subscribe, _keepalive and _handle_message.
+    """
+
+    NAME = "Binance"
+
+    def __init__(
+        self,
+        api_client,
+        symbols: List[str],
+        interval: str = "5m",
+        limit: int = 200,
+        testnet: bool = True,
+        stale_after: float = 10.0,
+        reconnect_delay: float = 5.0
+    ):
+        """
+        Args:
+            api_client: BinanceAPIClient (used to seed klines over REST)
+            symbols: Symbols to subscribe to
+            interval: Kline interval (e.g. '5m')
+            limit: Number of candles kept per symbol
+            testnet: Use testnet stream endpoint
+            stale_after: Seconds without updates before data is considered stale
+            reconnect_delay: Seconds to wait before reconnecting
+        """
+        self.api_client = api_client
+        self.symbols = [s.upper() for s in symbols]
+        self.interval = interval
+        self.limit = limit
+        self.testnet = testnet
+        self.stale_after = stale_after
+        self.reconnect_delay = reconnect_delay
+
+        self._prices: Dict[str, Tuple[float, float]] = {}  # symbol -> (price, monotonic time)
+        self._klines: Dict[str, _KlineBuffer] = {}  # symbol -> open_time, o, h, l, c, v rows
+        self._klines_updated: Dict[str, float] = {}  # symbol -> monotonic time of last kline update
+        self.lock = Lock()
+
+        self.running = False
+        self.stop_event = Event()
+        self.stream_thread = None
+
+    @property
+    def url(self) -> str:
+        """Combined stream URL for all symbols"""
+        base = "wss://testnet.binance.vision" if self.testnet else "wss://stream.binance.com:9443"
+        streams = "/".join(
+            f"{s.lower()}@miniTicker/{s.lower()}@kline_{self.interval}" for s in self.symbols
+        )
+        return f"{base}/stream?streams={streams}"
+
+    def start(self) -> bool:
+        """Start streaming in a background thread"""
+        if websockets is None:
+            logger.warning("[WARN] websockets not installed, market stream disabled (using REST polling)")
+            return False
+        if self.running or not self.symbols:
+            return self.running
+
+        self.running = True
+        self.stop_event.clear()
+        self.stream_thread = Thread(target=self._run, daemon=True)
+        self.stream_thread.start()
+        logger.info(f"[STREAM] {self.NAME} market stream started for {len(self.symbols)} symbols")
+        return True
+
+    def stop(self):
+        """Stop streaming"""
+        self.running = False
+        self.stop_event.set()
+        if self.stream_thread:
+            self.stream_thread.join(timeout=5)
+        logger.info(f"[STREAM] {self.NAME} market stream stopped")
+
+    def get_current_price(self, symbol: str) -> Optional[float]:
+        """Last streamed price, or None if missing/stale"""
+        cached = self._prices.get(symbol.upper())
+        if cached and time.monotonic() - cached[1] < self.stale_after:
+            return cached[0]
+        return None
+
+    def get_klines(self, symbol: str, with_open_time: bool = False) -> Optional[Tuple]:
+        """
+        Rolling klines as (closes, highs, lows, volumes, opens) arrays
+        (plus open_times when with_open_time is True), or None if not seeded yet / stale
+        """
+        symbol = symbol.upper()
+        with self.lock:
+            buffer = self._klines.get(symbol)
+            updated = self._klines_updated.get(symbol, 0.0)
+            if buffer is None or not buffer.end or time.monotonic() - updated >= self.stale_after:
+                return None
+            # Copied under the lock: the stream thread updates the buffer in place
+            open_times, opens, highs, lows, closes, volumes = buffer.window()
+
+        if with_open_time:
+            return closes, highs, lows, volumes, opens, open_times
+        return closes, highs, lows, volumes, opens
+
+    def _seed_klines(self):
+        """Load initial kline history over REST (also fills gaps after a reconnect)"""
+        for symbol in self.symbols:
+            if self.stop_event.is_set():
+                return
+            try:
+                candles = self._fetch_candles(symbol)
+                if candles is None or not len(candles):
+                    continue
+                buffer = _KlineBuffer(candles, self.limit)
+                with self.lock:
+                    self._klines[symbol] = buffer
+                    self._klines_updated[symbol] = time.monotonic()
+            except Exception as e:
+                logger.debug(f"[SKIP] Could not seed klines for {symbol}: {e}")
+
+    def _fetch_candles(self, symbol: str) -> Optional[np.ndarray]:
+        """REST kline history as an (n, 6) array of open_time, o, h, l, c, v (oldest first)"""
+        raw = self.api_client.get_raw_klines(symbol, self.interval, self.limit)
+        if not raw:
+            return None
+        return np.array([k[0:6] for k in raw], dtype=object).astype(np.float64)
+
+    async def _subscribe(self, ws):
+        """Subscribe after connecting (streams are in the Binance URL, so nothing to send)"""
+
+    async def _keepalive(self, ws):
+        """Called on every receive loop iteration (websockets' ping frames suffice for Binance)"""
+
+    def _handle_message(self, message: Dict):
+        """Apply one combined-stream message"""
+        data = message.get('data', message)
+        event = data.get('e')
+        symbol = data.get('s')
+        if not symbol:
+            return
+        now = time.monotonic()
+
+        if event == '24hrMiniTicker':
+            self._prices[symbol] = (float(data['c']), now)
+
+        elif event == 'kline':
+            k = data['k']
+            open_time = float(k['t'])
+            candle = (open_time, float(k['o']), float(k['h']), float(k['l']), float(k['c']), float(k['v']))
+            with self.lock:
+                buffer = self._klines.get(symbol)
+                if buffer is None:
+                    return  # Not seeded yet
+                buffer.apply(candle)  # Update current candle or append a new one
+                self._klines_updated[symbol] = now
+            self._prices[symbol] = (candle[4], now)
+
+    def _run(self):
+        """Thread entry point"""
+        try:
+            asyncio.run(self._listen())
+        except Exception as e:
+            logger.error(f"[ERROR] Market stream crashed: {e}")
+        finally:
+            self.running = False
+
+    async def _listen(self):
+        """Connect, receive and reconnect until stopped"""
+        while not self.stop_event.is_set():
+            try:
+                self._seed_klines()
+                async with websockets.connect(self.url, ping_interval=20) as ws:
+                    await self._subscribe(ws)
+                    logger.info(f"[STREAM] Connected to {self.NAME} market stream")
+                    while not self.stop_event.is_set():
+                        await self._keepalive(ws)
+                        try:
+                            message = await asyncio.wait_for(ws.recv(), timeout=1.0)
+                        except asyncio.TimeoutError:
+                            continue
+                        self._handle_message(json.loads(message))
+            except Exception as e:
+                if self.stop_event.is_set():
+                    break
+                logger.warning(f"[WARN] Market stream disconnected ({e}), reconnecting in {self.reconnect_delay}s...")
+                await asyncio.sleep(self.reconnect_delay)
@@ -2,8 +2,8 @@
 Main trading bot orchestrator - Live Matching Version
 """
 import time
-from threading import Lock, Thread
-from queue import Empty
+from threading import Event, Lock, Thread
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Dict, Any, Optional, List, Tuple
 from core.api_client import BinanceAPIClient
@@ -15,10 +15,10 @@ from core.fee_calculator import FeeCalculator
 from core.slippage_simulator import SlippageSimulator, SpreadSimulator
 from core.safety_manager import SafetyManager
 from core.compound_manager import CompoundManager
-from core.real_time_monitor import RealTimePriceMonitor
+from core.real_time_monitor import RealTimePriceMonitor, PriceUpdate
 from data.market_data import MarketData
 from data.storage import TradeStorage
-from indicators.calculator import IndicatorCalculator
+from indicators.calculator import IndicatorCalculator, IndicatorState
 from indicators.market_regime import MarketRegimeDetector
 from strategies.scalping import ScalpingStrategy
 from strategies.day_trading import DayTradingStrategy
@@ -35,6 +35,8 @@ logger = setup_logger("bot")
 class TradingBot:
     """Main trading bot orchestrator"""
     
+    SIGNAL_BATCH_SIZE = 64  # Max monitor signals dispatched per handler wakeup
+    
     def __init__(self, api_key: str, secret_key: str, api_keys_list: Optional[List[Tuple[str, str]]] = None):
         # Load config
         try:
@@ -46,6 +48,7 @@ class TradingBot:
         
         trading_config = self.config.get_trading_config()
         risk_config = self.config.get_risk_config()
+        api_config = self.config.get_api_config()
         
         # Trading mode
         self.exchange_name = trading_config.get('exchange', 'bybit').lower()  # Bybit by default (lower fees)
@@ -53,7 +56,7 @@ class TradingBot:
         self.trading_type = trading_config.get('trading_type', 'spot')
         self.use_maker_orders = trading_config.get('use_maker_orders', False)
         testnet = trading_config.get('testnet', True)
-        max_retries = self.config.get_api_config().get('max_retries', 3)
+        max_retries = api_config.get('max_retries', 3)
         
         # Initialize API client based on exchange
         if self.exchange_name == 'bybit':
@@ -89,16 +92,44 @@ class TradingBot:
                     max_retries=max_retries
                 )
                 logger.info("[API] Binance single API key mode")
+            
+            # Live orders need lot/tick sizes: fetch them for all symbols once (cached on disk for 24h)
+            if not self.paper_trading:
+                clients = self.api_rotator.clients if self.api_rotator else [self.api_client]
+                for client in clients:
+                    client.preload_all_symbol_info()
+        
+        # Push-based prices/klines over one WebSocket instead of per-symbol REST polling
+        self.market_stream = None
+        if trading_config.get('use_websocket', True):
+            if self.exchange_name == 'bybit':
+                from core.exchanges.bybit_ws import BybitMarketStream as MarketStream
+            else:
+                from core.binance_ws import BinanceMarketStream as MarketStream
+            self.market_stream = MarketStream(
+                api_client=self.api_client,
+                symbols=trading_config.get('symbols', []),
+                interval=trading_config.get('kline_interval', '5m'),
+                limit=trading_config.get('kline_limit', 200),
+                testnet=testnet
+            )
+            if not self.market_stream.start():
+                self.market_stream = None
         
         self.market_data = MarketData(
             api_client=self.api_client,
-            cache_duration=self.config.get_api_config().get('cache_duration', 5)
+            cache_duration=api_config.get('cache_duration', 5),
+            stream=self.market_stream,
+            align_klines_to_bar=api_config.get('align_klines_to_bar', True)
         )
         
         # Fee and cost calculators (with exchange-specific fees)
         self.fee_calculator = FeeCalculator(self.trading_type, self.use_maker_orders, exchange=self.exchange_name)
+        self._min_tp_pct = self.fee_calculator.get_minimum_take_profit_pct()  # Constant for this fee config
+        self._round_trip_fee_pct = self.fee_calculator.get_round_trip_fee_pct()
         self.slippage_simulator = SlippageSimulator()
         self.spread_simulator = SpreadSimulator()
+        self._opposite_action = {'BUY': 'SELL', 'SELL': 'BUY'}
         self.profit_calculator = ProfitCalculator(self.trading_type, self.use_maker_orders, exchange=self.exchange_name)
         
         self.position_manager = PositionManager()
@@ -118,11 +149,14 @@ class TradingBot:
             fee_calculator=self.fee_calculator,
             slippage_simulator=self.slippage_simulator,
             spread_simulator=self.spread_simulator,
-            check_interval=trading_config.get('price_check_interval', 1.0)
+            check_interval=trading_config.get('price_check_interval', 1.0),
+            market_stream=self.market_stream
         )
         self.price_monitor.start_monitoring()
         
-        # Start price monitor handler
+        # Start price monitor handler (parked on _handler_released until start()/stop())
+        self._active_flag = False
+        self._handler_released = Event()
         self._start_price_monitor_handler()
         
         # Initialize strategies
@@ -141,11 +175,20 @@ class TradingBot:
         if strategies_config.get('micro_scalp', {}).get('enabled', False):
             self.strategies['micro_scalp'] = MicroScalpStrategy('micro_scalp', strategies_config.get('micro_scalp', {}))
         
+        self._rebuild_strategy_cache()
+        
+        # Running indicator state per symbol (each symbol is scanned by one worker at a time)
+        self._indicator_state: Dict[str, IndicatorState] = {}
+        self._indicators_cache: Dict[str, Tuple[Tuple, Dict[str, Any], str]] = {}  # symbol -> (latest candle, indicators, regime)
+        
+        # Market regime detector (shared across symbol scans)
+        self.regime_detector = MarketRegimeDetector()
+        
         # Trading state
-        self.initial_capital = trading_config.get('initial_capital', 10000.0)
-        self.current_capital = self.initial_capital
+        initial_capital = trading_config.get('initial_capital', 10000.0)
+        self._capital = (initial_capital, initial_capital)  # (initial, current), always replaced as a whole
         self.running = False
-        self.lock = Lock()
+        self.lock = Lock()  # Serialises capital writers (readers use the _capital snapshot)
         
         # Initialize risk manager
         self.risk_manager.set_capital(self.initial_capital, self.current_capital)
@@ -154,10 +197,55 @@ class TradingBot:
         self.symbols = trading_config.get('symbols', [])
         self.scan_interval = trading_config.get('scan_interval', 30)
         
+        # Persistent pool for concurrent symbol scans (network-bound); trade
+        # decisions are serialised with scan_lock so limits are checked atomically
+        self._scan_pool = ThreadPoolExecutor(
+            max_workers=min(max(len(self.symbols), 1), 16),
+            thread_name_prefix="scan"
+        )
+        self.scan_lock = Lock()
+        
+        # Live exits for different positions in one signal batch run on this pool, so their
+        # orders are in flight together; bookkeeping after each fill is serialised by close_lock
+        self._close_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="close")
+        self.close_lock = Lock()
+        
+        # Partial profit settings (read once; used on every partial-close signal)
+        self.trading_config = trading_config
+        self._partial_close_frac = trading_config.get('partial_close_pct', 50.0) / 100.0  # Convert to 0-1
+        self._partial_profit_enabled = trading_config.get('partial_profit_taking', True)
+        
         logger.info(f"[OK] Trading Bot initialized with {len(self.strategies)} strategies")
         logger.info(f"[FEE] Trading type: {self.trading_type}, Maker orders: {self.use_maker_orders}")
-        min_tp = self.fee_calculator.get_minimum_take_profit_pct()
-        logger.info(f"[FEE] Minimum take-profit: {min_tp:.2f}% (after all costs)")
+        logger.info(f"[FEE] Minimum take-profit: {self._min_tp_pct:.2f}% (after all costs)")
+    
+    def _rebuild_strategy_cache(self):
+        """Refresh values derived from self.strategies (call after adding/removing a strategy)"""
+        # Frozen (name, strategy) pairs for the per-symbol scan loop
+        self._strategies_tuple = tuple(self.strategies.items())
+        # Entries only consider enabled strategies (exits still cover every strategy)
+        self._enabled_strategies = tuple(
+            (name, strategy) for name, strategy in self._strategies_tuple if strategy.enabled
+        )
+        # Max hold time per strategy in seconds (checked against monotonic entry time)
+        self._max_hold_sec = {
+            name: strategy.max_hold_time_minutes * 60.0 for name, strategy in self._strategies_tuple
+        }
+        # Entry take-profit and fee-guard verdict per strategy: both depend only on the
+        # strategy's take_profit_pct and the fee config, not on the symbol or price
+        self._entry_tp_pct = {}
+        self._fee_guard = {}
+        for name, strategy in self._strategies_tuple:
+            take_profit_pct = strategy.take_profit_pct
+            if take_profit_pct < self._min_tp_pct:
+                logger.warning(f"[WARN] {name}: take profit {take_profit_pct:.2f}% too low, adjusting to {self._min_tp_pct:.2f}%")
+                take_profit_pct = self._min_tp_pct
+            self._entry_tp_pct[name] = take_profit_pct
+            self._fee_guard[name] = self.safety_manager.check_fee_guard(
+                entry_price=0.0,  # Unused by the check
+                target_profit_pct=take_profit_pct,
+                expected_fees_pct=self._round_trip_fee_pct
+            )
     
     def _start_price_monitor_handler(self):
         """Handle real-time price monitor signals"""
@@ -165,54 +253,56 @@ class TradingBot:
         handler_thread.start()
         logger.info("[MONITOR] Price monitor handler started")
     
+    @property
+    def initial_capital(self) -> float:
+        return self._capital[0]
+    
+    @property
+    def current_capital(self) -> float:
+        return self._capital[1]
+    
+    def _adjust_capital(self, amount: float, rebase: bool = False) -> Tuple[float, float]:
+        """
+        Add amount to current capital (rebase=True also moves initial capital to it)
+        
+        The new (initial, current) pair is published with one attribute store, so
+        readers never see a half-applied compound. Writers still serialise on
+        self.lock: Python has no compare-and-swap, and two unsynchronised
+        read-add-store sequences could drop a trade's P&L. The risk manager is
+        updated inside the same critical section (a few attribute stores), so
+        concurrent closes can't publish their results to it out of order.
+        
+        Returns:
+            The new (initial_capital, current_capital)
+        """
+        with self.lock:
+            initial_capital, current_capital = self._capital
+            current_capital += amount
+            self._capital = (current_capital if rebase else initial_capital, current_capital)
+            self.risk_manager.set_capital(*self._capital)
+            return self._capital
+    
     def _handle_price_updates(self):
         """Process price monitor signals for immediate profit taking"""
-        # Handler runs continuously to process monitor signals
-        # It checks both bot running state and monitor running state
+        # Handler runs until the bot stops; _active_flag is set by start()
+        # and cleared by stop() (before the monitor is stopped)
+        signals = self.price_monitor.price_updates
+        self._handler_released.wait()  # Park until the bot starts (no polling before start)
         while True:
             try:
-                # Only process if bot is running AND monitor is running
-                if self.running and self.price_monitor.running:
-                    # Use get_nowait() to avoid race condition with empty() check
-                    # get_nowait() raises Empty exception if queue is empty
-                    try:
-                        update = self.price_monitor.price_updates.get_nowait()
-                        
-                        # SAFE: Get all values with defaults and validation
-                        symbol = update.get('symbol')
-                        strategy = update.get('strategy', 'unknown')
-                        signal = update.get('signal')
-                        current_price = update.get('current_price')
-                        
-                        # Validate required values
-                        if not symbol or not signal or current_price is None:
-                            logger.warning(f"[SKIP] Invalid update data: {update}")
-                            continue
-                        
-                        if signal == 'TAKE_PROFIT':
-                            # IMMEDIATE PROFIT TAKING
-                            logger.info(f"[PROFIT TARGET] {symbol} ({strategy}) reached target! Taking profit NOW at ${current_price:.2f}...")
-                            self._close_position_immediately(symbol, strategy, current_price, reason='TAKE_PROFIT')
-                        
-                        elif signal == 'PARTIAL_FEES_PROFIT':
-                            # FEES COVERED - PARTIAL CLOSE (Your Smart Idea!)
-                            logger.info(f"[PARTIAL FEES] {symbol} ({strategy}) fees covered! Partial closing NOW at ${current_price:.2f}...")
-                            self._partial_close_for_fees(symbol, strategy, current_price)
-                        
-                        elif signal == 'BREAKEVEN_PROFIT':
-                            # FEES COVERED + SMALL PROFIT - FULL CLOSE (fallback if partial disabled)
-                            logger.info(f"[FEES COVERED] {symbol} ({strategy}) fees covered + small profit! Closing NOW at ${current_price:.2f}...")
-                            self._close_position_immediately(symbol, strategy, current_price, reason='FEES_COVERED_PROFIT')
-                        
-                        elif signal == 'STOP_LOSS':
-                            logger.warning(f"[STOP LOSS] {symbol} ({strategy}) hit stop loss! Closing at ${current_price:.2f}...")
-                            self._close_position_immediately(symbol, strategy, current_price, reason='STOP_LOSS')
-                    except Empty:
-                        # Queue is empty, wait a bit
-                        time.sleep(0.1)
-                else:
-                    # Bot or monitor not running, wait longer
-                    time.sleep(1.0)
+                # Block until a signal arrives (no polling); stop() pushes None to wake it.
+                # poll() returns None on timeout rather than raising queue.Empty
+                first = signals.poll(timeout=1.0)
+                if not self._active_flag:
+                    break  # Stopped while waiting
+                if first is None:
+                    continue
+                
+                # Drain whatever else is queued (bursts, e.g. many stop losses at once)
+                # and dispatch in one pass instead of one loop iteration per signal
+                batch = [first]
+                batch.extend(signals.drain(self.SIGNAL_BATCH_SIZE - 1))
+                self._dispatch_price_signals(batch)
                 
             except KeyboardInterrupt:
                 break
@@ -220,41 +310,95 @@ class TradingBot:
                 logger.error(f"[ERROR] Error handling price updates: {e}")
                 time.sleep(1.0)
     
+    def _dispatch_price_signals(self, batch: List[Optional[PriceUpdate]]):
+        """
+        Dispatch a batch of monitor signals
+        
+        The monitor re-emits a signal on every pass while its condition holds,
+        so a handler that fell behind finds several per position. They are
+        coalesced to the latest one per (symbol, strategy): only the freshest
+        price matters, and replaying stale ones could e.g. partial-close twice.
+        In live trading, different positions then run concurrently on
+        _close_pool so their exit orders overlap instead of queueing behind
+        each other's round-trips.
+        """
+        latest: Dict[Tuple[str, str], PriceUpdate] = {}
+        for update in batch:
+            if update is not None:
+                latest[(update.symbol, update.strategy)] = update
+        
+        if self.paper_trading or len(latest) < 2:
+            for update in latest.values():
+                self._try_dispatch_price_signal(update)
+            return
+        
+        futures = [self._close_pool.submit(self._try_dispatch_price_signal, update)
+                   for update in latest.values()]
+        for future in futures:
+            future.result()  # Finish the batch before draining the next one
+    
+    def _try_dispatch_price_signal(self, update: PriceUpdate):
+        """_dispatch_price_signal, logging (not raising) errors"""
+        try:
+            self._dispatch_price_signal(update)
+        except Exception as e:
+            logger.error(f"[ERROR] Error handling price signal {update}: {e}")
+    
+    def _dispatch_price_signal(self, update: PriceUpdate):
+        """Route one price monitor signal to the matching close helper"""
+        symbol = update.symbol
+        strategy = update.strategy or 'unknown'
+        signal = update.signal
+        current_price = update.current_price
+        
+        # Validate required values
+        if not symbol or not signal or current_price is None:
+            logger.warning(f"[SKIP] Invalid update data: {update}")
+            return
+        
+        if signal == 'TAKE_PROFIT':
+            # IMMEDIATE PROFIT TAKING
+            logger.info(f"[PROFIT TARGET] {symbol} ({strategy}) reached target! Taking profit NOW at ${current_price:.2f}...")
+            self._close_position_immediately(symbol, strategy, current_price, reason='TAKE_PROFIT')
+        
+        elif signal == 'PARTIAL_FEES_PROFIT':
+            # FEES COVERED - PARTIAL CLOSE (Your Smart Idea!)
+            logger.info(f"[PARTIAL FEES] {symbol} ({strategy}) fees covered! Partial closing NOW at ${current_price:.2f}...")
+            self._partial_close_for_fees(symbol, strategy, current_price)
+        
+        elif signal == 'BREAKEVEN_PROFIT':
+            # FEES COVERED + SMALL PROFIT - FULL CLOSE (fallback if partial disabled)
+            logger.info(f"[FEES COVERED] {symbol} ({strategy}) fees covered + small profit! Closing NOW at ${current_price:.2f}...")
+            self._close_position_immediately(symbol, strategy, current_price, reason='FEES_COVERED_PROFIT')
+        
+        elif signal == 'STOP_LOSS':
+            logger.warning(f"[STOP LOSS] {symbol} ({strategy}) hit stop loss! Closing at ${current_price:.2f}...")
+            self._close_position_immediately(symbol, strategy, current_price, reason='STOP_LOSS')
+    
     def _reload_positions_to_monitor(self):
         """Reload existing open positions into price monitor (for bot restarts)"""
         try:
-            open_positions = self.position_manager.get_all_positions()
-            if not open_positions:
+            open_count = self.position_manager.get_open_positions_count()
+            if not open_count:
                 return
             
-            logger.info(f"[MONITOR] Reloading {len(open_positions)} open positions into price monitor...")
+            logger.info(f"[MONITOR] Reloading {open_count} open positions into price monitor...")
             
-            for position in open_positions:
-                if position.status != 'OPEN':
-                    continue
-                
-                # Calculate profit/loss percentages from stop_loss and take_profit prices
-                if position.action == 'BUY':
-                    stop_loss_pct = ((position.entry_price - position.stop_loss) / position.entry_price) * 100.0
-                    take_profit_pct = ((position.take_profit - position.entry_price) / position.entry_price) * 100.0
-                else:  # SELL (short)
-                    stop_loss_pct = ((position.stop_loss - position.entry_price) / position.entry_price) * 100.0
-                    take_profit_pct = ((position.entry_price - position.take_profit) / position.entry_price) * 100.0
-                
-                # Add to monitor
+            for position in self.position_manager.iter_open_positions():
+                # Add to monitor (SL/TP percentages were stored on the position at open)
                 self.price_monitor.add_position(
                     symbol=position.symbol,
                     strategy=position.strategy,
                     entry_price=position.entry_price,
                     quantity=position.quantity,
-                    target_profit_pct=take_profit_pct,
-                    stop_loss_pct=stop_loss_pct,
+                    target_profit_pct=position.take_profit_pct,
+                    stop_loss_pct=position.stop_loss_pct,
                     action=position.action
                 )
                 
                 logger.info(f"[MONITOR] Reloaded {position.symbol} ({position.strategy}) into monitor")
             
-            logger.info(f"[OK] Successfully reloaded {len(open_positions)} positions into price monitor")
+            logger.info(f"[OK] Successfully reloaded {open_count} positions into price monitor")
             
         except Exception as e:
             logger.error(f"[ERROR] Error reloading positions to monitor: {e}", exc_info=True)
@@ -263,15 +407,25 @@ class TradingBot:
         """Start trading bot"""
         try:
             self.running = True
+            self._active_flag = True
+            self._handler_released.set()
             logger.info("[START] Starting trading bot...")
             
             # Reload existing open positions into price monitor
             self._reload_positions_to_monitor()
             
+            # Fixed cadence: sleep until the next deadline rather than a full interval
+            # after each cycle, so slow cycles don't stretch the scan period
+            next_tick = time.monotonic()
             while self.running:
                 try:
                     self._trading_cycle()
-                    time.sleep(self.scan_interval)
+                    next_tick += self.scan_interval
+                    delay = next_tick - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        next_tick = time.monotonic()  # Overran the interval: catch up, don't burst
                 except KeyboardInterrupt:
                     logger.info("[STOP] Bot stopped by user")
                     break
@@ -285,7 +439,16 @@ class TradingBot:
     def stop(self):
         """Stop trading bot"""
         self.running = False
+        self._active_flag = False
+        self._handler_released.set()  # Let a never-started handler run into the sentinel and exit
+        self.price_monitor.price_updates.put(None)  # Wake the signal handler immediately
         self.price_monitor.stop_monitoring()
+        self._scan_pool.shutdown(wait=False)
+        self._close_pool.shutdown(wait=False)
+        if self.market_stream:
+            self.market_stream.stop()
+        if self.api_rotator:
+            self.api_rotator.close()
         logger.info("[STOP] Trading bot stopped")
     
     def _trading_cycle(self):
@@ -317,100 +480,184 @@ class TradingBot:
             self._scan_count += 1
             if self._scan_count % 10 == 0:
                 logger.info(f"[SCAN] Scan cycle #{self._scan_count} - Scanning {len(self.symbols)} symbols")
-            for symbol in self.symbols:
+            
+            # Prefetch klines for all symbols concurrently and prices in one request
+            # (warms the market data cache, so the per-symbol scans below mostly hit it)
+            self.market_data.get_klines_batch(self.symbols)
+            self.market_data.get_prices_batch(self.symbols)
+            
+            futures = {self._scan_pool.submit(self._scan_symbol, symbol): symbol for symbol in self.symbols}
+            traceback_logged = False  # One traceback per cycle is enough; the rest log the message only
+            for future in as_completed(futures):
+                symbol = futures[future]
                 try:
-                    self._scan_symbol(symbol)
+                    future.result()
                 except Exception as e:
                     # Handle 400 errors (symbol not available) gracefully
                     error_str = str(e).lower()
                     if '400' in error_str or 'bad request' in error_str or 'not available' in error_str:
                         logger.debug(f"[SKIP] {symbol} not available, skipping silently")
                     else:
-                        logger.error(f"[ERROR] Error scanning {symbol}: {e}", exc_info=True)
+                        logger.error(f"[ERROR] Error scanning {symbol}: {e}", exc_info=not traceback_logged)
+                        traceback_logged = True
         except Exception as e:
             logger.error(f"[ERROR] Error in trading cycle: {e}")
     
     def _scan_symbol(self, symbol: str):
         """Scan a symbol for trading opportunities"""
         try:
+            # Nothing to manage here and no room for a new position: skip the indicator work
+            # (a cheap pre-check; _check_position_entry re-checks the limits under scan_lock)
+            if not self.position_manager.has_position(symbol) and not self._can_open_any_position():
+                return
+            
             # Get market data
-            klines = self.market_data.get_klines(symbol)
+            klines = self.market_data.get_klines(symbol, with_open_time=True)
             if not klines:
-                logger.debug(f"[SCAN] {symbol}: No klines data")
+                logger.debug("[SCAN] %s: No klines data", symbol)
                 return
             
-            closes, highs, lows, volumes, opens = klines
-            
-            # Calculate indicators
-            indicators = IndicatorCalculator.calculate_all(closes, highs, lows, volumes, opens)
-            if not indicators:
-                logger.debug(f"[SCAN] {symbol}: No indicators calculated")
-                return
+            closes, highs, lows, volumes, opens, open_times = klines
             
-            # Detect market regime
-            regime_detector = MarketRegimeDetector()
-            market_regime = regime_detector.detect_regime(indicators)
+            # Calculate indicators (incrementally: only newly closed candles are folded in).
+            # Reuse the last result if the latest candle hasn't changed since the previous scan
+            candle_key = (open_times[-1], closes[-1], highs[-1], lows[-1], volumes[-1])
+            cached = self._indicators_cache.get(symbol)
+            if cached and cached[0] == candle_key:
+                indicators = dict(cached[1])
+                market_regime = cached[2]
+            else:
+                state = self._indicator_state.get(symbol)
+                if state is None:
+                    state = self._indicator_state[symbol] = IndicatorState()
+                indicators = IndicatorCalculator.update(state, closes, highs, lows, volumes, opens, open_times)
+                if not indicators:
+                    logger.debug("[SCAN] %s: No indicators calculated", symbol)
+                    return
+                
+                # Detect market regime (a pure function of the indicators, so cached with them)
+                market_regime = self.regime_detector.detect_regime(indicators)
+                self._indicators_cache[symbol] = (candle_key, dict(indicators), market_regime)
             
             # Get current price
             current_price = self.market_data.get_current_price(symbol)
             if not current_price:
-                logger.debug(f"[SCAN] {symbol}: No current price")
+                logger.debug("[SCAN] %s: No current price", symbol)
                 return
             
-            # Check existing positions
-            for strategy_name, strategy in self.strategies.items():
-                if self.position_manager.has_position(symbol, strategy_name):
-                    # Check if position should be closed
-                    self._check_position_exit(symbol, strategy_name, current_price)
-                else:
-                    # Check if new position should be opened
-                    self._check_position_entry(symbol, strategy_name, indicators, current_price, market_regime)
+            # Entry signals only depend on this symbol's data: generate them before taking
+            # scan_lock so symbols overlap, and serialise just the limit checks and orders
+            entry_signals = {}
+            if self._can_open_any_position():
+                for strategy_name, strategy in self._enabled_strategies:
+                    if not self.position_manager.has_position(symbol, strategy_name):
+                        entry_signals[strategy_name] = self._generate_entry_signal(
+                            symbol, strategy_name, strategy, indicators, current_price, market_regime
+                        )
+            
+            # Check existing positions (one symbol at a time: limits and capital are shared)
+            with self.scan_lock:
+                for strategy_name, strategy in self._strategies_tuple:
+                    if self.position_manager.has_position(symbol, strategy_name):
+                        # Check if position should be closed
+                        self._check_position_exit(symbol, strategy_name, current_price, indicators)
+                    elif entry_signals.get(strategy_name):
+                        # Check if new position should be opened
+                        self._check_position_entry(
+                            symbol, strategy_name, strategy, entry_signals[strategy_name], indicators, current_price
+                        )
         except Exception as e:
             logger.error(f"[ERROR] Error scanning {symbol}: {e}")
     
-    def _check_position_entry(
+    def _can_open_any_position(self) -> bool:
+        """Whether the safety and risk position limits currently allow a new entry"""
+        current_positions = self.position_manager.get_open_positions_count()
+        if not self.safety_manager.check_position_limit(current_positions)[0]:
+            return False
+        return self.risk_manager.can_open_position(current_positions)[0]
+    
+    def _fill_price(self, symbol: str, price: float, side: str, volatility: float = 0.0) -> float:
+        """
+        Simulated execution price for a market order: slippage plus half the spread
+        
+        BUY fills above price (slippage up, ask side), anything else below (bid side).
+        Same result as apply_slippage followed by get_ask_price/get_bid_price.
+        """
+        rate = self.slippage_simulator.get_rate(symbol, volatility)
+        half_spread = self.spread_simulator.get_spread(symbol) / 2
+        if side.upper() == 'BUY':
+            return price * (1 + rate) * (1 + half_spread)
+        return max(0.0, price * (1 - rate)) * (1 - half_spread)
+    
+    def _generate_entry_signal(
         self,
         symbol: str,
         strategy_name: str,
+        strategy,
         indicators: Dict[str, Any],
         price: float,
         market_regime: str
+    ) -> Optional[Dict[str, Any]]:
+        """Strategy signal for a new position, or None if there is none above the confidence threshold"""
+        try:
+            # Generate signal
+            signal = strategy.generate_signal(symbol, indicators, price, market_regime)
+            if not signal:
+                logger.debug("[SIGNAL] %s (%s): No signal generated", symbol, strategy_name)
+                return None
+            
+            # Check confidence threshold
+            confidence = signal.get('confidence', 0.0)
+            confidence = clamp_value(confidence, 0.0, 100.0)  # Ensure 0-100
+            threshold = strategy.confidence_threshold
+            
+            # Log all signals (even if below threshold) - important for debugging
+            logger.info(f"[SIGNAL] {symbol} ({strategy_name}): {signal.get('action')} signal, Conf={confidence:.1f}%, Threshold={threshold:.1f}%")
+            
+            if confidence < threshold:
+                logger.info(f"[SKIP] {symbol} ({strategy_name}): Confidence {confidence:.1f}% < {threshold:.1f}% threshold - SKIPPED")
+                return None
+            
+            return signal
+        except Exception as e:
+            logger.error(f"[ERROR] Error generating signal for {symbol} ({strategy_name}): {e}")
+            return None
+    
+    def _check_position_entry(
+        self,
+        symbol: str,
+        strategy_name: str,
+        strategy,
+        signal: Dict[str, Any],
+        indicators: Dict[str, Any],
+        price: float
     ):
-        """Check if a new position should be opened"""
+        """
+        Open a position for a signal from _generate_entry_signal if limits still allow it
+        
+        strategy is an enabled strategy from self._enabled_strategies.
+        """
         try:
-            strategy = self.strategies.get(strategy_name)
-            if not strategy or not strategy.enabled:
-                return
+            # SAFETY CHECK: Fee guard (profit margin validation, precomputed per strategy)
+            fee_ok, fee_reason = self._fee_guard[strategy_name]
+            if not fee_ok:
+                logger.debug("[SAFETY] %s (%s): Fee guard check failed - %s", symbol, strategy_name, fee_reason)
+                return  # Skip - insufficient profit margin
             
             # SAFETY CHECK: Position limit (max 3 positions for micro-scalp)
             current_positions = self.position_manager.get_open_positions_count()
             can_open_safety, safety_reason = self.safety_manager.check_position_limit(current_positions)
             if not can_open_safety:
-                logger.debug(f"[SAFETY] {symbol} ({strategy_name}): Position limit reached ({current_positions})")
+                logger.debug("[SAFETY] %s (%s): Position limit reached (%s)", symbol, strategy_name, current_positions)
                 return  # Skip - position limit reached
             
             # Check if we can open new position
             can_open, reason = self.risk_manager.can_open_position(current_positions)
             if not can_open:
-                logger.debug(f"[RISK] {symbol} ({strategy_name}): Cannot open - {reason}")
-                return
-            
-            # Generate signal
-            signal = strategy.generate_signal(symbol, indicators, price, market_regime)
-            if not signal:
-                logger.debug(f"[SIGNAL] {symbol} ({strategy_name}): No signal generated")
+                logger.debug("[RISK] %s (%s): Cannot open - %s", symbol, strategy_name, reason)
                 return
             
-            # Check confidence threshold
-            confidence = signal.get('confidence', 0.0)
-            confidence = clamp_value(confidence, 0.0, 100.0)  # Ensure 0-100
-            
-            # Log all signals (even if below threshold) - important for debugging
-            logger.info(f"[SIGNAL] {symbol} ({strategy_name}): {signal.get('action')} signal, Conf={confidence:.1f}%, Threshold={strategy.confidence_threshold:.1f}%")
-            
-            if confidence < strategy.confidence_threshold:
-                logger.info(f"[SKIP] {symbol} ({strategy_name}): Confidence {confidence:.1f}% < {strategy.confidence_threshold:.1f}% threshold - SKIPPED")
-                return
+            confidence = clamp_value(signal.get('confidence', 0.0), 0.0, 100.0)
             
             # Calculate position size
             quantity = self.risk_manager.calculate_position_size(
@@ -426,42 +673,18 @@ class TradingBot:
             position_size_usd = quantity * price
             can_size, size_reason = self.safety_manager.check_position_size(position_size_usd)
             if not can_size:
-                logger.debug(f"[SAFETY] {symbol} ({strategy_name}): Position size check failed - {size_reason}")
+                logger.debug("[SAFETY] %s (%s): Position size check failed - %s", symbol, strategy_name, size_reason)
                 return  # Skip - position too large
             
-            # Apply slippage and spread to entry price
+            # Apply slippage and spread to entry price (anything other than BUY enters as SELL)
             volatility = indicators.get('atr_pct', 0.0) / 100.0  # Convert to 0-1 range
             action = signal.get('action', 'BUY')  # SAFE: Get action with default
-            actual_entry_price = self.slippage_simulator.apply_slippage(
-                symbol, price, action, volatility
-            )
-            
-            # Apply spread
-            if action == 'BUY':
-                actual_entry_price = self.spread_simulator.get_ask_price(actual_entry_price, symbol)
-            else:  # SELL
-                actual_entry_price = self.spread_simulator.get_bid_price(actual_entry_price, symbol)
+            actual_entry_price = self._fill_price(symbol, price, action, volatility)
             
             # Calculate stop loss and take profit based on actual entry price
+            # (take profit already raised to the after-fees minimum)
             stop_loss_pct = strategy.stop_loss_pct
-            take_profit_pct = strategy.take_profit_pct
-            
-            # Ensure minimum take profit (after fees)
-            min_tp_pct = self.fee_calculator.get_minimum_take_profit_pct()
-            if take_profit_pct < min_tp_pct:
-                logger.warning(f"[WARN] Take profit {take_profit_pct:.2f}% too low, adjusting to {min_tp_pct:.2f}%")
-                take_profit_pct = min_tp_pct
-            
-            # SAFETY CHECK: Fee guard (profit margin validation)
-            expected_fees_pct = (self.fee_calculator.calculate_round_trip_fee(position_size_usd) / position_size_usd) * 100.0 if position_size_usd > 0 else 0.2
-            fee_ok, fee_reason = self.safety_manager.check_fee_guard(
-                entry_price=actual_entry_price,
-                target_profit_pct=take_profit_pct,
-                expected_fees_pct=expected_fees_pct
-            )
-            if not fee_ok:
-                logger.debug(f"[SAFETY] {symbol} ({strategy_name}): Fee guard check failed - {fee_reason}")
-                return  # Skip - insufficient profit margin
+            take_profit_pct = self._entry_tp_pct[strategy_name]
             
             stop_loss = self.risk_manager.calculate_stop_loss(
                 entry_price=actual_entry_price,
@@ -524,18 +747,17 @@ class TradingBot:
                 position = self.position_manager.get_position(symbol, strategy_name)
                 if position:
                     position.entry_volume_ratio = indicators.get('volume_ratio', 1.0)
+                    # Entry-side costs are fixed once filled; closes only compute the exit side
+                    position.entry_costs = self.profit_calculator.entry_costs_per_unit(
+                        symbol, actual_entry_price, action
+                    )
                 
                 mode = "LIVE" if not self.paper_trading else "PAPER"
                 logger.info(f"[{mode}] Opened {action} position: {symbol} @ ${actual_entry_price:.2f} qty={quantity:.6f}")
                 logger.info(f"[COSTS] Entry price adjusted: ${price:.2f} -> ${actual_entry_price:.2f} (slippage + spread)")
                 
-                # Get partial profit taking config
-                trading_config = self.config.get_trading_config()
-                partial_profit_enabled = trading_config.get('partial_profit_taking', True)
-                
-                # Micro-scalp: NO partial close (inefficient for $10 capital)
-                if strategy_name == 'micro_scalp':
-                    partial_profit_enabled = False
+                # Partial profit taking (from config; never for micro-scalp: inefficient for $10 capital)
+                partial_profit_enabled = self._partial_profit_enabled and strategy_name != 'micro_scalp'
                 
                 # Add to real-time monitoring for immediate profit taking
                 self.price_monitor.add_position(
@@ -559,10 +781,27 @@ class TradingBot:
         reason: str = 'TARGET_REACHED'
     ):
         """Close position IMMEDIATELY when target reached (with real costs)"""
+        # Claim the position first: exits run on several threads (close pool, scans),
+        # and only one of them may send an exit order for it
+        position = self.position_manager.claim_exit(symbol, strategy_name)
+        if not position:
+            return
         try:
-            # Get position
-            position = self.position_manager.get_position(symbol, strategy_name)
-            if not position or position.status != 'OPEN':
+            self._close_claimed_position(position, symbol, strategy_name, exit_price, reason)
+        finally:
+            self.position_manager.release_exit(symbol, strategy_name)
+    
+    def _close_claimed_position(
+        self,
+        position,
+        symbol: str,
+        strategy_name: str,
+        exit_price: float,
+        reason: str
+    ):
+        """Body of _close_position_immediately (caller holds the position's exit claim)"""
+        try:
+            if position.status != 'OPEN':
                 return
             
             # Remove from monitoring
@@ -570,23 +809,14 @@ class TradingBot:
             
             # Apply slippage and spread to exit price
             volatility = 0.0  # Could get from current indicators
-            exit_action = 'SELL' if position.action == 'BUY' else 'BUY'
-            actual_exit_price = self.slippage_simulator.apply_slippage(
-                symbol, exit_price, exit_action, volatility
-            )
-            
-            # Apply spread
-            if position.action == 'BUY':  # Selling
-                actual_exit_price = self.spread_simulator.get_bid_price(actual_exit_price, symbol)
-            else:  # SELL position (buying to close)
-                actual_exit_price = self.spread_simulator.get_ask_price(actual_exit_price, symbol)
+            exit_action = self._opposite_action[position.action]
+            actual_exit_price = self._fill_price(symbol, exit_price, exit_action, volatility)
             
             # LIVE TRADING: Place actual SELL order on Binance (with round-robin if enabled)
             if not self.paper_trading:
                 # Get client (round-robin or direct)
                 client = self.api_rotator.get_client() if self.api_rotator else self.api_client
                 
-                exit_action = 'SELL' if position.action == 'BUY' else 'BUY'
                 order_type = 'Market' if self.exchange_name == 'bybit' else 'MARKET'
                 
                 order_result = client.place_order(
@@ -606,80 +836,87 @@ class TradingBot:
                     logger.info(f"[ORDER] Actual exit fill: ${filled_price:.2f} (estimated: ${actual_exit_price:.2f})")
                     actual_exit_price = filled_price
             
-            # Calculate profit with ALL costs
-            profit_data = self.profit_calculator.calculate_net_profit(
-                symbol=symbol,
-                entry_price=position.entry_price,
-                exit_price=actual_exit_price,
-                quantity=position.quantity,
-                action=position.action,
-                volatility=volatility
-            )
-            
-            # SAFE: Get all profit_data values with defaults
-            total_costs = profit_data.get('total_costs', 0.0)
-            net_profit = profit_data.get('net_profit', 0.0)
-            profit_pct = profit_data.get('profit_pct', 0.0)
-            entry_fee = profit_data.get('entry_fee', 0.0)
-            exit_fee = profit_data.get('exit_fee', 0.0)
-            entry_slippage = profit_data.get('entry_slippage', 0.0)
-            exit_slippage = profit_data.get('exit_slippage', 0.0)
-            spread_cost = profit_data.get('spread_cost', 0.0)
-            
-            # Close position (use actual exit price)
-            closed_position = self.position_manager.close_position(
-                symbol=symbol,
-                strategy=strategy_name,
-                exit_price=actual_exit_price,
-                exit_reason=reason,
-                fees=total_costs  # Include all costs
-            )
-            
-            if closed_position:
-                # Update position PnL with net profit (after all costs)
-                closed_position.pnl = net_profit
-                closed_position.pnl_pct = profit_pct
-                
-                # Update capital
-                self.current_capital += net_profit
-                self.risk_manager.record_trade(net_profit)
-                self.risk_manager.set_capital(self.initial_capital, self.current_capital)
+            with self.close_lock:  # Bookkeeping after the fill is serialised (exits may run concurrently)
+                # Calculate profit with ALL costs (entry side cached at open)
+                profit_data = self.profit_calculator.calculate_net_profit_incremental(
+                    symbol=symbol,
+                    entry_price=position.entry_price,
+                    exit_price=actual_exit_price,
+                    quantity=position.quantity,
+                    action=position.action,
+                    entry_costs=self._entry_costs(position, volatility),
+                    volatility=volatility
+                )
                 
-                # SAFETY: Record trade result for kill-switch
-                self.safety_manager.record_trade_result(net_profit)
+                # SAFE: Get all profit_data values with defaults
+                total_costs = profit_data.get('total_costs', 0.0)
+                net_profit = profit_data.get('net_profit', 0.0)
+                profit_pct = profit_data.get('profit_pct', 0.0)
+                entry_fee = profit_data.get('entry_fee', 0.0)
+                exit_fee = profit_data.get('exit_fee', 0.0)
+                entry_slippage = profit_data.get('entry_slippage', 0.0)
+                exit_slippage = profit_data.get('exit_slippage', 0.0)
+                spread_cost = profit_data.get('spread_cost', 0.0)
                 
-                logger.info(f"[PROFIT TAKEN] {symbol} - Net Profit: ${net_profit:.2f} ({profit_pct:.2f}%)")
-                logger.info(f"[COSTS] Entry: ${entry_fee:.2f}, Exit: ${exit_fee:.2f}, "
-                          f"Slippage: ${entry_slippage + exit_slippage:.2f}, "
-                          f"Spread: ${spread_cost:.2f}, Total: ${total_costs:.2f}")
+                # Close position (use actual exit price)
+                closed_position = self.position_manager.close_position(
+                    symbol=symbol,
+                    strategy=strategy_name,
+                    exit_price=actual_exit_price,
+                    exit_reason=reason,
+                    fees=total_costs  # Include all costs
+                )
                 
-                # Auto compounding
-                if net_profit > 0:
-                    compounded = self.compound_manager.add_profit(net_profit)
+                if closed_position:
+                    # The symbol may be re-entered on its next scan: decide on fresh data
+                    self.market_data.invalidate(symbol)
                     
-                    if compounded > 0:
-                        # Compounding triggered! Update capital
-                        with self.lock:
-                            old_capital = self.current_capital
-                            self.current_capital += compounded
-                            self.initial_capital = self.current_capital  # Update base
-                            
-                            # Update risk manager
-                            self.risk_manager.set_capital(self.initial_capital, self.current_capital)
-                        
-                        logger.info(f"[COMPOUND APPLIED] Capital increased: ${old_capital:.2f} → ${self.current_capital:.2f}")
-                        logger.info(f"[COMPOUND APPLIED] New trading capital: ${self.current_capital:.2f}")
+                    # Update position PnL with net profit (after all costs)
+                    closed_position.pnl = net_profit
+                    closed_position.pnl_pct = profit_pct
+                    
+                    # Update capital
+                    self.risk_manager.record_trade(net_profit)
+                    self._adjust_capital(net_profit)
+                    
+                    # SAFETY: Record trade result for kill-switch
+                    self.safety_manager.record_trade_result(net_profit)
+                    
+                    logger.info(f"[PROFIT TAKEN] {symbol} - Net Profit: ${net_profit:.2f} ({profit_pct:.2f}%)")
+                    logger.info(f"[COSTS] Entry: ${entry_fee:.2f}, Exit: ${exit_fee:.2f}, "
+                              f"Slippage: ${entry_slippage + exit_slippage:.2f}, "
+                              f"Spread: ${spread_cost:.2f}, Total: ${total_costs:.2f}")
+                    
+                    # Auto compounding
+                    if net_profit > 0:
+                        compounded = self.compound_manager.add_profit(net_profit)
                         
-                        # Save state
-                        self.state_manager.set('initial_capital', self.initial_capital)
-                        self.state_manager.set('current_capital', self.current_capital)
-                
-                # Save trade to CSV with complete profit data
-                self.trade_storage.save_trade(closed_position, profit_data)
-                
+                        if compounded > 0:
+                            # Compounding triggered! Update capital and base
+                            # (also updates the risk manager)
+                            initial_capital, current_capital = self._adjust_capital(compounded, rebase=True)
+                            
+                            logger.info(f"[COMPOUND APPLIED] Capital increased: ${current_capital - compounded:.2f} → ${current_capital:.2f}")
+                            logger.info(f"[COMPOUND APPLIED] New trading capital: ${current_capital:.2f}")
+                            
+                            # Save state
+                            self.state_manager.set('initial_capital', initial_capital)
+                            self.state_manager.set('current_capital', current_capital)
+                    
+                    # Save trade to CSV with complete profit data
+                    self.trade_storage.save_trade(closed_position, profit_data)
+                    
         except Exception as e:
             logger.error(f"[ERROR] Error closing position immediately: {e}", exc_info=True)
     
+    def _entry_costs(self, position, volatility: float = 0.0) -> Tuple[float, float, float]:
+        """Per-unit entry costs cached on the position (computed now if it predates the cache)"""
+        if position.entry_costs is None:
+            position.entry_costs = self.profit_calculator.entry_costs_per_unit(
+                position.symbol, position.entry_price, position.action, volatility
+            )
+        return position.entry_costs
+    
     def _partial_close_for_fees(
         self,
         symbol: str,
@@ -687,39 +924,47 @@ class TradingBot:
         exit_price: float
     ):
         """Partial close when fees are covered (Your Smart Idea!)"""
+        # Claimed like full closes, so a partial and a full exit never overlap
+        position = self.position_manager.claim_exit(symbol, strategy_name)
+        if not position:
+            return
         try:
-            # Get position
-            position = self.position_manager.get_position(symbol, strategy_name)
-            if not position or position.status != 'OPEN':
+            self._partial_close_claimed(position, symbol, strategy_name, exit_price)
+        finally:
+            self.position_manager.release_exit(symbol, strategy_name)
+    
+    def _partial_close_claimed(
+        self,
+        position,
+        symbol: str,
+        strategy_name: str,
+        exit_price: float
+    ):
+        """Body of _partial_close_for_fees (caller holds the position's exit claim)"""
+        try:
+            if position.status != 'OPEN':
                 return
             
-            # Get config
-            trading_config = self.config.get_trading_config()
-            partial_close_pct = trading_config.get('partial_close_pct', 50.0) / 100.0  # Convert to 0-1
+            partial_close_pct = self._partial_close_frac
             
             # Calculate how much to close (percentage of current quantity)
             close_quantity = position.quantity * partial_close_pct
             
             # Calculate fees for this partial close
             volatility = 0.0
-            exit_action = 'SELL' if position.action == 'BUY' else 'BUY'
+            exit_action = self._opposite_action[position.action]
             
             # Apply slippage and spread
-            actual_exit_price = self.slippage_simulator.apply_slippage(
-                symbol, exit_price, exit_action, volatility
-            )
-            if position.action == 'BUY':  # Selling
-                actual_exit_price = self.spread_simulator.get_bid_price(actual_exit_price, symbol)
-            else:  # SELL position (buying to close)
-                actual_exit_price = self.spread_simulator.get_ask_price(actual_exit_price, symbol)
+            actual_exit_price = self._fill_price(symbol, exit_price, exit_action, volatility)
             
-            # Calculate fees for partial close
-            partial_profit_data = self.profit_calculator.calculate_net_profit(
+            # Calculate fees for partial close (entry side cached at open)
+            partial_profit_data = self.profit_calculator.calculate_net_profit_incremental(
                 symbol=symbol,
                 entry_price=position.entry_price,
                 exit_price=actual_exit_price,
                 quantity=close_quantity,
                 action=position.action,
+                entry_costs=self._entry_costs(position, volatility),
                 volatility=volatility
             )
             
@@ -728,7 +973,6 @@ class TradingBot:
                 # Get client (round-robin or direct)
                 client = self.api_rotator.get_client() if self.api_rotator else self.api_client
                 
-                exit_action = 'SELL' if position.action == 'BUY' else 'BUY'
                 order_type = 'Market' if self.exchange_name == 'bybit' else 'MARKET'
                 
                 order_result = client.place_order(
@@ -748,80 +992,77 @@ class TradingBot:
                     logger.info(f"[ORDER] Actual partial fill: ${filled_price:.2f} (estimated: ${actual_exit_price:.2f})")
                     actual_exit_price = filled_price
             
-            # Partial close (update position tracking)
-            result = self.position_manager.partial_close_position(
-                symbol=symbol,
-                strategy=strategy_name,
-                close_quantity=close_quantity,
-                exit_price=actual_exit_price,  # Use actual API fill price if live trading
-                exit_reason='PARTIAL_FEES_PROFIT',
-                fees=partial_profit_data.get('total_costs', 0.0)
-            )
-            
-            if result:
-                # SAFE: Get all result values with defaults
-                partial_pnl = result.get('pnl', 0.0)
-                remaining_qty = result.get('remaining_quantity', 0.0)
-                is_full_close = result.get('is_full_close', False)
-                
-                # Update capital with partial profit
-                self.current_capital += partial_pnl
-                self.risk_manager.record_trade(partial_pnl)
-                self.risk_manager.set_capital(self.initial_capital, self.current_capital)
-                
-                logger.info(f"[PARTIAL CLOSE] {symbol} - Closed {close_quantity:.6f}, P&L: ${partial_pnl:.2f}, Remaining: {remaining_qty:.6f}")
+            with self.close_lock:  # Bookkeeping after the fill is serialised (exits may run concurrently)
+                # Partial close (update position tracking)
+                result = self.position_manager.partial_close_position(
+                    symbol=symbol,
+                    strategy=strategy_name,
+                    close_quantity=close_quantity,
+                    exit_price=actual_exit_price,  # Use actual API fill price if live trading
+                    exit_reason='PARTIAL_FEES_PROFIT',
+                    fees=partial_profit_data.get('total_costs', 0.0)
+                )
                 
-                # Update monitor with remaining quantity
-                if not is_full_close:
-                    # Re-add remaining position to monitor (with updated quantity)
-                    position = self.position_manager.get_position(symbol, strategy_name)
-                    if position:  # Still has remaining
-                        # Calculate percentages from stop/take profit
-                        if position.action == 'BUY':
-                            stop_loss_pct = ((position.entry_price - position.stop_loss) / position.entry_price) * 100.0
-                            take_profit_pct = ((position.take_profit - position.entry_price) / position.entry_price) * 100.0
-                        else:
-                            stop_loss_pct = ((position.stop_loss - position.entry_price) / position.entry_price) * 100.0
-                            take_profit_pct = ((position.entry_price - position.take_profit) / position.entry_price) * 100.0
-                        
-                        # Remove old monitor entry first
-                        self.price_monitor.remove_position(symbol, strategy_name)
-                        
-                        # Re-add to monitor (will update existing entry)
-                        partial_profit_enabled = trading_config.get('partial_profit_taking', True)
-                        self.price_monitor.add_position(
-                            symbol=symbol,
-                            strategy=strategy_name,
-                            entry_price=position.entry_price,  # Original entry price
-                            quantity=remaining_qty,  # Updated quantity
-                            target_profit_pct=take_profit_pct,
-                            stop_loss_pct=stop_loss_pct,
-                            action=position.action,
+                if result:
+                    # SAFE: Get all result values with defaults
+                    partial_pnl = result.get('pnl', 0.0)
+                    remaining_qty = result.get('remaining_quantity', 0.0)
+                    is_full_close = result.get('is_full_close', False)
+                    
+                    # Update capital with partial profit
+                    self.risk_manager.record_trade(partial_pnl)
+                    self._adjust_capital(partial_pnl)
+                    
+                    logger.info(f"[PARTIAL CLOSE] {symbol} - Closed {close_quantity:.6f}, P&L: ${partial_pnl:.2f}, Remaining: {remaining_qty:.6f}")
+                    
+                    # Update monitor with remaining quantity
+                    if not is_full_close:
+                        # Patch the monitored entry in place (re-add only if it is no longer monitored)
+                        position = self.position_manager.get_position(symbol, strategy_name)
+                        if position and not self.price_monitor.update_position(
+                            symbol, strategy_name,
+                            quantity=remaining_qty,
                             partial_profit_enabled=False  # Already did partial, wait for target or neutral
-                        )
-                        logger.info(f"[MONITOR] Updated monitor for remaining {remaining_qty:.6f} of {symbol}")
-                
-                # Auto compounding
-                if partial_pnl > 0:
-                    compounded = self.compound_manager.add_profit(partial_pnl)
-                    if compounded > 0:
-                        with self.lock:
-                            old_capital = self.current_capital
-                            self.current_capital += compounded
-                            self.initial_capital = self.current_capital
-                            self.risk_manager.set_capital(self.initial_capital, self.current_capital)
-                        logger.info(f"[COMPOUND] Capital: ${old_capital:.2f} → ${self.current_capital:.2f}")
-                
-                # Save partial close (will save to CSV when fully closed)
-                logger.info(f"[PARTIAL SAVED] {symbol} Partial close recorded: ${partial_pnl:.2f}")
-            else:
-                logger.warning(f"[WARN] Partial close failed for {symbol}")
-                
+                        ):
+                            self.price_monitor.add_position(
+                                symbol=symbol,
+                                strategy=strategy_name,
+                                entry_price=position.entry_price,  # Original entry price
+                                quantity=remaining_qty,  # Updated quantity
+                                target_profit_pct=position.take_profit_pct,
+                                stop_loss_pct=position.stop_loss_pct,
+                                action=position.action,
+                                partial_profit_enabled=False  # Already did partial, wait for target or neutral
+                            )
+                            logger.info(f"[MONITOR] Updated monitor for remaining {remaining_qty:.6f} of {symbol}")
+                    
+                    # Auto compounding
+                    if partial_pnl > 0:
+                        compounded = self.compound_manager.add_profit(partial_pnl)
+                        if compounded > 0:
+                            initial_capital, current_capital = self._adjust_capital(compounded, rebase=True)
+                            logger.info(f"[COMPOUND] Capital: ${current_capital - compounded:.2f} → ${current_capital:.2f}")
+                    
+                    # Save partial close (will save to CSV when fully closed)
+                    logger.info(f"[PARTIAL SAVED] {symbol} Partial close recorded: ${partial_pnl:.2f}")
+                else:
+                    logger.warning(f"[WARN] Partial close failed for {symbol}")
+                    
         except Exception as e:
             logger.error(f"[ERROR] Error partial closing for fees: {e}", exc_info=True)
     
-    def _check_position_exit(self, symbol: str, strategy_name: str, current_price: float):
-        """Check if a position should be closed (backup check in main cycle)"""
+    def _check_position_exit(
+        self,
+        symbol: str,
+        strategy_name: str,
+        current_price: float,
+        indicators: Optional[Dict[str, Any]] = None
+    ):
+        """
+        Check if a position should be closed (backup check in main cycle)
+        
+        indicators: the scan's indicators for this symbol (recalculated from klines if omitted)
+        """
         # Real-time monitor handles immediate exits
         # This is just a backup check + micro-scalp strategy exit logic
         try:
@@ -833,31 +1074,32 @@ class TradingBot:
             
             # Micro-scalp strategy: Use should_exit() method
             if strategy_name == 'micro_scalp' and hasattr(strategy, 'should_exit'):
-                # Get current indicators for exit checks
-                klines = self.market_data.get_klines(symbol)
-                if klines:
-                    closes, highs, lows, volumes, opens = klines
-                    indicators = IndicatorCalculator.calculate_all(closes, highs, lows, volumes, opens)
-                    if indicators:
-                        # Add spread (SAFE: check if indicators dict exists and is valid)
-                        try:
-                            spread_decimal = self.spread_simulator.get_spread(symbol)
-                            indicators['spread'] = spread_decimal * 100
-                        except Exception as e:
-                            logger.debug(f"[SKIP] Error getting spread for {symbol}: {e}")
-                            indicators['spread'] = 0.03  # Default 0.03% spread
-                        
-                        # Check exit conditions
-                        exit_result = strategy.should_exit(position, current_price, indicators, datetime.now())
-                        if exit_result and exit_result.get('should_exit'):
-                            reason = exit_result.get('reason', 'STRATEGY_EXIT')
-                            logger.info(f"[{strategy_name.upper()}] {symbol} exit signal: {reason}")
-                            self._close_position_immediately(symbol, strategy_name, current_price, reason=reason)
-                            return
+                # Get current indicators for exit checks (reuse the scan's, copied: spread is overridden)
+                if indicators is None:
+                    klines = self.market_data.get_klines(symbol)
+                    indicators = IndicatorCalculator.calculate_all(*klines) if klines else None
+                else:
+                    indicators = dict(indicators)
+                if indicators:
+                    # Add spread (SAFE: check if indicators dict exists and is valid)
+                    try:
+                        spread_decimal = self.spread_simulator.get_spread(symbol)
+                        indicators['spread'] = spread_decimal * 100
+                    except Exception as e:
+                        logger.debug(f"[SKIP] Error getting spread for {symbol}: {e}")
+                        indicators['spread'] = 0.03  # Default 0.03% spread
+                    
+                    # Check exit conditions
+                    exit_result = strategy.should_exit(position, current_price, indicators, datetime.now())
+                    if exit_result and exit_result.get('should_exit'):
+                        reason = exit_result.get('reason', 'STRATEGY_EXIT')
+                        logger.info(f"[{strategy_name.upper()}] {symbol} exit signal: {reason}")
+                        self._close_position_immediately(symbol, strategy_name, current_price, reason=reason)
+                        return
             
             # Default: Check time limit (real-time monitor doesn't check this)
-            hold_time = (datetime.now() - position.entry_time).total_seconds() / 60
-            if strategy and hold_time >= strategy.max_hold_time_minutes:
+            max_hold_sec = self._max_hold_sec.get(strategy_name)
+            if max_hold_sec is not None and time.monotonic() - position.entry_monotonic >= max_hold_sec:
                 logger.info(f"[TIME LIMIT] {symbol} ({strategy_name}) reached max hold time, closing...")
                 self._close_position_immediately(symbol, strategy_name, current_price, reason='TIME_LIMIT')
         except Exception as e:
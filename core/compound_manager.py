@@ -1,7 +1,8 @@
 """
 Auto compounding manager - automatic profit reinvestment
 """
-from datetime import datetime, date
+import time
+from datetime import datetime, date, timedelta
 from threading import Lock
 from typing import Dict, Any
 from utils.validators import validate_price
@@ -24,7 +25,12 @@ class CompoundManager:
         self.compound_count = 0
         self.total_compounded = 0.0
         
-        self.lock = Lock()
+        # Local date cached until the next local midnight (see _current_date)
+        self._today = date.today()
+        self._today_until = self._next_midnight(self._today)
+        
+        self.lock = Lock()  # Serialises writers; get_stats reads the published snapshot
+        self._publish_stats()
         
         logger.info(f"[COMPOUND] Auto compounding: {'ENABLED' if self.enabled else 'DISABLED'}")
         if self.enabled:
@@ -47,16 +53,35 @@ class CompoundManager:
         if not validate_price(profit_usd) or profit_usd <= 0:
             return 0.0
         
+        # Only the bookkeeping runs under the lock; logging happens after release
         with self.lock:
             self.accumulated_profits += profit_usd
             
             # Check if should compound
-            should_compound = self._should_compound()
-            
-            if should_compound:
-                return self._apply_compounding()
+            profit_to_compound = self._take_accumulated() if self._should_compound() else 0.0
+            self._publish_stats()
+            total_compounded, compound_count = self.total_compounded, self.compound_count
+        
+        if not profit_to_compound:
+            return 0.0
+        
+        logger.info(f"[COMPOUND] Compounding ${profit_to_compound:.2f} profits")
+        logger.info(f"[COMPOUND] Total compounded so far: ${total_compounded:.2f} (count: {compound_count})")
         
-        return 0.0
+        # Return profit amount (bot will add to capital)
+        return profit_to_compound
+    
+    @staticmethod
+    def _next_midnight(day: date) -> float:
+        """Epoch time of the local midnight after day"""
+        return datetime.combine(day + timedelta(days=1), datetime.min.time()).timestamp()
+    
+    def _current_date(self) -> date:
+        """Today's local date, recomputed only once the cached day has ended"""
+        if time.time() >= self._today_until:
+            self._today = date.today()
+            self._today_until = self._next_midnight(self._today)
+        return self._today
     
     def _should_compound(self) -> bool:
         """Check if compounding conditions are met"""
@@ -66,7 +91,7 @@ class CompoundManager:
                 return False
             
             # Check interval
-            today = date.today()
+            today = self._current_date()
             
             if self.interval == 'immediate':
                 # Compound immediately when threshold met
@@ -89,38 +114,37 @@ class CompoundManager:
             logger.error(f"[ERROR] Error checking compound conditions: {e}")
             return False
     
-    def _apply_compounding(self) -> float:
-        """Apply compounding to trading capital"""
-        try:
-            with self.lock:
-                profit_to_compound = self.accumulated_profits
-                
-                # Reset accumulated
-                self.accumulated_profits = 0.0
-                self.last_compound_date = date.today()
-                self.compound_count += 1
-                self.total_compounded += profit_to_compound
-            
-            logger.info(f"[COMPOUND] Compounding ${profit_to_compound:.2f} profits")
-            logger.info(f"[COMPOUND] Total compounded so far: ${self.total_compounded:.2f} (count: {self.compound_count})")
-            
-            # Return profit amount (bot will add to capital)
-            return profit_to_compound
-            
-        except Exception as e:
-            logger.error(f"[ERROR] Error applying compounding: {e}", exc_info=True)
-            return 0.0
+    def _take_accumulated(self) -> float:
+        """
+        Move accumulated profits to the compounded total (call with self.lock held)
+        
+        Returns:
+            The amount compounded
+        """
+        profit_to_compound = self.accumulated_profits
+        
+        # Reset accumulated
+        self.accumulated_profits = 0.0
+        self.last_compound_date = self._current_date()
+        self.compound_count += 1
+        self.total_compounded += profit_to_compound
+        return profit_to_compound
+    
+    def _publish_stats(self):
+        """Publish the counters as one immutable tuple (call after every update, with self.lock held)"""
+        self._stats_snapshot = (
+            self.accumulated_profits, self.compound_count, self.total_compounded, self.last_compound_date
+        )
     
     def get_stats(self) -> Dict[str, Any]:
-        """Get compounding statistics"""
-        with self.lock:
-            return {
-                'enabled': self.enabled,
-                'threshold': self.threshold_usd,
-                'interval': self.interval,
-                'accumulated_profits': self.accumulated_profits,
-                'compound_count': self.compound_count,
-                'total_compounded': self.total_compounded,
-                'last_compound_date': self.last_compound_date.isoformat()
-            }
-
+        """Get compounding statistics (lock-free: reads the last published snapshot)"""
+        accumulated_profits, compound_count, total_compounded, last_compound_date = self._stats_snapshot
+        return {
+            'enabled': self.enabled,
+            'threshold': self.threshold_usd,
+            'interval': self.interval,
+            'accumulated_profits': accumulated_profits,
+            'compound_count': compound_count,
+            'total_compounded': total_compounded,
+            'last_compound_date': last_compound_date.isoformat()
+        }
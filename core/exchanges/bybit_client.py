@@ -2,25 +2,62 @@
 Bybit API client with retry and error handling
 Lower fees: 0.055% maker, 0.075% taker (vs Binance 0.1%)
 """
+import re
 import time
 import hmac
 import hashlib
 import requests
+import numpy as np
 from urllib.parse import urlencode
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+from core.api_client import create_session
 from utils.errors import APIError
 from utils.validators import validate_price
 from utils.logger import setup_logger
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = setup_logger("bybit_client")
 
+# Bybit interval mapping (5m = "5", 1h = "60", etc.)
+BYBIT_INTERVALS = {
+    "1m": "1", "3m": "3", "5m": "5", "15m": "15",
+    "30m": "30", "1h": "60", "2h": "120", "4h": "240",
+    "6h": "360", "12h": "720", "1d": "D", "1w": "W"
+}
+
+
+# Unit letters dropped from intervals missing from BYBIT_INTERVALS ('10m' -> '10')
+_STRIP_UNITS = str.maketrans('', '', 'mh')
+
+# Characters urlencode never escapes (a value made only of these is sent as is)
+_URL_SAFE = re.compile(r'[A-Za-z0-9_.~-]*')
+
+
+def to_bybit_interval(interval: str) -> str:
+    """Binance-style interval ('5m') to Bybit's ('5')"""
+    # Fallback only on a miss (a .get default would build it on every call)
+    return BYBIT_INTERVALS.get(interval) or interval.translate(_STRIP_UNITS)
+
 
 class BybitClient:
     """Bybit API client with retry and error handling"""
     
-    def __init__(self, api_key: str, secret_key: str, testnet: bool = True, max_retries: int = 3):
+    def __init__(
+        self,
+        api_key: str,
+        secret_key: str,
+        testnet: bool = True,
+        max_retries: int = 3,
+        session: Optional[requests.Session] = None
+    ):
         self.api_key = api_key
         self.secret_key = secret_key
+        # Keyed HMAC, copied per signature (key setup/padding done once)
+        self._hmac_template = hmac.new(secret_key.encode('utf-8'), digestmod=hashlib.sha256)
         self.testnet = testnet
         self.max_retries = max_retries
         
@@ -30,23 +67,37 @@ class BybitClient:
         else:
             self.base_url = "https://api.bybit.com"
         
+        # Keep-alive HTTP session (pooled TLS connections instead of a new handshake per call).
+        # _make_request does its own retries, so the adapter doesn't retry (max_retries=1)
+        self.session = session if session is not None else create_session(max_retries=1)
+        
         # Symbol info cache
         self.symbol_info_cache: Dict[str, Dict] = {}
         
         logger.info(f"[OK] Bybit API Client initialized (testnet={testnet})")
     
+    def close(self):
+        """Close pooled HTTP connections"""
+        self.session.close()
+    
     def _create_signature(self, params: Dict[str, Any]) -> str:
         """Create HMAC SHA256 signature for Bybit"""
         try:
-            # Bybit signature format: sort params and create signature
+            # Bybit signature format: sort params and create signature.
+            # Signed values are ids, numbers and enums that urlencode leaves unchanged,
+            # so join them directly; anything needing escaping falls back to urlencode
             sorted_params = sorted(params.items())
-            query_string = urlencode(sorted_params)
-            signature = hmac.new(
-                self.secret_key.encode('utf-8'),
-                query_string.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest()
-            return signature
+            parts = []
+            for key, value in sorted_params:
+                value = str(value)
+                if not _URL_SAFE.fullmatch(value):
+                    parts = None
+                    break
+                parts.append(f"{key}={value}")
+            query_string = '&'.join(parts) if parts is not None else urlencode(sorted_params)
+            mac = self._hmac_template.copy()
+            mac.update(query_string.encode('utf-8'))
+            return mac.hexdigest()
         except Exception as e:
             raise APIError(f"Failed to create signature: {e}") from e
     
@@ -80,11 +131,11 @@ class BybitClient:
                 
                 # Make request
                 if method.upper() == 'GET':
-                    response = requests.get(url, params=params, headers=headers, timeout=timeout)
+                    response = self.session.get(url, params=params, headers=headers, timeout=timeout)
                 elif method.upper() == 'POST':
-                    response = requests.post(url, json=params, headers=headers, timeout=timeout)
+                    response = self.session.post(url, json=params, headers=headers, timeout=timeout)
                 elif method.upper() == 'DELETE':
-                    response = requests.delete(url, params=params, headers=headers, timeout=timeout)
+                    response = self.session.delete(url, params=params, headers=headers, timeout=timeout)
                 else:
                     raise ValueError(f"Unsupported HTTP method: {method}")
                 
@@ -106,7 +157,7 @@ class BybitClient:
                 else:
                     error_msg = f"HTTP {e.response.status_code}"
                     try:
-                        error_data = e.response.json()
+                        error_data = self._decode(e.response)
                         error_msg = error_data.get('ret_msg', error_msg)
                     except:
                         pass
@@ -127,56 +178,95 @@ class BybitClient:
             response = self._make_request(
                 method='GET',
                 endpoint='/v5/market/tickers',
-                params={'category': 'spot', 'symbol': symbol.replace('USDT', 'USDT')}
+                params={'category': 'spot', 'symbol': symbol}
             )
             
-            data = response.json()
-            if data.get('retCode') == 0:
-                result = data.get('result', {})
-                list_data = result.get('list', [])
-                if list_data:
-                    last_price = list_data[0].get('lastPrice')
-                    if last_price:
-                        return float(last_price)
-            
-            logger.warning(f"[WARN] Could not get price for {symbol}")
-            return None
+            price = self._parse_ticker_price(self._decode(response))
+            if price is None:
+                logger.warning(f"[WARN] Could not get price for {symbol}")
+            return price
             
         except Exception as e:
             logger.error(f"[ERROR] Error getting price for {symbol}: {e}")
             return None
     
+    def get_prices_batch(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        """
+        Prices for several symbols from one /v5/market/tickers request
+        
+        /v5/market/tickers filters by one symbol at most, so this asks for
+        every spot ticker and keeps only the requested ones: a whole scan cycle
+        costs one round-trip (a larger body, but no per-symbol request overhead).
+        Symbols missing from the response map to None.
+        """
+        if not symbols:
+            return {}
+        try:
+            response = self._make_request(
+                method='GET',
+                endpoint='/v5/market/tickers',
+                params={'category': 'spot'}
+            )
+            data = self._decode(response)
+            if data.get('retCode') != 0:
+                return {}
+            
+            prices: Dict[str, Optional[float]] = dict.fromkeys(symbols)
+            for ticker in data.get('result', {}).get('list', []):
+                symbol = ticker.get('symbol')
+                if symbol in prices and ticker.get('lastPrice'):
+                    price = float(ticker['lastPrice'])
+                    prices[symbol] = price if validate_price(price) else None
+            return prices
+        except Exception as e:
+            logger.debug(f"[SKIP] Batch price request failed ({e}), falling back to per-symbol requests")
+            return {}
+    
+    @staticmethod
+    def _decode(response) -> Any:
+        """Response body as JSON (orjson parses the raw bytes directly when installed)"""
+        if orjson is not None:
+            return orjson.loads(response.content)
+        return response.json()
+    
+    @staticmethod
+    def _parse_ticker_price(data: Dict[str, Any]) -> Optional[float]:
+        """lastPrice from a /v5/market/tickers response, None if missing"""
+        if data.get('retCode') == 0:
+            list_data = data.get('result', {}).get('list', [])
+            if list_data:
+                last_price = list_data[0].get('lastPrice')
+                if last_price:
+                    return float(last_price)
+        return None
+    
     def get_klines(
         self,
         symbol: str,
         interval: str = "5",
-        limit: int = 200
+        limit: int = 200,
+        with_open_time: bool = False
     ) -> Optional[tuple]:
         """
         Get klines (candlestick data)
-        Returns: (closes, highs, lows, volumes, opens) or None
+        Returns: (closes, highs, lows, volumes, opens) float64 arrays or None
+        (plus open_times in ms as a sixth array when with_open_time is True)
         """
         try:
-            # Bybit interval mapping (5m = "5", 1h = "60", etc.)
-            interval_map = {
-                "1m": "1", "3m": "3", "5m": "5", "15m": "15",
-                "30m": "30", "1h": "60", "2h": "120", "4h": "240",
-                "6h": "360", "12h": "720", "1d": "D", "1w": "W"
-            }
-            bybit_interval = interval_map.get(interval, interval.replace('m', '').replace('h', ''))
+            bybit_interval = to_bybit_interval(interval)
             
             response = self._make_request(
                 method='GET',
                 endpoint='/v5/market/kline',
                 params={
                     'category': 'spot',
-                    'symbol': symbol.replace('USDT', 'USDT'),
+                    'symbol': symbol,
                     'interval': bybit_interval,
                     'limit': limit
                 }
             )
             
-            data = response.json()
+            data = self._decode(response)
             if data.get('retCode') == 0:
                 result = data.get('result', {})
                 klines = result.get('list', [])
@@ -185,22 +275,12 @@ class BybitClient:
                     return None
                 
                 # Bybit format: [startTime, open, high, low, close, volume, turnover]
-                # Reverse to get chronological order (oldest first)
-                klines.reverse()
-                
-                closes = []
-                highs = []
-                lows = []
-                volumes = []
-                opens = []
-                
-                for kline in klines:
-                    opens.append(float(kline[1]))   # open
-                    highs.append(float(kline[2]))  # high
-                    lows.append(float(kline[3]))   # low
-                    closes.append(float(kline[4])) # close
-                    volumes.append(float(kline[5])) # volume
+                # Reverse to get chronological order (oldest first), one contiguous row per field
+                ohlcv = np.array([k[0:6] for k in reversed(klines)], dtype=object).astype(np.float64)
+                open_times, opens, highs, lows, closes, volumes = np.ascontiguousarray(ohlcv.T)
                 
+                if with_open_time:
+                    return (closes, highs, lows, volumes, opens, open_times)
                 return (closes, highs, lows, volumes, opens)
             
             return None
@@ -245,7 +325,7 @@ class BybitClient:
             # Prepare parameters
             params = {
                 'category': 'spot',
-                'symbol': symbol.replace('USDT', 'USDT').upper(),
+                'symbol': symbol.upper(),
                 'side': 'Buy' if side.upper() == 'BUY' else 'Sell',
                 'orderType': order_type,
                 'qty': str(quantity),  # Bybit requires string
@@ -264,7 +344,7 @@ class BybitClient:
                 signed=True
             )
             
-            order_data = response.json()
+            order_data = self._decode(response)
             
             # Check response
             if order_data.get('retCode') != 0:
@@ -308,7 +388,7 @@ class BybitClient:
                 signed=True
             )
             
-            data = response.json()
+            data = self._decode(response)
             if data.get('retCode') == 0:
                 return data.get('result', {})
             
@@ -0,0 +1,91 @@
+"""
+Bybit WebSocket market streams (push-based prices and rolling klines)
+"""
+import json
+import time
+from typing import Dict, Optional
+import numpy as np
+from core.binance_ws import BinanceMarketStream
+from core.exchanges.bybit_client import to_bybit_interval
+from utils.logger import setup_logger
+
+logger = setup_logger("bybit_ws")
+
+
+class BybitMarketStream(BinanceMarketStream):
+    """
+    Bybit v5 public spot stream: tickers.<symbol> and kline.<interval>.<symbol>
+
+    Same buffers, staleness rules and reconnect loop as BinanceMarketStream;
+    topics are subscribed after connecting, and Bybit expects an
+    application-level ping every 20 seconds.
+    """
+
+    NAME = "Bybit"
+    ARGS_PER_SUBSCRIBE = 10  # Bybit spot limit per subscribe request
+    PING_INTERVAL = 20.0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._bybit_interval = to_bybit_interval(self.interval)
+        self._last_ping = 0.0
+
+    @property
+    def url(self) -> str:
+        """Public spot stream URL"""
+        if self.testnet:
+            return "wss://stream-testnet.bybit.com/v5/public/spot"
+        return "wss://stream.bybit.com/v5/public/spot"
+
+    def _fetch_candles(self, symbol: str) -> Optional[np.ndarray]:
+        """REST kline history as an (n, 6) array of open_time, o, h, l, c, v (oldest first)"""
+        klines = self.api_client.get_klines(symbol, self.interval, self.limit, with_open_time=True)
+        if not klines:
+            return None
+        closes, highs, lows, volumes, opens, open_times = klines
+        return np.column_stack((open_times, opens, highs, lows, closes, volumes))
+
+    async def _subscribe(self, ws):
+        """Subscribe to ticker and kline topics for every symbol"""
+        topics = []
+        for symbol in self.symbols:
+            topics.append(f"tickers.{symbol}")
+            topics.append(f"kline.{self._bybit_interval}.{symbol}")
+        for i in range(0, len(topics), self.ARGS_PER_SUBSCRIBE):
+            await ws.send(json.dumps({'op': 'subscribe', 'args': topics[i:i + self.ARGS_PER_SUBSCRIBE]}))
+        self._last_ping = time.monotonic()
+
+    async def _keepalive(self, ws):
+        """Send Bybit's heartbeat when due"""
+        now = time.monotonic()
+        if now - self._last_ping >= self.PING_INTERVAL:
+            self._last_ping = now
+            await ws.send('{"op":"ping"}')
+
+    def _handle_message(self, message: Dict):
+        """Apply one topic message (pongs and subscribe acks are ignored)"""
+        topic = message.get('topic')
+        if not topic:
+            if message.get('op') == 'subscribe' and not message.get('success', True):
+                logger.warning(f"[WARN] Bybit subscribe failed: {message.get('ret_msg')}")
+            return
+        now = time.monotonic()
+
+        if topic.startswith('tickers.'):
+            data = message.get('data', {})
+            symbol = data.get('symbol')
+            if symbol and data.get('lastPrice'):
+                self._prices[symbol] = (float(data['lastPrice']), now)
+
+        elif topic.startswith('kline.'):
+            symbol = topic.rsplit('.', 1)[-1]
+            for k in message.get('data', []):
+                candle = (float(k['start']), float(k['open']), float(k['high']),
+                          float(k['low']), float(k['close']), float(k['volume']))
+                with self.lock:
+                    buffer = self._klines.get(symbol)
+                    if buffer is None:
+                        return  # Not seeded yet
+                    buffer.apply(candle)  # Update current candle or append a new one
+                    self._klines_updated[symbol] = now
+                self._prices[symbol] = (candle[4], now)
@@ -77,6 +77,11 @@ class FeeCalculator:
             logger.error(f"[ERROR] Error calculating round trip fee: {e}")
             return 0.0
     
+    def get_round_trip_fee_pct(self) -> float:
+        """Round-trip (entry + exit) fee as a percentage of order value (fees are a fixed rate)"""
+        fee_rate = self.maker_fee if self.use_maker else self.taker_fee
+        return fee_rate * 2 * 100.0
+    
     def get_minimum_take_profit_pct(self) -> float:
         """
         Calculate minimum take-profit % to cover fees + profit
@@ -84,8 +89,8 @@ class FeeCalculator:
         Returns: Minimum take-profit percentage
         """
         try:
-            # Round trip fee on $100
-            round_trip_fee_pct = self.calculate_round_trip_fee(100.0) / 100.0
+            # Round trip fee (as a fraction)
+            round_trip_fee_pct = self.get_round_trip_fee_pct() / 100.0
             
             # Additional costs
             slippage_pct = 0.0003  # 0.03% average (Bybit has slightly better liquidity = similar slippage)
@@ -1,9 +1,10 @@
 """
 Thread-safe position manager
 """
+import time
 from threading import Lock
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from utils.validators import validate_price, validate_quantity, validate_stop_loss_take_profit
 from utils.logger import setup_logger
 
@@ -13,6 +14,17 @@ logger = setup_logger("position_manager")
 class Position:
     """Represents a trading position"""
     
+    # Fixed attribute set: smaller instances and faster attribute access in
+    # the scan/monitor paths. Add new per-position fields here.
+    __slots__ = (
+        'symbol', 'strategy', 'action', 'entry_price', 'original_quantity', 'quantity',
+        'stop_loss', 'take_profit', 'stop_loss_pct', 'take_profit_pct',
+        'entry_time', 'entry_monotonic', 'entry_costs',
+        'exit_price', 'exit_time', 'pnl', 'pnl_pct', 'status', 'exit_reason',
+        'partial_closes', 'total_partial_pnl',
+        'entry_volume_ratio', 'peak_profit_pct', 'highest_profit_pct'
+    )
+    
     def __init__(self, symbol: str, strategy: str, action: str, entry_price: float, 
                  quantity: float, stop_loss: float, take_profit: float):
         # Validate all inputs
@@ -29,7 +41,16 @@ class Position:
         self.quantity = quantity  # Current remaining quantity (for partial closes)
         self.stop_loss = stop_loss
         self.take_profit = take_profit
+        # SL/TP distances from entry in percent (used when re-adding to the price monitor)
+        if self.action == 'BUY':
+            self.stop_loss_pct = ((entry_price - stop_loss) / entry_price) * 100.0
+            self.take_profit_pct = ((take_profit - entry_price) / entry_price) * 100.0
+        else:  # SELL (short)
+            self.stop_loss_pct = ((stop_loss - entry_price) / entry_price) * 100.0
+            self.take_profit_pct = ((entry_price - take_profit) / entry_price) * 100.0
         self.entry_time = datetime.now()
+        self.entry_monotonic = time.monotonic()  # For hold-time checks (immune to wall-clock jumps)
+        self.entry_costs = None  # Per-unit (fee, slippage, spread) set by the bot at open, reused on close
         self.exit_price = None
         self.exit_time = None
         self.pnl = 0.0
@@ -173,19 +194,30 @@ class PositionManager:
     """Thread-safe position manager"""
     
     def __init__(self):
-        self.positions: Dict[str, Position] = {}  # symbol+strategy as key
+        self.positions: Dict[Tuple[str, str], Position] = {}  # (symbol, strategy) -> open position
+        self._symbol_counts: Dict[str, int] = {}  # symbol -> open positions across strategies
+        self._exiting: Set[Tuple[str, str]] = set()  # Positions with an exit (order) in progress
         self.lock = Lock()
     
+    def _remove(self, key: Tuple[str, str], symbol: str):
+        """Drop an open position and its symbol index entry (call with lock held)"""
+        del self.positions[key]
+        remaining = self._symbol_counts.get(symbol, 1) - 1
+        if remaining > 0:
+            self._symbol_counts[symbol] = remaining
+        else:
+            self._symbol_counts.pop(symbol, None)
+    
     def open_position(self, symbol: str, strategy: str, action: str, entry_price: float, 
                      quantity: float, stop_loss: float, take_profit: float) -> bool:
         """Open a new position (thread-safe)"""
         try:
-            key = f"{symbol}_{strategy}"
+            key = (symbol, strategy)
             
             with self.lock:
                 # Check if already exists
                 if key in self.positions:
-                    logger.warning(f"[WARN] Position already exists: {key}")
+                    logger.warning(f"[WARN] Position already exists: {symbol}_{strategy}")
                     return False
                 
                 # Validate stop loss/take profit
@@ -206,6 +238,7 @@ class PositionManager:
                 )
                 
                 self.positions[key] = position
+                self._symbol_counts[symbol] = self._symbol_counts.get(symbol, 0) + 1
                 logger.info(f"[OK] Opened {action} position: {symbol} @ ${entry_price:.2f} qty={quantity:.6f}")
                 return True
                 
@@ -217,11 +250,11 @@ class PositionManager:
                                exit_price: float, exit_reason: str, fees: float = 0.0) -> Optional[Dict]:
         """Close partial quantity of position (thread-safe)"""
         try:
-            key = f"{symbol}_{strategy}"
+            key = (symbol, strategy)
             
             with self.lock:
                 if key not in self.positions:
-                    logger.warning(f"[WARN] Position not found: {key}")
+                    logger.warning(f"[WARN] Position not found: {symbol}_{strategy}")
                     return None
                 
                 position = self.positions[key]
@@ -229,7 +262,7 @@ class PositionManager:
                 
                 # If fully closed, remove from open positions
                 if result['is_full_close']:
-                    del self.positions[key]
+                    self._remove(key, symbol)
                     logger.info(f"[OK] Fully closed position: {symbol} Total P&L=${position.pnl:.2f} ({position.pnl_pct:.2f}%)")
                     return {'position': position, **result}
                 else:
@@ -244,18 +277,18 @@ class PositionManager:
                       exit_reason: str, fees: float = 0.0) -> Optional[Position]:
         """Close FULL remaining position (thread-safe)"""
         try:
-            key = f"{symbol}_{strategy}"
+            key = (symbol, strategy)
             
             with self.lock:
                 if key not in self.positions:
-                    logger.warning(f"[WARN] Position not found: {key}")
+                    logger.warning(f"[WARN] Position not found: {symbol}_{strategy}")
                     return None
                 
                 position = self.positions[key]
                 position.close(exit_price, exit_reason, fees)
                 
                 # Remove from open positions
-                del self.positions[key]
+                self._remove(key, symbol)
                 
                 logger.info(f"[OK] Closed position: {symbol} Total P&L=${position.pnl:.2f} ({position.pnl_pct:.2f}%)")
                 return position
@@ -264,26 +297,49 @@ class PositionManager:
             logger.error(f"[ERROR] Error closing position: {e}", exc_info=True)
             return None
     
+    def claim_exit(self, symbol: str, strategy: str) -> Optional[Position]:
+        """
+        Reserve an open position for one exit (full or partial close)
+        
+        Returns the position, or None if it is missing or another thread is
+        already exiting it, so concurrent signals never send two exit orders.
+        Pair every successful claim with release_exit.
+        """
+        key = (symbol, strategy)
+        with self.lock:
+            position = self.positions.get(key)
+            if position is None or key in self._exiting:
+                return None
+            self._exiting.add(key)
+            return position
+    
+    def release_exit(self, symbol: str, strategy: str):
+        """End an exit started with claim_exit"""
+        with self.lock:
+            self._exiting.discard((symbol, strategy))
+    
     def get_position(self, symbol: str, strategy: str) -> Optional[Position]:
         """Get position by symbol and strategy"""
-        key = f"{symbol}_{strategy}"
-        with self.lock:
-            return self.positions.get(key)
+        # Single dict lookups are atomic under the GIL; writers hold self.lock
+        return self.positions.get((symbol, strategy))
     
     def has_position(self, symbol: str, strategy: Optional[str] = None) -> bool:
-        """Check if position exists"""
-        with self.lock:
-            if strategy:
-                key = f"{symbol}_{strategy}"
-                return key in self.positions
-            else:
-                return any(pos.symbol == symbol for pos in self.positions.values())
+        """Check if position exists (lock-free, see get_position)"""
+        if strategy:
+            return (symbol, strategy) in self.positions
+        return symbol in self._symbol_counts
     
     def get_all_positions(self) -> List[Position]:
         """Get all open positions"""
         with self.lock:
             return list(self.positions.values())
     
+    def iter_open_positions(self) -> Iterator[Position]:
+        """Iterate open positions (over a snapshot, so callers may open/close meanwhile)"""
+        with self.lock:
+            snapshot = list(self.positions.values())
+        return iter(snapshot)
+    
     def get_open_positions_count(self) -> int:
         """Get count of open positions"""
         with self.lock:
@@ -2,19 +2,93 @@
 Real-time price monitoring for immediate profit taking
 """
 import time
+import logging
+from collections import deque
 from threading import Thread, Event, Lock
-from queue import Queue
-from typing import Dict, Optional
+from queue import Empty
+from typing import Any, Dict, List, NamedTuple, Optional
 from datetime import datetime
 from utils.logger import setup_logger
 
 logger = setup_logger("real_time_monitor")
 
+_TIMED_OUT = object()  # SignalQueue.get's poll() default (None is a valid signal: the stop sentinel)
+
+
+class PriceUpdate(NamedTuple):
+    """Exit signal from the monitor thread to the bot's handler (immutable, no per-instance dict)"""
+    symbol: str
+    strategy: str
+    signal: str  # TAKE_PROFIT, PARTIAL_FEES_PROFIT, BREAKEVEN_PROFIT or STOP_LOSS
+    current_price: float
+
+
+class SignalQueue:
+    """
+    Bounded signal channel from the monitor thread to the bot's handler
+    
+    deque append/popleft are atomic under the GIL, so no lock is taken; an
+    Event wakes the consumer. When full, the oldest signal is dropped (the
+    monitor re-emits signals every check while the condition holds).
+    Mirrors the Queue.put/get(timeout) interface; the handler uses poll().
+    """
+    
+    def __init__(self, maxlen: int = 1024):
+        self._items = deque(maxlen=maxlen)
+        self._ready = Event()
+    
+    def put(self, item: Any):
+        self._items.append(item)
+        self._ready.set()
+    
+    def get(self, timeout: Optional[float] = None) -> Any:
+        """Pop the oldest signal, waiting up to timeout seconds (raises queue.Empty)"""
+        item = self.poll(timeout, _TIMED_OUT)
+        if item is _TIMED_OUT:
+            raise Empty
+        return item
+    
+    def poll(self, timeout: Optional[float] = None, default: Any = None) -> Any:
+        """
+        Like get(), but returns default on timeout instead of raising
+        
+        The handler waits in a loop, so an idle system would otherwise raise
+        and catch an exception every timeout. Single consumer: once the deque
+        is seen non-empty, popleft() cannot fail.
+        """
+        items = self._items
+        if items:
+            return items.popleft()
+        
+        # Clear, then re-check, so a put between the two can't be missed
+        self._ready.clear()
+        if items:
+            return items.popleft()
+        
+        if self._ready.wait(timeout) and items:
+            return items.popleft()
+        return default
+    
+    def drain(self, max_items: int) -> List[Any]:
+        """Pop up to max_items queued signals without waiting"""
+        items = []
+        popleft = self._items.popleft
+        while len(items) < max_items:
+            try:
+                items.append(popleft())
+            except IndexError:
+                break
+        return items
+    
+    def qsize(self) -> int:
+        return len(self._items)
+
 
 class RealTimePriceMonitor:
     """Monitor prices in real-time for immediate profit taking"""
     
-    def __init__(self, api_client, fee_calculator=None, slippage_simulator=None, spread_simulator=None, check_interval: float = 1.0):
+    def __init__(self, api_client, fee_calculator=None, slippage_simulator=None, spread_simulator=None,
+                 check_interval: float = 1.0, market_stream=None):
         """
         Args:
             api_client: Binance API client
@@ -22,8 +96,10 @@ class RealTimePriceMonitor:
             slippage_simulator: Slippage simulator
             spread_simulator: Spread simulator
             check_interval: How often to check (seconds) - 1.0 = every second
+            market_stream: Optional market stream; fresh streamed prices skip the REST call
         """
         self.api_client = api_client
+        self.market_stream = market_stream
         self.fee_calculator = fee_calculator
         self.slippage_simulator = slippage_simulator
         self.spread_simulator = spread_simulator
@@ -31,7 +107,7 @@ class RealTimePriceMonitor:
         self.running = False
         self.monitored_positions: Dict[str, Dict] = {}  # {symbol+strategy: {entry_price, target_price, quantity, ...}}
         self.positions_lock = Lock()  # Thread safety for monitored_positions
-        self.price_updates = Queue()
+        self.price_updates = SignalQueue()
         self.stop_event = Event()
         self.monitor_thread = None
     
@@ -146,6 +222,41 @@ class RealTimePriceMonitor:
             else:
                 return entry_price * 0.997  # 0.3% below entry
     
+    def update_position(
+        self,
+        symbol: str,
+        strategy: str,
+        quantity: Optional[float] = None,
+        partial_profit_enabled: Optional[bool] = None
+    ) -> bool:
+        """
+        Patch a monitored position in place (thread-safe, single lock hold)
+        Returns False if the position is not being monitored.
+        """
+        try:
+            key = f"{symbol}_{strategy}"
+            with self.positions_lock:
+                position_info = self.monitored_positions.get(key)
+                if position_info is None:
+                    return False
+                
+                # Copy-on-write: the monitor loop may be reading the old dict from its snapshot
+                updated = dict(position_info)
+                if quantity is not None:
+                    updated['quantity'] = quantity
+                    updated['breakeven_profit_price'] = self._calculate_breakeven_plus_profit(
+                        symbol, updated['entry_price'], quantity, updated['action'], min_profit_pct=0.50
+                    )
+                if partial_profit_enabled is not None:
+                    updated['partial_profit_enabled'] = partial_profit_enabled
+                self.monitored_positions[key] = updated
+            
+            logger.debug(f"[MONITOR] Updated {key}")
+            return True
+        except Exception as e:
+            logger.error(f"[ERROR] Error updating position: {e}")
+            return False
+    
     def remove_position(self, symbol: str, strategy: str):
         """Remove position from monitoring (thread-safe)"""
         try:
@@ -189,6 +300,7 @@ class RealTimePriceMonitor:
                     continue
                 
                 # Check all monitored positions (using snapshot to avoid lock during price checks)
+                prices: Dict[str, Optional[float]] = {}  # One price per symbol per pass
                 for key, position_info in positions_snapshot:
                     try:
                         # SAFE: Get all required values with defaults
@@ -198,21 +310,10 @@ class RealTimePriceMonitor:
                         
                         strategy = position_info.get('strategy', 'unknown')
                         
-                        # Safe strategy string for f-string (handle any edge cases)
-                        try:
-                            strategy_str = str(strategy) if strategy else 'unknown'
-                            strategy_safe = strategy_str.replace('{', '{{').replace('}', '}}')
-                        except Exception:
-                            strategy_safe = 'unknown'  # Fallback if any error
-                        
-                        # Get price (round-robin if available, otherwise direct)
-                        if hasattr(self.api_client, 'get_client'):
-                            # API rotator
-                            client = self.api_client.get_client()
-                            current_price = client.get_current_price(symbol)
+                        if symbol in prices:
+                            current_price = prices[symbol]
                         else:
-                            # Direct client
-                            current_price = self.api_client.get_current_price(symbol)
+                            current_price = prices[symbol] = self._fetch_price(symbol)
                         
                         if not current_price:
                             if check_count % 60 == 0:  # Log occasionally to avoid spam
@@ -250,35 +351,26 @@ class RealTimePriceMonitor:
                             elif current_price >= stop_price:
                                 stop_hit = True
                         
-                        # Log detailed status every 60 checks for debugging
-                        if check_count % 60 == 0:
+                        # Log detailed status every 60 checks for debugging (only built when DEBUG is on)
+                        if check_count % 60 == 0 and logger.isEnabledFor(logging.DEBUG):
                             pct_change = ((current_price - entry_price) / entry_price * 100.0) if entry_price > 0 else 0.0
+                            breakeven_str = f"${breakeven_price:.2f}" if breakeven_price else 'N/A'
                             logger.debug(
-                                f"[MONITOR] {symbol} ({strategy_safe}): "
+                                f"[MONITOR] {symbol} ({strategy}): "
                                 f"Price=${current_price:.2f} (Entry=${entry_price:.2f}, {pct_change:+.2f}%), "
                                 f"Target=${target_price:.2f}, "
-                                f"Breakeven+Profit=${breakeven_price:.2f if breakeven_price else 'N/A'}, "
+                                f"Breakeven+Profit={breakeven_str}, "
                                 f"Stop=${stop_price:.2f}"
                             )
                         
                         # Priority: Target > Breakeven+Profit (Partial) > Stop Loss
                         # Send signal if any condition reached (check every iteration, not just every 60)
                         if target_reached:
-                            logger.info(f"[MONITOR] {symbol} ({strategy_safe}) TARGET REACHED! Price: ${current_price:.2f}")
-                            self.price_updates.put({
-                                'key': key,
-                                'symbol': symbol,
-                                'strategy': position_info.get('strategy', 'unknown'),
-                                'signal': 'TAKE_PROFIT',
-                                'current_price': current_price,
-                                'position_info': position_info
-                            })
+                            logger.info(f"[MONITOR] {symbol} ({strategy}) TARGET REACHED! Price: ${current_price:.2f}")
+                            self.price_updates.put(PriceUpdate(symbol, strategy, 'TAKE_PROFIT', current_price))
                         elif breakeven_profit_reached:
                             # CRITICAL FIX: Only close if actual net profit > 0.30% (after all costs)
                             # Calculate actual net profit at current price
-                            from utils.profit_calculator import ProfitCalculator
-                            profit_calc = ProfitCalculator(exchange='bybit')
-                            
                             gross_profit_pct = ((current_price - entry_price) / entry_price * 100.0) if action == 'BUY' else ((entry_price - current_price) / entry_price * 100.0)
                             
                             # Estimate costs (fees 0.13% + slippage ~0.10% + spread ~0.03% = ~0.26%)
@@ -296,40 +388,19 @@ class RealTimePriceMonitor:
                             # Check if partial profit taking enabled
                             if position_info.get('partial_profit_enabled', False):
                                 # PARTIAL CLOSE: Close fees amount, keep rest for target
-                                logger.info(f"[MONITOR] {symbol} ({strategy_safe}) MIN PROFIT REACHED! Net: {estimated_net_profit_pct:.2f}% - Partial close at ${current_price:.2f}")
-                                self.price_updates.put({
-                                    'key': key,
-                                    'symbol': symbol,
-                                    'strategy': position_info.get('strategy', 'unknown'),
-                                    'signal': 'PARTIAL_FEES_PROFIT',
-                                    'current_price': current_price,
-                                    'position_info': position_info
-                                })
+                                logger.info(f"[MONITOR] {symbol} ({strategy}) MIN PROFIT REACHED! Net: {estimated_net_profit_pct:.2f}% - Partial close at ${current_price:.2f}")
+                                self.price_updates.put(PriceUpdate(symbol, strategy, 'PARTIAL_FEES_PROFIT', current_price))
                             else:
                                 # FULL CLOSE: Only if net profit > 0.30%
-                                logger.info(f"[MONITOR] {symbol} ({strategy_safe}) MIN PROFIT REACHED! Net: {estimated_net_profit_pct:.2f}% - Closing at ${current_price:.2f}")
-                                self.price_updates.put({
-                                    'key': key,
-                                    'symbol': symbol,
-                                    'strategy': position_info.get('strategy', 'unknown'),
-                                    'signal': 'BREAKEVEN_PROFIT',
-                                    'current_price': current_price,
-                                    'position_info': position_info
-                                })
+                                logger.info(f"[MONITOR] {symbol} ({strategy}) MIN PROFIT REACHED! Net: {estimated_net_profit_pct:.2f}% - Closing at ${current_price:.2f}")
+                                self.price_updates.put(PriceUpdate(symbol, strategy, 'BREAKEVEN_PROFIT', current_price))
                             # Old duplicate code removed
                         elif stop_hit:
-                            logger.warning(f"[MONITOR] {symbol} ({strategy_safe}) STOP LOSS HIT! Price: ${current_price:.2f}")
-                            self.price_updates.put({
-                                'key': key,
-                                'symbol': symbol,
-                                'strategy': position_info.get('strategy', 'unknown'),
-                                'signal': 'STOP_LOSS',
-                                'current_price': current_price,
-                                'position_info': position_info
-                            })
+                            logger.warning(f"[MONITOR] {symbol} ({strategy}) STOP LOSS HIT! Price: ${current_price:.2f}")
+                            self.price_updates.put(PriceUpdate(symbol, strategy, 'STOP_LOSS', current_price))
                     except Exception as e:
                         # Handle per-position errors gracefully
-                        logger.error(f"[ERROR] Error monitoring position {key}: {e}", exc_info=True)
+                        logger.error(f"[ERROR] Error monitoring position {key}: {e}")
                         continue  # Skip this position, continue with others
                 
                 # Wait before next check
@@ -339,6 +410,21 @@ class RealTimePriceMonitor:
                 logger.error(f"[ERROR] Error in price monitoring loop: {e}", exc_info=True)
                 time.sleep(self.check_interval)
     
+    def _fetch_price(self, symbol: str) -> Optional[float]:
+        """Current price: streamed if fresh, otherwise REST"""
+        if self.market_stream is not None:
+            price = self.market_stream.get_current_price(symbol)
+            if price:
+                return price
+        
+        # Get price (round-robin if available, otherwise direct)
+        if hasattr(self.api_client, 'get_client'):
+            # API rotator
+            client = self.api_client.get_client()
+            return client.get_current_price(symbol)
+        # Direct client
+        return self.api_client.get_current_price(symbol)
+    
     def stop_monitoring(self):
         """Stop monitoring"""
         self.running = False
@@ -27,6 +27,17 @@ class SlippageSimulator:
     def __init__(self):
         pass
     
+    def get_rate(self, symbol: str, volatility: float = 0.0) -> float:
+        """Slippage as a fraction of price for symbol at the given volatility (0-1)"""
+        # Get base slippage rate
+        base_rate = self.SLIPPAGE_RATES.get(symbol.upper(), self.SLIPPAGE_RATES['default'])
+        
+        # Adjust for volatility (higher volatility = more slippage)
+        volatility_multiplier = 1.0 + (volatility * 0.5)  # Max 50% increase
+        
+        # Clamp to reasonable range
+        return clamp_value(base_rate * volatility_multiplier, 0.0001, 0.002)  # 0.01% to 0.2%
+    
     def calculate_slippage(
         self,
         symbol: str,
@@ -49,15 +60,7 @@ class SlippageSimulator:
             if not validate_price(price):
                 return 0.0
             
-            # Get base slippage rate
-            base_rate = self.SLIPPAGE_RATES.get(symbol.upper(), self.SLIPPAGE_RATES['default'])
-            
-            # Adjust for volatility (higher volatility = more slippage)
-            volatility_multiplier = 1.0 + (volatility * 0.5)  # Max 50% increase
-            slippage_rate = base_rate * volatility_multiplier
-            
-            # Clamp to reasonable range
-            slippage_rate = clamp_value(slippage_rate, 0.0001, 0.002)  # 0.01% to 0.2%
+            slippage_rate = self.get_rate(symbol, volatility)
             
             # Calculate slippage
             if action.upper() == 'BUY':
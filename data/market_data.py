@@ -2,27 +2,62 @@
 Market data fetching and caching
 """
 import time
-from typing import Optional, Tuple, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple, Dict, List
 from core.api_client import BinanceAPIClient
 from utils.logger import setup_logger
 
 logger = setup_logger("market_data")
 
+_INTERVAL_UNITS = {'m': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def _interval_seconds(interval: str) -> Optional[int]:
+    """Bar length of a kline interval ('5m' -> 300), None if unrecognised"""
+    try:
+        return int(interval[:-1]) * _INTERVAL_UNITS[interval[-1]]
+    except (KeyError, ValueError, IndexError):
+        return None
+
 
 class MarketData:
     """Market data provider with caching"""
     
-    def __init__(self, api_client: BinanceAPIClient, cache_duration: int = 5):
+    def __init__(
+        self,
+        api_client: BinanceAPIClient,
+        cache_duration: int = 5,
+        stream=None,
+        align_klines_to_bar: bool = True
+    ):
+        """
+        Args:
+            api_client: Exchange API client
+            cache_duration: Seconds a fetched price (and, unaligned, klines) stays fresh
+            stream: Optional push-based market stream
+            align_klines_to_bar: Reuse REST klines until the next candle opens rather than
+                for cache_duration (the in-progress candle then refreshes once per bar)
+        """
         self.api_client = api_client
         self.cache_duration = cache_duration
+        self.align_klines_to_bar = align_klines_to_bar
+        
+        # Optional push-based source (BinanceMarketStream); REST is the fallback
+        self.stream = stream
         
         # Cache
         self._price_cache: Dict[str, Tuple[float, float]] = {}  # symbol -> (price, timestamp)
-        self._klines_cache: Dict[str, Tuple[Tuple, float]] = {}  # symbol -> (data, timestamp)
+        self._klines_cache: Dict[str, Tuple[Tuple, float]] = {}  # key -> (data incl. open_times, expiry time)
     
     def get_current_price(self, symbol: str) -> Optional[float]:
         """Get current price with caching"""
         try:
+            # Streamed price (if fresh) beats any cached REST price
+            if self.stream is not None:
+                price = self.stream.get_current_price(symbol)
+                if price:
+                    return price
+            
             now = time.time()
             
             # Check cache
@@ -42,24 +77,79 @@ class MarketData:
             logger.error(f"[ERROR] Error getting current price for {symbol}: {e}")
             return None
     
-    def get_klines(self, symbol: str, interval: str = "5m", limit: int = 200) -> Optional[Tuple]:
-        """Get klines with caching"""
+    def get_prices_batch(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        """
+        Get prices for many symbols, fetching cache misses in one request when the client can
+        
+        Fetched prices go into the price cache, so get_current_price calls made
+        during the same cycle return them without a request.
+        """
+        results: Dict[str, Optional[float]] = {}
+        now = time.time()
+        
+        # Serve streamed or fresh cached prices
+        missing = []
+        for symbol in symbols:
+            price = self.stream.get_current_price(symbol) if self.stream is not None else None
+            if not price:
+                cached = self._price_cache.get(symbol)
+                if cached and now - cached[1] < self.cache_duration:
+                    price = cached[0]
+            if price:
+                results[symbol] = price
+            else:
+                missing.append(symbol)
+        
+        # Without a batch call, leave misses to get_current_price (one request per symbol)
+        if not missing or not hasattr(self.api_client, 'get_prices_batch'):
+            return results
+        
+        try:
+            fetched = self.api_client.get_prices_batch(missing)
+        except Exception as e:
+            logger.error(f"[ERROR] Error batch fetching prices: {e}")
+            return results
+        
+        now = time.time()
+        for symbol, price in fetched.items():
+            if price:
+                self._price_cache[symbol] = (price, now)
+            results[symbol] = price
+        
+        return results
+    
+    def get_klines(
+        self,
+        symbol: str,
+        interval: str = "5m",
+        limit: int = 200,
+        with_open_time: bool = False
+    ) -> Optional[Tuple]:
+        """
+        Get klines with caching
+        
+        Returns (closes, highs, lows, volumes, opens), plus open_times as a
+        sixth element when with_open_time is True.
+        """
+        now = time.time()
+        cache_key = f"{symbol}_{interval}_{limit}"
         try:
-            now = time.time()
-            cache_key = f"{symbol}_{interval}_{limit}"
+            klines = self._get_streamed_klines(symbol, interval, limit)
+            if klines:
+                return klines if with_open_time else klines[:5]
             
             # Check cache
             if cache_key in self._klines_cache:
-                cached_data, cache_time = self._klines_cache[cache_key]
-                if now - cache_time < self.cache_duration:
-                    return cached_data
+                cached_data, expires = self._klines_cache[cache_key]
+                if now < expires:
+                    return cached_data if with_open_time or cached_data is None else cached_data[:5]
             
-            # Fetch from API
-            klines = self.api_client.get_klines(symbol, interval, limit)
+            # Fetch from API (always with open times, so the cache can serve both forms)
+            klines = self.api_client.get_klines(symbol, interval, limit, with_open_time=True)
             if klines:
-                self._klines_cache[cache_key] = (klines, now)
+                self._klines_cache[cache_key] = (klines, self._klines_expiry(klines, interval, now))
             
-            return klines
+            return klines if with_open_time or not klines else klines[:5]
             
         except Exception as e:
             # Filter 400 errors for symbols not available on testnet (silent skip)
@@ -67,8 +157,84 @@ class MarketData:
             if '400' in error_str or 'bad request' in error_str:
                 logger.debug(f"[SKIP] {symbol} not available on testnet, skipping silently")
                 # Cache None to avoid repeated requests
-                self._klines_cache[cache_key] = (None, now)
+                self._klines_cache[cache_key] = (None, now + self.cache_duration)
                 return None
             logger.error(f"[ERROR] Error getting klines for {symbol}: {e}")
             return None
 
+    
+    def invalidate(self, symbol: str):
+        """Drop cached REST price and klines for symbol, so the next read fetches fresh data"""
+        self._price_cache.pop(symbol, None)
+        prefix = f"{symbol}_"
+        for cache_key in list(self._klines_cache):  # Snapshot: scan threads may insert meanwhile
+            if cache_key.startswith(prefix):
+                self._klines_cache.pop(cache_key, None)
+    
+    def _klines_expiry(self, klines: Tuple, interval: str, now: float) -> float:
+        """When cached klines go stale: when the next candle opens (if aligned), never sooner than cache_duration"""
+        expires = now + self.cache_duration
+        bar = _interval_seconds(interval) if self.align_klines_to_bar else None
+        if bar:
+            # open_times are epoch ms; allow a second for the exchange to roll the candle
+            expires = max(expires, klines[5][-1] / 1000.0 + bar + 1.0)
+        return expires
+    
+    def _get_streamed_klines(self, symbol: str, interval: str, limit: int) -> Optional[Tuple]:
+        """Klines from the stream if it covers this interval/limit and is fresh"""
+        if self.stream is None or interval != self.stream.interval or limit != self.stream.limit:
+            return None
+        return self.stream.get_klines(symbol, with_open_time=True)
+    
+    def get_klines_batch(
+        self,
+        symbols: List[str],
+        interval: str = "5m",
+        limit: int = 200,
+        max_workers: int = 10
+    ) -> Dict[str, Optional[Tuple]]:
+        """Get klines for many symbols, fetching cache misses concurrently (5-tuples, as get_klines)"""
+        results: Dict[str, Optional[Tuple]] = {}
+        now = time.time()
+        
+        # Serve streamed or fresh cached entries
+        missing = []
+        for symbol in symbols:
+            klines = self._get_streamed_klines(symbol, interval, limit)
+            if klines:
+                results[symbol] = klines[:5]
+                continue
+            
+            cache_key = f"{symbol}_{interval}_{limit}"
+            cached = self._klines_cache.get(cache_key)
+            if cached and now < cached[1]:
+                results[symbol] = cached[0][:5] if cached[0] else cached[0]
+            else:
+                missing.append(symbol)
+        
+        if not missing:
+            return results
+        
+        try:
+            # Use the client's batch call if it has one, otherwise overlap single calls here
+            if hasattr(self.api_client, 'get_klines_batch'):
+                fetched = self.api_client.get_klines_batch(
+                    missing, interval, limit, max_workers=max_workers, with_open_time=True
+                )
+            else:
+                workers = max(1, min(max_workers, len(missing)))
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    fetched = dict(zip(missing, pool.map(
+                        lambda s: self.api_client.get_klines(s, interval, limit, with_open_time=True), missing
+                    )))
+        except Exception as e:
+            logger.error(f"[ERROR] Error batch fetching klines: {e}")
+            return results
+        
+        now = time.time()
+        for symbol, klines in fetched.items():
+            if klines:
+                self._klines_cache[f"{symbol}_{interval}_{limit}"] = (klines, self._klines_expiry(klines, interval, now))
+            results[symbol] = klines[:5] if klines else klines
+        
+        return results
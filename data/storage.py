@@ -3,13 +3,24 @@ Trade history storage to CSV
 """
 import csv
 import os
+import time
 from datetime import datetime
+from threading import Lock
 from typing import List, Dict, Optional
 from pathlib import Path
+from sortedcontainers import SortedDict
 from utils.logger import setup_logger
 
 logger = setup_logger("storage")
 
+CSV_HEADER = [
+    'symbol', 'strategy', 'action', 'entry_price', 'exit_price',
+    'quantity', 'entry_time', 'exit_time', 'pnl', 'pnl_pct',
+    'status', 'exit_reason', 'stop_loss', 'take_profit',
+    'entry_fee', 'exit_fee', 'entry_slippage', 'exit_slippage',
+    'spread_cost', 'total_costs', 'net_profit'
+]
+
 
 class TradeStorage:
     """Store and retrieve trade history to/from CSV"""
@@ -18,6 +29,17 @@ class TradeStorage:
         self.csv_path = Path(csv_path)
         self.csv_path.parent.mkdir(parents=True, exist_ok=True)
         self._ensure_header()
+        
+        # In-memory trade list plus per-date / per-strategy aggregates,
+        # built once from the CSV and updated on every save_trade()
+        self.lock = Lock()
+        self.version = 0  # Bumped on every saved trade (used for HTTP ETags)
+        self._started = time.time_ns()
+        self._trades: List[Dict] = []
+        self._by_date: SortedDict = SortedDict()  # date -> stats, kept in date order
+        self._by_strategy: Dict[str, Dict] = {}
+        for trade in self._load_trades_from_csv():
+            self._index_trade(trade)
     
     def _ensure_header(self):
         """Ensure CSV file has header"""
@@ -25,13 +47,7 @@ class TradeStorage:
             try:
                 with open(self.csv_path, 'w', newline='', encoding='utf-8') as f:
                     writer = csv.writer(f)
-                    writer.writerow([
-                        'symbol', 'strategy', 'action', 'entry_price', 'exit_price',
-                        'quantity', 'entry_time', 'exit_time', 'pnl', 'pnl_pct',
-                        'status', 'exit_reason', 'stop_loss', 'take_profit',
-                        'entry_fee', 'exit_fee', 'entry_slippage', 'exit_slippage',
-                        'spread_cost', 'total_costs', 'net_profit'
-                    ])
+                    writer.writerow(CSV_HEADER)
             except Exception as e:
                 logger.error(f"[ERROR] Error creating CSV header: {e}")
     
@@ -57,36 +73,77 @@ class TradeStorage:
                 total_costs = 0.0
                 net_profit = position.pnl
             
-            with open(self.csv_path, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    position.symbol,
-                    position.strategy,
-                    position.action,
-                    f"{position.entry_price:.8f}",
-                    f"{position.exit_price:.8f}" if position.exit_price else "",
-                    f"{position.quantity:.8f}",
-                    position.entry_time.isoformat(),
-                    position.exit_time.isoformat() if position.exit_time else "",
-                    f"{position.pnl:.2f}",  # Gross PnL
-                    f"{position.pnl_pct:.2f}",  # Gross PnL %
-                    position.status,
-                    position.exit_reason or "",
-                    f"{position.stop_loss:.8f}",
-                    f"{position.take_profit:.8f}",
-                    f"{entry_fee:.4f}",
-                    f"{exit_fee:.4f}",
-                    f"{entry_slippage:.4f}",
-                    f"{exit_slippage:.4f}",
-                    f"{spread_cost:.4f}",
-                    f"{total_costs:.4f}",
-                    f"{net_profit:.4f}"  # Net profit after all costs
-                ])
+            row = [
+                position.symbol,
+                position.strategy,
+                position.action,
+                f"{position.entry_price:.8f}",
+                f"{position.exit_price:.8f}" if position.exit_price else "",
+                f"{position.quantity:.8f}",
+                position.entry_time.isoformat(),
+                position.exit_time.isoformat() if position.exit_time else "",
+                f"{position.pnl:.2f}",  # Gross PnL
+                f"{position.pnl_pct:.2f}",  # Gross PnL %
+                position.status,
+                position.exit_reason or "",
+                f"{position.stop_loss:.8f}",
+                f"{position.take_profit:.8f}",
+                f"{entry_fee:.4f}",
+                f"{exit_fee:.4f}",
+                f"{entry_slippage:.4f}",
+                f"{exit_slippage:.4f}",
+                f"{spread_cost:.4f}",
+                f"{total_costs:.4f}",
+                f"{net_profit:.4f}"  # Net profit after all costs
+            ]
+            
+            with self.lock:
+                with open(self.csv_path, 'a', newline='', encoding='utf-8') as f:
+                    writer = csv.writer(f)
+                    writer.writerow(row)
+                
+                # Index exactly what a CSV reload would produce
+                self._index_trade(self._parse_row(dict(zip(CSV_HEADER, row))))
+                self.version += 1
             logger.info(f"[OK] Trade saved to CSV: {position.symbol} Net P&L=${net_profit:.2f} (Costs: ${total_costs:.2f})")
         except Exception as e:
             logger.error(f"[ERROR] Error saving trade to CSV: {e}", exc_info=True)
     
-    def get_all_trades(self) -> List[Dict]:
+    def _parse_row(self, row: Dict[str, str]) -> Dict:
+        """Convert a CSV row (dict of strings) into a trade dict"""
+        trade_dict = {
+            'symbol': row['symbol'],
+            'strategy': row['strategy'],
+            'action': row['action'],
+            'entry_price': float(row['entry_price']),
+            'exit_price': float(row['exit_price']) if row.get('exit_price') else None,
+            'quantity': float(row['quantity']),
+            'entry_time': row['entry_time'],
+            'exit_time': row.get('exit_time', ''),
+            'pnl': float(row.get('pnl', 0.0)),  # Gross PnL
+            'pnl_pct': float(row.get('pnl_pct', 0.0)),
+            'status': row['status'],
+            'exit_reason': row.get('exit_reason', ''),
+            'stop_loss': float(row['stop_loss']),
+            'take_profit': float(row['take_profit'])
+        }
+        
+        # Add cost breakdown if available (new format)
+        if 'entry_fee' in row:
+            trade_dict['entry_fee'] = float(row.get('entry_fee', 0.0))
+            trade_dict['exit_fee'] = float(row.get('exit_fee', 0.0))
+            trade_dict['entry_slippage'] = float(row.get('entry_slippage', 0.0))
+            trade_dict['exit_slippage'] = float(row.get('exit_slippage', 0.0))
+            trade_dict['spread_cost'] = float(row.get('spread_cost', 0.0))
+            trade_dict['total_costs'] = float(row.get('total_costs', 0.0))
+            trade_dict['net_profit'] = float(row.get('net_profit', trade_dict['pnl']))  # Use net if available
+        else:
+            # Old format - use gross PnL as net
+            trade_dict['net_profit'] = trade_dict['pnl']
+        
+        return trade_dict
+    
+    def _load_trades_from_csv(self) -> List[Dict]:
         """Load all trades from CSV"""
         trades = []
         try:
@@ -97,37 +154,7 @@ class TradeStorage:
                 reader = csv.DictReader(f)
                 for row in reader:
                     try:
-                        trade_dict = {
-                            'symbol': row['symbol'],
-                            'strategy': row['strategy'],
-                            'action': row['action'],
-                            'entry_price': float(row['entry_price']),
-                            'exit_price': float(row['exit_price']) if row.get('exit_price') else None,
-                            'quantity': float(row['quantity']),
-                            'entry_time': row['entry_time'],
-                            'exit_time': row.get('exit_time', ''),
-                            'pnl': float(row.get('pnl', 0.0)),  # Gross PnL
-                            'pnl_pct': float(row.get('pnl_pct', 0.0)),
-                            'status': row['status'],
-                            'exit_reason': row.get('exit_reason', ''),
-                            'stop_loss': float(row['stop_loss']),
-                            'take_profit': float(row['take_profit'])
-                        }
-                        
-                        # Add cost breakdown if available (new format)
-                        if 'entry_fee' in row:
-                            trade_dict['entry_fee'] = float(row.get('entry_fee', 0.0))
-                            trade_dict['exit_fee'] = float(row.get('exit_fee', 0.0))
-                            trade_dict['entry_slippage'] = float(row.get('entry_slippage', 0.0))
-                            trade_dict['exit_slippage'] = float(row.get('exit_slippage', 0.0))
-                            trade_dict['spread_cost'] = float(row.get('spread_cost', 0.0))
-                            trade_dict['total_costs'] = float(row.get('total_costs', 0.0))
-                            trade_dict['net_profit'] = float(row.get('net_profit', trade_dict['pnl']))  # Use net if available
-                        else:
-                            # Old format - use gross PnL as net
-                            trade_dict['net_profit'] = trade_dict['pnl']
-                        
-                        trades.append(trade_dict)
+                        trades.append(self._parse_row(row))
                     except (ValueError, KeyError) as e:
                         logger.warning(f"[WARN] Skipping invalid row in CSV: {e}")
                         continue
@@ -137,6 +164,88 @@ class TradeStorage:
         
         return trades
     
+    def _index_trade(self, trade: Dict):
+        """Add a trade to the in-memory list and update date/strategy aggregates"""
+        # Normalize once on insert: readers use trade['_net'] / trade['_date'] directly
+        entry_time = trade.get('entry_time', '')
+        trade['_date'] = entry_time.split('T')[0] if 'T' in entry_time else entry_time.split(' ')[0]
+        trade['_net'] = trade.get('net_profit', trade.get('pnl', 0.0))
+        trade_date = trade['_date']
+        profit = trade['_net']
+        strategy = trade.get('strategy', '')
+        
+        self._trades.append(trade)
+        
+        daily = self._by_date.get(trade_date)
+        if daily is None:
+            daily = self._by_date[trade_date] = {
+                'date': trade_date,
+                'total_trades': 0,
+                'winning_trades': 0,
+                'losing_trades': 0,
+                'total_profit': 0.0,
+                'strategies_used': set(),
+                'symbols_traded': set(),
+                'trades': []
+            }
+        daily['total_trades'] += 1
+        daily['total_profit'] += profit
+        if profit > 0:
+            daily['winning_trades'] += 1
+        else:
+            daily['losing_trades'] += 1
+        daily['strategies_used'].add(strategy)
+        daily['symbols_traded'].add(trade.get('symbol', ''))
+        daily['trades'].append(trade)
+        
+        stats = self._by_strategy.get(strategy)
+        if stats is None:
+            stats = self._by_strategy[strategy] = {
+                'strategy': strategy,
+                'total_trades': 0,
+                'winning_trades': 0,
+                'losing_trades': 0,
+                'total_profit': 0.0,
+                'profit_sum': 0.0,  # Sum of winning trades
+                'loss_sum': 0.0     # Sum of losing (<= 0) trades
+            }
+        stats['total_trades'] += 1
+        stats['total_profit'] += profit
+        if profit > 0:
+            stats['winning_trades'] += 1
+            stats['profit_sum'] += profit
+        else:
+            stats['losing_trades'] += 1
+            stats['loss_sum'] += profit
+    
+    @property
+    def etag(self) -> str:
+        """Identifier of the current trade history (changes on restart and on every save)"""
+        return f"trades-{self._started:x}-{self.version}"
+    
+    def get_all_trades(self) -> List[Dict]:
+        """Get all closed trades (served from memory, loaded from CSV at startup)
+        
+        Each trade also carries '_net' (net profit, falling back to gross pnl)
+        and '_date' (entry date, YYYY-MM-DD).
+        """
+        with self.lock:
+            return list(self._trades)
+    
+    def get_daily_stats(self) -> Dict[str, Dict]:
+        """Get per-date aggregates (date -> stats incl. 'trades' list), newest date first"""
+        with self.lock:
+            return {
+                date: dict(stats, strategies_used=set(stats['strategies_used']),
+                           symbols_traded=set(stats['symbols_traded']), trades=list(stats['trades']))
+                for date, stats in reversed(self._by_date.items())
+            }
+    
+    def get_strategy_stats(self) -> Dict[str, Dict]:
+        """Get per-strategy aggregates"""
+        with self.lock:
+            return {strategy: dict(stats) for strategy, stats in self._by_strategy.items()}
+    
     def get_trades_by_symbol(self, symbol: str) -> List[Dict]:
         """Get trades for specific symbol"""
         all_trades = self.get_all_trades()
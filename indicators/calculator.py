@@ -1,15 +1,255 @@
 """
 Technical indicators calculator
 """
+import math
 import numpy as np
 import talib
-from typing import List, Dict, Any
-from utils.validators import ensure_min_length, safe_divide, safe_mean
+from collections import deque
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+from utils.validators import ensure_min_length, safe_divide, validate_price
 from utils.logger import setup_logger
 
 logger = setup_logger("indicators")
 
 
+@lru_cache(maxsize=64)
+def _ema_weights(steps: int, alpha: float) -> Tuple[np.ndarray, float]:
+    """
+    Closed-form EMA weights for `steps` updates: (weights, decay)
+    
+    After pushing x_0..x_{steps-1} onto value v, the EMA is
+    decay * v + weights @ x, with weights[j] = alpha * (1 - alpha)**(steps - 1 - j).
+    """
+    keep = 1.0 - alpha
+    weights = alpha * keep ** np.arange(steps - 1, -1, -1, dtype=np.float64)
+    weights.flags.writeable = False  # Shared through the cache
+    return weights, keep ** steps
+
+
+class _RollingEMA:
+    """EMA seeded with the SMA of its first `period` values (TA-Lib style)"""
+    __slots__ = ('period', 'alpha', 'value', '_n', '_sum')
+    
+    def __init__(self, period: int, alpha: Optional[float] = None):
+        self.period = period
+        self.alpha = alpha if alpha is not None else 2.0 / (period + 1)  # Wilder smoothing passes 1/period
+        self.value: Optional[float] = None
+        self._n = 0
+        self._sum = 0.0
+    
+    def peek(self, x: float) -> Optional[float]:
+        """Value after x, without committing it"""
+        if self.value is not None:
+            return self.value + self.alpha * (x - self.value)
+        if self._n + 1 >= self.period:
+            return (self._sum + x) / self.period
+        return None
+    
+    def push(self, x: float):
+        """Commit x"""
+        if self.value is None:
+            self._n += 1
+            self._sum += x
+            if self._n >= self.period:
+                self.value = self._sum / self.period
+        else:
+            self.value += self.alpha * (x - self.value)
+    
+    def seed(self, values: np.ndarray):
+        """Commit a whole array on a fresh EMA (same result as push() for each value)"""
+        period = self.period
+        if len(values) < period:
+            self._n = len(values)
+            self._sum = float(values.sum())
+            return
+        self._n = period
+        self._sum = float(values[:period].sum())
+        weights, decay = _ema_weights(len(values) - period, self.alpha)
+        self.value = decay * (self._sum / period) + float(np.dot(weights, values[period:]))
+
+
+class IndicatorState:
+    """
+    Running indicator state for one symbol, updated one closed candle at a time
+    
+    Closed candles are committed (O(1) each); the candle still in progress is
+    only applied on read, so repeated scans within one candle never drift.
+    """
+    EMA_PERIODS = (5, 9, 10, 12, 21, 26)
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        """Drop all running state (next update reseeds from the full window)"""
+        self.emas = {p: _RollingEMA(p) for p in self.EMA_PERIODS}
+        self.macd_signal = _RollingEMA(9)
+        self.avg_gain = _RollingEMA(14, 1.0 / 14)  # RSI (Wilder)
+        self.avg_loss = _RollingEMA(14, 1.0 / 14)
+        self.atr = _RollingEMA(14, 1.0 / 14)  # ATR (Wilder)
+        self.prev_close: Optional[float] = None
+        self.closes: deque = deque(maxlen=19)  # Closed closes (BB window, momentum)
+        self.volumes: deque = deque(maxlen=19)  # Closed volumes (volume ratio)
+        self.last_open_time: Optional[float] = None  # Open time of the newest committed candle
+        # Window sums, refreshed once per committed candle so snapshot() is O(1)
+        self._bb_shift = 0.0  # Closes are summed relative to this (avoids cancellation in the variance)
+        self._bb_sum = 0.0
+        self._bb_sumsq = 0.0
+        self._volume_sum = 0.0  # Valid (validate_price) closed volumes
+        self._volume_count = 0
+    
+    def _refresh_window_sums(self):
+        """Recompute the BB and volume sums over the closed-candle windows"""
+        closes = np.fromiter(self.closes, dtype=np.float64, count=len(self.closes))
+        self._bb_shift = float(closes.mean()) if len(closes) else 0.0
+        deviations = closes - self._bb_shift
+        self._bb_sum = float(deviations.sum())
+        self._bb_sumsq = float(np.dot(deviations, deviations))
+        valid = [v for v in self.volumes if validate_price(v)]
+        self._volume_sum = sum(valid)
+        self._volume_count = len(valid)
+    
+    def push(self, high: float, low: float, close: float, volume: float, open_time: float):
+        """Commit one closed candle"""
+        for ema in self.emas.values():
+            ema.push(close)
+        fast, slow = self.emas[12].value, self.emas[26].value
+        if fast is not None and slow is not None:
+            self.macd_signal.push(fast - slow)
+        
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            self.avg_gain.push(max(change, 0.0))
+            self.avg_loss.push(max(-change, 0.0))
+            self.atr.push(max(high - low, abs(high - self.prev_close), abs(low - self.prev_close)))
+        
+        self.prev_close = close
+        self.closes.append(close)
+        self.volumes.append(volume)
+        self.last_open_time = open_time
+        self._refresh_window_sums()
+    
+    def seed(self, highs: np.ndarray, lows: np.ndarray, closes: np.ndarray,
+             volumes: np.ndarray, open_times: np.ndarray):
+        """Reset, then commit a run of closed candles at once (same result as push() for each)"""
+        self.reset()
+        if not len(closes):
+            return
+        
+        for ema in self.emas.values():
+            ema.seed(closes)
+        if len(closes) >= 26:
+            # MACD line exists from the candle where the slow EMA gets its first value
+            macd = talib.EMA(closes, timeperiod=12)[25:] - talib.EMA(closes, timeperiod=26)[25:]
+            self.macd_signal.seed(macd)
+        
+        if len(closes) >= 2:
+            prev = closes[:-1]
+            change = closes[1:] - prev
+            self.avg_gain.seed(np.maximum(change, 0.0))
+            self.avg_loss.seed(np.maximum(-change, 0.0))
+            high, low = highs[1:], lows[1:]
+            self.atr.seed(np.maximum(high - low, np.maximum(np.abs(high - prev), np.abs(low - prev))))
+        
+        self.prev_close = float(closes[-1])
+        self.closes.extend(closes[-19:].tolist())
+        self.volumes.extend(volumes[-19:].tolist())
+        self.last_open_time = float(open_times[-1])
+        self._refresh_window_sums()
+    
+    def snapshot(self, high: float, low: float, close: float, volume: float) -> Dict[str, Any]:
+        """Indicators with the in-progress candle applied (same keys as calculate_all)"""
+        indicators: Dict[str, Any] = {}
+        
+        ema = {p: e.peek(close) for p, e in self.emas.items()}
+        for p in (5, 9, 10, 21):
+            indicators[f'ema_{p}'] = ema[p] if ema[p] is not None else close
+        indicators['ema_5_prev'] = self.emas[5].value if self.emas[5].value is not None else close
+        indicators['ema_10_prev'] = self.emas[10].value if self.emas[10].value is not None else close
+        
+        # RSI
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            gain = self.avg_gain.peek(max(change, 0.0))
+            loss = self.avg_loss.peek(max(-change, 0.0))
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+            atr = self.atr.peek(tr)
+        else:
+            gain = loss = atr = None
+        if gain is None or loss is None:
+            indicators['rsi'] = 50.0
+        elif loss == 0:
+            indicators['rsi'] = 100.0 if gain > 0 else 50.0
+        else:
+            indicators['rsi'] = 100.0 - 100.0 / (1.0 + gain / loss)
+        
+        # MACD
+        if ema[12] is not None and ema[26] is not None:
+            macd = ema[12] - ema[26]
+            signal = self.macd_signal.peek(macd)
+            indicators['macd'] = macd
+            indicators['macd_signal'] = signal if signal is not None else 0.0
+            indicators['macd_hist'] = macd - signal if signal is not None else 0.0
+        else:
+            indicators['macd'] = indicators['macd_signal'] = indicators['macd_hist'] = 0.0
+        
+        # Bollinger Bands (20, 2) over the last 19 closed closes + current
+        if len(self.closes) >= 19:
+            deviation = close - self._bb_shift
+            mean_dev = (self._bb_sum + deviation) / 20.0
+            variance = (self._bb_sumsq + deviation * deviation) / 20.0 - mean_dev * mean_dev
+            middle = self._bb_shift + mean_dev
+            std = math.sqrt(variance) if variance > 0 else 0.0
+            indicators['bb_upper'] = middle + 2 * std
+            indicators['bb_middle'] = middle
+            indicators['bb_lower'] = middle - 2 * std
+        else:
+            indicators['bb_upper'] = indicators['bb_middle'] = indicators['bb_lower'] = close
+        
+        # ATR
+        indicators['atr'] = atr if atr is not None else 0.0
+        indicators['atr_pct'] = safe_divide(indicators['atr'], close, 0.0) * 100
+        
+        # Volume ratio (current vs mean of last 20 incl. current)
+        if len(self.volumes) >= 19:
+            if validate_price(volume):
+                avg_volume = (self._volume_sum + volume) / (self._volume_count + 1)
+            else:
+                avg_volume = self._volume_sum / self._volume_count if self._volume_count else 1.0
+            indicators['volume_ratio'] = safe_divide(volume, avg_volume, 1.0)
+        else:
+            indicators['volume_ratio'] = 1.0
+        
+        # Momentum (3 and 10 candles back)
+        n = len(self.closes)
+        indicators['momentum_3'] = safe_divide(close - self.closes[-3], self.closes[-3], 0.0) * 100 if n >= 3 else 0.0
+        indicators['momentum_10'] = safe_divide(close - self.closes[-10], self.closes[-10], 0.0) * 100 if n >= 10 else 0.0
+        
+        indicators['spread'] = _default_spread_pct()
+        return indicators
+
+
+# calculate_all keys filled from the last value of each TA-Lib series (in tails order)
+_TAIL_KEYS = (
+    'rsi', 'ema_9', 'ema_21',
+    'ema_5', 'ema_5_prev', 'ema_10', 'ema_10_prev',
+    'macd', 'macd_signal', 'macd_hist',
+    'bb_upper', 'bb_middle', 'bb_lower',
+    'atr'
+)
+
+
+def _default_spread_pct() -> float:
+    """Default spread in percent (the bot overrides it per symbol)"""
+    try:
+        from core.slippage_simulator import SpreadSimulator
+        # Use BTCUSDT as default, will be overridden per symbol
+        return SpreadSimulator().get_spread('BTCUSDT') * 100  # Convert to percentage
+    except Exception:
+        return 0.03  # 0.03% default
+
+
 class IndicatorCalculator:
     """Calculate technical indicators safely"""
     
@@ -23,166 +263,97 @@ class IndicatorCalculator:
                 logger.warning(f"[WARN] Insufficient data: {len(closes)} < 200")
                 return {}
             
-            # Convert to numpy arrays
-            closes_arr = np.array(closes[-200:], dtype=np.float64)
-            highs_arr = np.array(highs[-200:], dtype=np.float64)
-            lows_arr = np.array(lows[-200:], dtype=np.float64)
-            volumes_arr = np.array(volumes[-200:], dtype=np.float64)
-            opens_arr = np.array(opens[-200:], dtype=np.float64) if opens else closes_arr
-            
-            indicators = {}
-            
-            # RSI (requires at least 14 periods)
-            try:
-                if len(closes_arr) >= 14:
-                    rsi = talib.RSI(closes_arr, timeperiod=14)
-                    indicators['rsi'] = float(rsi[-1]) if len(rsi) > 0 and not np.isnan(rsi[-1]) else 50.0
-                else:
-                    indicators['rsi'] = 50.0
-            except Exception as e:
-                logger.debug(f"RSI calculation error: {e}")
-                indicators['rsi'] = 50.0
-            
-            # EMAs
-            try:
-                if len(closes_arr) >= 9:
-                    ema_9 = talib.EMA(closes_arr, timeperiod=9)
-                    indicators['ema_9'] = float(ema_9[-1]) if len(ema_9) > 0 and not np.isnan(ema_9[-1]) else float(closes_arr[-1])
-                else:
-                    indicators['ema_9'] = float(closes_arr[-1])
-            except Exception:
-                indicators['ema_9'] = float(closes_arr[-1])
-            
-            try:
-                if len(closes_arr) >= 21:
-                    ema_21 = talib.EMA(closes_arr, timeperiod=21)
-                    indicators['ema_21'] = float(ema_21[-1]) if len(ema_21) > 0 and not np.isnan(ema_21[-1]) else float(closes_arr[-1])
-                else:
-                    indicators['ema_21'] = float(closes_arr[-1])
-            except Exception:
-                indicators['ema_21'] = float(closes_arr[-1])
+            # Convert to numpy arrays (no copy when given contiguous float64 arrays)
+            closes_arr = np.ascontiguousarray(closes[-200:], dtype=np.float64)
+            highs_arr = np.ascontiguousarray(highs[-200:], dtype=np.float64)
+            lows_arr = np.ascontiguousarray(lows[-200:], dtype=np.float64)
+            volumes_arr = np.ascontiguousarray(volumes[-200:], dtype=np.float64)
+            opens_arr = np.ascontiguousarray(opens[-200:], dtype=np.float64) if opens is not None and len(opens) else closes_arr
             
-            # MACD
-            try:
-                if len(closes_arr) >= 26:
-                    macd, signal, hist = talib.MACD(closes_arr)
-                    indicators['macd'] = float(macd[-1]) if len(macd) > 0 and not np.isnan(macd[-1]) else 0.0
-                    indicators['macd_signal'] = float(signal[-1]) if len(signal) > 0 and not np.isnan(signal[-1]) else 0.0
-                    indicators['macd_hist'] = float(hist[-1]) if len(hist) > 0 and not np.isnan(hist[-1]) else 0.0
-                else:
-                    indicators['macd'] = 0.0
-                    indicators['macd_signal'] = 0.0
-                    indicators['macd_hist'] = 0.0
-            except Exception:
-                indicators['macd'] = 0.0
-                indicators['macd_signal'] = 0.0
-                indicators['macd_hist'] = 0.0
+            last_close = float(closes_arr[-1])
             
-            # Bollinger Bands
-            try:
-                if len(closes_arr) >= 20:
-                    upper, middle, lower = talib.BBANDS(closes_arr, timeperiod=20, nbdevup=2, nbdevdn=2)
-                    indicators['bb_upper'] = float(upper[-1]) if len(upper) > 0 and not np.isnan(upper[-1]) else float(closes_arr[-1])
-                    indicators['bb_middle'] = float(middle[-1]) if len(middle) > 0 and not np.isnan(middle[-1]) else float(closes_arr[-1])
-                    indicators['bb_lower'] = float(lower[-1]) if len(lower) > 0 and not np.isnan(lower[-1]) else float(closes_arr[-1])
-                else:
-                    indicators['bb_upper'] = float(closes_arr[-1])
-                    indicators['bb_middle'] = float(closes_arr[-1])
-                    indicators['bb_lower'] = float(closes_arr[-1])
-            except Exception:
-                indicators['bb_upper'] = float(closes_arr[-1])
-                indicators['bb_middle'] = float(closes_arr[-1])
-                indicators['bb_lower'] = float(closes_arr[-1])
+            # One TA-Lib call per series (at least 200 candles, so every
+            # warm-up period is covered); the last values are then gathered
+            # and NaN-checked in a single vectorised pass instead of per key
+            ema_5 = talib.EMA(closes_arr, timeperiod=5)
+            ema_10 = talib.EMA(closes_arr, timeperiod=10)
+            macd, macd_signal, macd_hist = talib.MACD(closes_arr)
+            bb_upper, bb_middle, bb_lower = talib.BBANDS(closes_arr, timeperiod=20, nbdevup=2, nbdevdn=2)
+            tails = np.array([
+                talib.RSI(closes_arr, timeperiod=14)[-1],
+                talib.EMA(closes_arr, timeperiod=9)[-1],
+                talib.EMA(closes_arr, timeperiod=21)[-1],
+                ema_5[-1], ema_5[-2], ema_10[-1], ema_10[-2],
+                macd[-1], macd_signal[-1], macd_hist[-1],
+                bb_upper[-1], bb_middle[-1], bb_lower[-1],
+                talib.ATR(highs_arr, lows_arr, closes_arr, timeperiod=14)[-1]
+            ])
+            fallbacks = np.array([
+                50.0, last_close, last_close,
+                last_close, last_close, last_close, last_close,
+                0.0, 0.0, 0.0,
+                last_close, last_close, last_close,
+                0.0
+            ])
+            indicators = dict(zip(_TAIL_KEYS, np.where(np.isnan(tails), fallbacks, tails).tolist()))
+            indicators['atr_pct'] = safe_divide(indicators['atr'], last_close, 0.0) * 100
             
-            # ATR
-            try:
-                if len(highs_arr) >= 14 and len(lows_arr) >= 14:
-                    atr = talib.ATR(highs_arr, lows_arr, closes_arr, timeperiod=14)
-                    atr_value = float(atr[-1]) if len(atr) > 0 and not np.isnan(atr[-1]) else 0.0
-                    indicators['atr'] = atr_value
-                    indicators['atr_pct'] = safe_divide(atr_value, closes_arr[-1], 0.0) * 100
-                else:
-                    indicators['atr'] = 0.0
-                    indicators['atr_pct'] = 0.0
-            except Exception:
-                indicators['atr'] = 0.0
-                indicators['atr_pct'] = 0.0
-            
-            # Volume ratio
-            try:
-                if len(volumes_arr) >= 20:
-                    avg_volume = safe_mean(list(volumes_arr[-20:]), 1.0)
-                    current_volume = volumes_arr[-1]
-                    indicators['volume_ratio'] = safe_divide(current_volume, avg_volume, 1.0)
-                else:
-                    indicators['volume_ratio'] = 1.0
-            except Exception:
-                indicators['volume_ratio'] = 1.0
+            # Volume ratio: current vs mean of the valid volumes in the last 20
+            # (same filter as safe_mean/validate_price: positive, finite, <= 1e6)
+            recent_volumes = volumes_arr[-20:]
+            valid_volumes = recent_volumes[(recent_volumes > 0) & (recent_volumes <= 1000000)]
+            avg_volume = float(valid_volumes.mean()) if len(valid_volumes) else 1.0
+            indicators['volume_ratio'] = safe_divide(float(volumes_arr[-1]), avg_volume, 1.0)
             
             # Momentum
-            try:
-                if len(closes_arr) >= 4:
-                    momentum_3 = safe_divide(
-                        closes_arr[-1] - closes_arr[-4],
-                        closes_arr[-4],
-                        0.0
-                    ) * 100
-                    indicators['momentum_3'] = momentum_3
-                else:
-                    indicators['momentum_3'] = 0.0
-                
-                if len(closes_arr) >= 11:
-                    momentum_10 = safe_divide(
-                        closes_arr[-1] - closes_arr[-11],
-                        closes_arr[-11],
-                        0.0
-                    ) * 100
-                    indicators['momentum_10'] = momentum_10
-                else:
-                    indicators['momentum_10'] = 0.0
-            except Exception:
-                indicators['momentum_3'] = 0.0
-                indicators['momentum_10'] = 0.0
-            
-            # EMA 5 and EMA 10 (for micro-scalp strategy)
-            try:
-                if len(closes_arr) >= 5:
-                    ema_5 = talib.EMA(closes_arr, timeperiod=5)
-                    indicators['ema_5'] = float(ema_5[-1]) if len(ema_5) > 0 and not np.isnan(ema_5[-1]) else float(closes_arr[-1])
-                    indicators['ema_5_prev'] = float(ema_5[-2]) if len(ema_5) > 1 and not np.isnan(ema_5[-2]) else float(closes_arr[-1])
-                else:
-                    indicators['ema_5'] = float(closes_arr[-1])
-                    indicators['ema_5_prev'] = float(closes_arr[-1])
-            except Exception:
-                indicators['ema_5'] = float(closes_arr[-1])
-                indicators['ema_5_prev'] = float(closes_arr[-1])
-            
-            try:
-                if len(closes_arr) >= 10:
-                    ema_10 = talib.EMA(closes_arr, timeperiod=10)
-                    indicators['ema_10'] = float(ema_10[-1]) if len(ema_10) > 0 and not np.isnan(ema_10[-1]) else float(closes_arr[-1])
-                    indicators['ema_10_prev'] = float(ema_10[-2]) if len(ema_10) > 1 and not np.isnan(ema_10[-2]) else float(closes_arr[-1])
-                else:
-                    indicators['ema_10'] = float(closes_arr[-1])
-                    indicators['ema_10_prev'] = float(closes_arr[-1])
-            except Exception:
-                indicators['ema_10'] = float(closes_arr[-1])
-                indicators['ema_10_prev'] = float(closes_arr[-1])
+            indicators['momentum_3'] = safe_divide(last_close - closes_arr[-4], closes_arr[-4], 0.0) * 100
+            indicators['momentum_10'] = safe_divide(last_close - closes_arr[-11], closes_arr[-11], 0.0) * 100
             
             # Spread calculation (percentage) - will be updated per symbol in bot
             # Default 0.03% (will be replaced with actual spread per symbol)
-            try:
-                from core.slippage_simulator import SpreadSimulator
-                spread_sim = SpreadSimulator()
-                # Use BTCUSDT as default, will be overridden per symbol
-                spread_decimal = spread_sim.get_spread('BTCUSDT')
-                indicators['spread'] = spread_decimal * 100  # Convert to percentage
-            except Exception:
-                indicators['spread'] = 0.03  # 0.03% default
+            indicators['spread'] = _default_spread_pct()
             
             return indicators
             
         except Exception as e:
             logger.error(f"[ERROR] Error calculating indicators: {e}", exc_info=True)
             return {}
-
+    
+    @staticmethod
+    def update(state: IndicatorState, closes: List[float], highs: List[float], lows: List[float],
+               volumes: List[float], opens: List[float], open_times: List[float]) -> Dict[str, Any]:
+        """
+        Incremental calculate_all: commit only candles closed since the last call
+        
+        The last kline is treated as the candle in progress. The state is
+        (re)seeded from the last 200 candles on first use or after a gap.
+        """
+        try:
+            if not ensure_min_length(closes, 200):
+                logger.warning(f"[WARN] Insufficient data: {len(closes)} < 200")
+                return {}
+            
+            n = len(closes)
+            last = state.last_open_time
+            if last is None or last < open_times[0]:
+                # First call or gap larger than the window: seed from the closed candles in one pass
+                start = n - 200
+                state.seed(
+                    np.ascontiguousarray(highs[start:n - 1], dtype=np.float64),
+                    np.ascontiguousarray(lows[start:n - 1], dtype=np.float64),
+                    np.ascontiguousarray(closes[start:n - 1], dtype=np.float64),
+                    np.ascontiguousarray(volumes[start:n - 1], dtype=np.float64),
+                    np.asarray(open_times[start:n - 1], dtype=np.float64)
+                )
+                start = n - 1
+            else:
+                start = int(np.searchsorted(open_times, last, side='right'))
+            
+            for i in range(start, n - 1):
+                state.push(float(highs[i]), float(lows[i]), float(closes[i]), float(volumes[i]), float(open_times[i]))
+            
+            return state.snapshot(float(highs[-1]), float(lows[-1]), float(closes[-1]), float(volumes[-1]))
+        
+        except Exception as e:
+            logger.error(f"[ERROR] Error updating indicators: {e}", exc_info=True)
+            return {}
@@ -3,7 +3,6 @@ Base strategy class for all trading strategies
 """
 from abc import ABC, abstractmethod
 from typing import Dict, Any, Optional
-from utils.validators import clamp_value
 from utils.logger import setup_logger
 
 logger = setup_logger("strategies")
@@ -53,10 +52,8 @@ class BaseStrategy(ABC):
             elif action == 'SELL' and macd_hist < 0:
                 confidence += 5
             
-            # Clamp to 0-100
-            confidence = clamp_value(confidence, 0.0, 100.0)
-            
-            return confidence
+            # Clamp to 0-100 (inline: this runs for every candidate signal)
+            return min(max(confidence, 0.0), 100.0)
             
         except Exception as e:
             logger.error(f"[ERROR] Error calculating confidence: {e}")
@@ -1,7 +1,7 @@
 """
 Scalping strategy for quick profits
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from strategies.base_strategy import BaseStrategy
 from utils.logger import setup_logger
 
@@ -11,6 +11,10 @@ logger = setup_logger("scalping")
 class ScalpingStrategy(BaseStrategy):
     """Scalping strategy for quick profits"""
     
+    def __init__(self, name: str, config: Dict[str, Any]):
+        super().__init__(name, config)
+        self._filter_log_count: Dict[Tuple[str, str], int] = {}  # (symbol, filter) -> rejections (log every 50th)
+    
     def generate_signal(
         self,
         symbol: str,
@@ -31,20 +35,18 @@ class ScalpingStrategy(BaseStrategy):
             # RELAXED: Volume filter - relaxed for testnet (which has low volume)
             if volume_ratio < 0.9:  # Relaxed: 1.2x → 0.9x for testnet compatibility
                 # Only log occasionally to avoid spam (every 50th check per symbol)
-                if not hasattr(self, '_filter_log_count'):
-                    self._filter_log_count = {}
-                count = self._filter_log_count.get(symbol, 0)
-                self._filter_log_count[symbol] = count + 1
+                key = (symbol, 'volume')
+                count = self._filter_log_count.get(key, 0)
+                self._filter_log_count[key] = count + 1
                 if count % 50 == 0:
                     logger.info(f"[FILTER] {symbol} SCALPING: Volume={volume_ratio:.2f}x < 0.9x threshold")
                 return None
             
             # RELAXED: ATR filter - relaxed for low volatility markets
             if atr_pct < 0.3:  # Relaxed: 0.5% → 0.3% for testnet compatibility
-                if not hasattr(self, '_filter_log_count'):
-                    self._filter_log_count = {}
-                count = self._filter_log_count.get(f"{symbol}_atr", 0)
-                self._filter_log_count[f"{symbol}_atr"] = count + 1
+                key = (symbol, 'atr')
+                count = self._filter_log_count.get(key, 0)
+                self._filter_log_count[key] = count + 1
                 if count % 50 == 0:
                     logger.info(f"[FILTER] {symbol} SCALPING: ATR={atr_pct:.2f}% < 0.3% threshold")
                 return None
@@ -0,0 +1,8 @@
+"""
+Shared pytest setup
+"""
+import os
+import sys
+
+# Import project packages (core, data, ...) the same way main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
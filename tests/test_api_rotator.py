@@ -0,0 +1,106 @@
+"""
+APIRotator.ping_test against a local HTTP server
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import pytest
+
+from core.api_rotator import APIRotator, _WeightState
+
+
+class _TickerHandler(BaseHTTPRequestHandler):
+    """Answers every GET like /api/v3/ticker/price (keep-alive, so connections get pooled)"""
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({'symbol': 'BTCUSDT', 'price': '100.0'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def ticker_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _TickerHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_ping_test_succeeds_on_consecutive_calls(ticker_server):
+    pytest.importorskip("httpx")
+    rotator = APIRotator([('key1', 'secret1'), ('key2', 'secret2')])
+    for client in rotator.clients:
+        client.base_url = ticker_server
+
+    try:
+        first_ok, first_ms = rotator.ping_test(max_latency_ms=5000)
+        pools = [client._async_client for client in rotator.clients]
+        second_ok, second_ms = rotator.ping_test(max_latency_ms=5000)
+
+        assert first_ok and first_ms is not None
+        assert second_ok and second_ms is not None
+        assert all(ms is not None for ms in rotator.latencies_ms)
+        # Both cycles ran on the rotator's long-lived loop and reused the same keep-alive pools
+        assert [client._async_client for client in rotator.clients] == pools
+    finally:
+        rotator.close()
+
+    assert all(client._async_client is None for client in rotator.clients)
+
+
+def test_weight_adds_are_not_lost_across_threads():
+    state = _WeightState(1, 6, threshold=10**9)
+    per_thread, threads = 5000, 8
+
+    def bump():
+        for _ in range(per_thread):
+            state.add(0, 1)
+
+    workers = [threading.Thread(target=bump) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert int(state.weights[0]) == per_thread * threads
+    assert int(state.buckets[0].sum()) == per_thread * threads
+
+
+def test_single_key_charges_weight_and_waits_at_limit():
+    rotator = APIRotator([('key1', 'secret1')])
+    rotator.weight_limit = 100
+
+    assert rotator.get_client(expected_weight=30) is rotator.clients[0]
+    assert rotator.get_client(expected_weight=30) is rotator.clients[0]
+    assert int(rotator.weights[0]) == 60
+
+    rotator.add_weight(0, 35)  # 95 used: the next 10-weight request does not fit
+    with mock.patch.object(rotator, '_wait_for_capacity', return_value=0) as wait:
+        rotator.get_client(expected_weight=10)
+    wait.assert_called_once_with(10)
+
+
+def test_latency_only_breaks_ties_between_similar_loads():
+    rotator = APIRotator([('key1', 'secret1'), ('key2', 'secret2'), ('key3', 'secret3')])
+    rotator.weight_limit = 1000  # Load band: 100
+    for i, ms in enumerate([50, 10, 30]):
+        rotator.observe_latency(i, ms)
+
+    assert rotator._select_new() == 1  # Equal load: fastest key
+
+    rotator.add_weight(1, 150)  # Fastest key now clearly busier than the others
+    assert rotator._select_new() == 2  # Fastest among the least loaded
+
+    rotator.add_weight(2, 50)  # Still within the band of the least-loaded key
+    assert rotator._select_new() == 2
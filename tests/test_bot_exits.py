@@ -0,0 +1,101 @@
+"""
+Concurrent live exits of one position (TradingBot._close_position_immediately)
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from unittest import mock
+
+from core.bot import TradingBot
+from core.position_manager import PositionManager
+
+
+def _live_bot(order_delay: float = 0.05) -> TradingBot:
+    """TradingBot with a real PositionManager and a slow mocked exchange (no __init__ side effects)"""
+    bot = TradingBot.__new__(TradingBot)
+    bot.paper_trading = False
+    bot.exchange_name = 'bybit'
+    bot.api_rotator = None
+    bot._opposite_action = {'BUY': 'SELL', 'SELL': 'BUY'}
+    bot.position_manager = PositionManager()
+    bot.close_lock = Lock()
+    bot.lock = Lock()
+    bot._capital = (1000.0, 1000.0)
+
+    def place_order(**kwargs):
+        time.sleep(order_delay)  # Keep the first order in flight while the second close arrives
+        return {'avg_fill_price': 101.0}
+
+    bot.api_client = mock.Mock()
+    bot.api_client.place_order.side_effect = place_order
+    bot.slippage_simulator = mock.Mock(get_rate=mock.Mock(return_value=0.0))
+    bot.spread_simulator = mock.Mock(get_spread=mock.Mock(return_value=0.0))
+    bot.profit_calculator = mock.Mock()
+    bot.profit_calculator.calculate_net_profit_incremental.return_value = {
+        'net_profit': 1.0, 'profit_pct': 1.0, 'total_costs': 0.1
+    }
+    bot.compound_manager = mock.Mock(add_profit=mock.Mock(return_value=0.0))
+    for name in ('price_monitor', 'market_data', 'risk_manager', 'safety_manager',
+                 'state_manager', 'trade_storage'):
+        setattr(bot, name, mock.Mock())
+    return bot
+
+
+def _open(bot: TradingBot):
+    assert bot.position_manager.open_position('BTCUSDT', 'scalping', 'BUY', 100.0, 1.0, 95.0, 110.0)
+    bot.position_manager.get_position('BTCUSDT', 'scalping').entry_costs = (0.0, 0.0, 0.0)
+
+
+def test_concurrent_closes_place_one_order():
+    bot = _live_bot()
+    _open(bot)
+    start = threading.Barrier(2)
+
+    def close(reason):
+        start.wait()
+        bot._close_position_immediately('BTCUSDT', 'scalping', 101.0, reason=reason)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(close, ['TAKE_PROFIT', 'TIME_LIMIT']))
+
+    assert bot.api_client.place_order.call_count == 1
+    assert not bot.position_manager.has_position('BTCUSDT', 'scalping')
+    bot.trade_storage.save_trade.assert_called_once()
+
+
+def test_partial_and_full_close_do_not_overlap():
+    bot = _live_bot()
+    bot._partial_close_frac = 0.5
+    _open(bot)
+    start = threading.Barrier(2)
+
+    def partial():
+        start.wait()
+        bot._partial_close_for_fees('BTCUSDT', 'scalping', 101.0)
+
+    def full():
+        start.wait()
+        bot._close_position_immediately('BTCUSDT', 'scalping', 101.0, reason='STOP_LOSS')
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        for future in [pool.submit(partial), pool.submit(full)]:
+            future.result()
+
+    assert bot.api_client.place_order.call_count == 1
+
+
+def test_claim_is_released_after_a_failed_order():
+    bot = _live_bot(order_delay=0.0)
+    _open(bot)
+    bot.api_client.place_order.side_effect = None
+    bot.api_client.place_order.return_value = None  # Exchange rejected the order
+
+    bot._close_position_immediately('BTCUSDT', 'scalping', 101.0, reason='STOP_LOSS')
+    assert bot.position_manager.has_position('BTCUSDT', 'scalping')
+
+    # The next signal may try again
+    bot.api_client.place_order.return_value = {'avg_fill_price': 101.0}
+    bot._close_position_immediately('BTCUSDT', 'scalping', 101.0, reason='STOP_LOSS')
+    assert bot.api_client.place_order.call_count == 2
+    assert not bot.position_manager.has_position('BTCUSDT', 'scalping')
@@ -0,0 +1,58 @@
+"""
+TradingBot price-signal handler (blocking wait, batching, prompt stop)
+"""
+import threading
+import time
+from threading import Event
+from unittest import mock
+
+from core.bot import TradingBot
+from core.real_time_monitor import PriceUpdate, SignalQueue
+
+
+def _handler_bot():
+    bot = TradingBot.__new__(TradingBot)
+    bot.price_monitor = mock.Mock(price_updates=SignalQueue())
+    bot._handler_released = Event()
+    bot._handler_released.set()
+    bot._active_flag = True
+    bot.dispatched = []
+    bot._dispatch_price_signals = lambda batch: bot.dispatched.append(list(batch))
+    return bot
+
+
+def test_handler_dispatches_queued_signals_in_one_batch():
+    bot = _handler_bot()
+    signals = bot.price_monitor.price_updates
+    updates = [PriceUpdate(f"SYM{i}", 'scalping', 'STOP_LOSS', 1.0) for i in range(3)]
+    for update in updates:
+        signals.put(update)
+
+    handler = threading.Thread(target=bot._handle_price_updates, daemon=True)
+    handler.start()
+    deadline = time.monotonic() + 2.0
+    while not bot.dispatched and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    bot._active_flag = False
+    signals.put(None)
+    handler.join(2.0)
+
+    assert bot.dispatched[0] == updates
+    assert not handler.is_alive()
+
+
+def test_stop_sentinel_wakes_idle_handler():
+    bot = _handler_bot()
+    handler = threading.Thread(target=bot._handle_price_updates, daemon=True)
+    handler.start()
+    time.sleep(0.05)  # Handler is now blocked waiting for a signal
+
+    start = time.monotonic()
+    bot._active_flag = False
+    bot.price_monitor.price_updates.put(None)
+    handler.join(2.0)
+
+    assert not handler.is_alive()
+    assert time.monotonic() - start < 0.5  # Woken by the sentinel, not the 1s poll timeout
+    assert bot.dispatched == []
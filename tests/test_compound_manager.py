@@ -0,0 +1,68 @@
+"""
+CompoundManager accumulation, compounding and stats
+"""
+import threading
+from datetime import date, timedelta
+
+from core.compound_manager import CompoundManager
+
+
+def _add_profit_with_timeout(manager: CompoundManager, profit: float, timeout: float = 2.0) -> float:
+    """add_profit on a worker thread; fails the test instead of hanging if it deadlocks"""
+    result = []
+    worker = threading.Thread(target=lambda: result.append(manager.add_profit(profit)), daemon=True)
+    worker.start()
+    worker.join(timeout)
+    assert not worker.is_alive(), "add_profit did not return (deadlock?)"
+    return result[0]
+
+
+def test_compounding_does_not_deadlock():
+    manager = CompoundManager({'compounding_threshold': 10.0, 'compounding_interval': 'immediate'})
+
+    assert _add_profit_with_timeout(manager, 4.0) == 0.0
+    assert _add_profit_with_timeout(manager, 7.0) == 11.0  # Threshold reached: compounds
+
+    stats = manager.get_stats()
+    assert stats['accumulated_profits'] == 0.0
+    assert stats['compound_count'] == 1
+    assert stats['total_compounded'] == 11.0
+
+
+def test_daily_interval_waits_for_the_next_day():
+    manager = CompoundManager({'compounding_threshold': 10.0, 'compounding_interval': 'daily'})
+
+    assert manager.add_profit(20.0) == 0.0  # Already compounded "today" (start date)
+    assert manager.get_stats()['accumulated_profits'] == 20.0
+
+    manager.last_compound_date = date.today() - timedelta(days=1)
+    assert manager.add_profit(1.0) == 21.0
+    assert manager.get_stats()['last_compound_date'] == date.today().isoformat()
+
+
+def test_losses_and_disabled_manager_are_ignored():
+    manager = CompoundManager({'compounding_threshold': 1.0, 'compounding_interval': 'immediate'})
+    assert manager.add_profit(-5.0) == 0.0
+    assert manager.get_stats()['accumulated_profits'] == 0.0
+
+    disabled = CompoundManager({'auto_compounding': False, 'compounding_threshold': 1.0})
+    assert disabled.add_profit(5.0) == 0.0
+
+
+def test_concurrent_profits_are_all_accounted_for():
+    manager = CompoundManager({'compounding_threshold': 25.0, 'compounding_interval': 'immediate'})
+    compounded = []
+
+    def add_many():
+        for _ in range(200):
+            compounded.append(manager.add_profit(1.0))
+
+    workers = [threading.Thread(target=add_many) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(5)
+
+    stats = manager.get_stats()
+    assert sum(compounded) + stats['accumulated_profits'] == 800.0
+    assert stats['total_compounded'] == sum(compounded)
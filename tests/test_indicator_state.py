@@ -0,0 +1,65 @@
+"""
+IndicatorCalculator.update (incremental) against calculate_all (full recompute)
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("talib")
+
+from indicators.calculator import IndicatorCalculator, IndicatorState
+
+BAR_MS = 300_000.0
+
+
+def _klines(n: int, seed: int = 1):
+    """Random-walk (closes, highs, lows, volumes, opens, open_times)"""
+    rng = np.random.default_rng(seed)
+    closes = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    highs = closes + rng.random(n)
+    lows = closes - rng.random(n)
+    opens = closes + rng.normal(0, 0.2, n)
+    volumes = rng.random(n) * 1000 + 1
+    open_times = np.arange(n) * BAR_MS
+    return closes, highs, lows, volumes, opens, open_times
+
+
+def _window(klines, end: int, size: int = 200):
+    return tuple(series[end - size:end] for series in klines)
+
+
+def _assert_matches(incremental, full):
+    assert set(incremental) == set(full)
+    for key, expected in full.items():
+        # EMA-based values differ only by the warm-up history calculate_all
+        # drops when it recomputes from the last 200 candles
+        assert incremental[key] == pytest.approx(expected, rel=1e-3, abs=1e-6), key
+
+
+def test_update_matches_calculate_all_as_candles_close():
+    klines = _klines(400)
+    state = IndicatorState()
+    for end in range(200, 401, 7):
+        window = _window(klines, end)
+        _assert_matches(IndicatorCalculator.update(state, *window), IndicatorCalculator.calculate_all(*window[:5]))
+
+
+def test_update_with_unchanged_candles_is_stable():
+    window = _window(_klines(260), 260)
+    state = IndicatorState()
+    first = IndicatorCalculator.update(state, *window)
+    second = IndicatorCalculator.update(state, *window)
+    assert second == first
+
+
+def test_update_reseeds_after_a_gap():
+    klines = _klines(800)
+    state = IndicatorState()
+    IndicatorCalculator.update(state, *_window(klines, 250))
+
+    # Next call is more than a whole window later: the state must be rebuilt, not extended
+    window = _window(klines, 800)
+    _assert_matches(IndicatorCalculator.update(state, *window), IndicatorCalculator.calculate_all(*window[:5]))
+
+
+def test_update_requires_a_full_window():
+    assert IndicatorCalculator.update(IndicatorState(), *_window(_klines(150), 150, size=150)) == {}
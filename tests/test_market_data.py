@@ -0,0 +1,68 @@
+"""
+MarketData kline/price caching
+"""
+from unittest import mock
+
+import numpy as np
+
+from data.market_data import MarketData
+
+
+def _klines(open_time_ms):
+    """(closes, highs, lows, volumes, opens, open_times) with one candle"""
+    row = np.array([1.0])
+    return row, row, row, row, row, np.array([float(open_time_ms)])
+
+
+def test_klines_reused_until_next_candle_opens():
+    client = mock.Mock()
+    client.get_klines.return_value = _klines(1_000_000_000_000)
+    market_data = MarketData(client, cache_duration=5)
+
+    with mock.patch('data.market_data.time.time', return_value=1_000_000_010.0):
+        market_data.get_klines('BTCUSDT')
+        market_data.get_klines('BTCUSDT')  # Inside the same 5m bar
+    assert client.get_klines.call_count == 1
+
+    with mock.patch('data.market_data.time.time', return_value=1_000_000_302.0):
+        market_data.get_klines('BTCUSDT')  # Next candle has opened
+    assert client.get_klines.call_count == 2
+
+
+def test_klines_cache_duration_only_when_not_aligned():
+    client = mock.Mock()
+    client.get_klines.return_value = _klines(1_000_000_000_000)
+    market_data = MarketData(client, cache_duration=5, align_klines_to_bar=False)
+
+    with mock.patch('data.market_data.time.time', return_value=1_000_000_010.0):
+        market_data.get_klines('BTCUSDT')
+    with mock.patch('data.market_data.time.time', return_value=1_000_000_016.0):
+        market_data.get_klines('BTCUSDT')
+    assert client.get_klines.call_count == 2
+
+
+def test_stream_error_is_handled():
+    # A failing stream read must be logged and return None (not raise UnboundLocalError)
+    stream = mock.Mock(interval='5m', limit=200)
+    stream.get_klines.side_effect = RuntimeError("400 bad request")
+    market_data = MarketData(mock.Mock(), stream=stream)
+
+    assert market_data.get_klines('BTCUSDT') is None
+
+
+def test_invalidate_drops_symbol_caches_only():
+    client = mock.Mock()
+    client.get_klines.return_value = _klines(1_000_000_000_000)
+    client.get_current_price.return_value = 100.0
+    market_data = MarketData(client, cache_duration=60)
+
+    for symbol in ('BTCUSDT', 'ETHUSDT'):
+        market_data.get_klines(symbol)
+        market_data.get_current_price(symbol)
+
+    market_data.invalidate('BTCUSDT')
+
+    assert 'BTCUSDT' not in market_data._price_cache
+    assert 'ETHUSDT' in market_data._price_cache
+    assert not any(key.startswith('BTCUSDT_') for key in market_data._klines_cache)
+    assert any(key.startswith('ETHUSDT_') for key in market_data._klines_cache)
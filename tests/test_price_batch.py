@@ -0,0 +1,48 @@
+"""
+Per-cycle price batching (BybitClient.get_prices_batch, MarketData.get_prices_batch)
+"""
+import json
+from unittest import mock
+
+from core.exchanges.bybit_client import BybitClient
+from data.market_data import MarketData
+
+
+def _bybit_with_tickers(tickers):
+    """BybitClient whose /v5/market/tickers answers with the given list"""
+    client = BybitClient('key', 'secret')
+    response = mock.Mock()
+    body = {'retCode': 0, 'result': {'list': tickers}}
+    response.content = json.dumps(body).encode()
+    response.json.return_value = body
+    client._make_request = mock.Mock(return_value=response)
+    return client
+
+
+def test_bybit_batch_filters_all_tickers_to_requested_symbols():
+    client = _bybit_with_tickers([
+        {'symbol': 'BTCUSDT', 'lastPrice': '100.5'},
+        {'symbol': 'ETHUSDT', 'lastPrice': '10.25'},
+        {'symbol': 'XRPUSDT', 'lastPrice': '0.5'},
+    ])
+
+    prices = client.get_prices_batch(['BTCUSDT', 'ETHUSDT', 'SOLUSDT'])
+
+    assert prices == {'BTCUSDT': 100.5, 'ETHUSDT': 10.25, 'SOLUSDT': None}
+    client._make_request.assert_called_once()
+    assert client._make_request.call_args.kwargs['params'] == {'category': 'spot'}
+
+
+def test_market_data_batch_warms_price_cache():
+    client = _bybit_with_tickers([
+        {'symbol': 'BTCUSDT', 'lastPrice': '100.5'},
+        {'symbol': 'ETHUSDT', 'lastPrice': '10.25'},
+    ])
+    market_data = MarketData(client, cache_duration=60)
+
+    market_data.get_prices_batch(['BTCUSDT', 'ETHUSDT'])
+
+    # Served from the cache filled by the batch: still a single request
+    assert market_data.get_current_price('BTCUSDT') == 100.5
+    assert market_data.get_current_price('ETHUSDT') == 10.25
+    assert client._make_request.call_count == 1
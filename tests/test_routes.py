@@ -0,0 +1,83 @@
+"""
+Dashboard API conditional GETs (ETag / 304 / Cache-Control)
+"""
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+flask = pytest.importorskip("flask")
+
+from api.routes import setup_routes
+from data.storage import TradeStorage
+
+TRADE_ROUTES = ['/api/trades/by-date', '/api/performance/daily', '/api/performance/strategy']
+
+
+def _position(symbol: str, pnl: float, day: int) -> SimpleNamespace:
+    entry_time = datetime(2024, 1, day, 12, 0, 0)
+    return SimpleNamespace(
+        symbol=symbol, strategy='scalping', action='BUY',
+        entry_price=100.0, exit_price=100.0 + pnl, quantity=1.0,
+        entry_time=entry_time, exit_time=entry_time,
+        pnl=pnl, pnl_pct=pnl, status='CLOSED', exit_reason='TAKE_PROFIT',
+        stop_loss=95.0, take_profit=110.0
+    )
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = TradeStorage(str(tmp_path / "trades.csv"))
+    storage.save_trade(_position('BTCUSDT', 5.0, 1))
+    return storage
+
+
+@pytest.fixture
+def client(storage):
+    app = flask.Flask(__name__)
+    setup_routes(app, SimpleNamespace(trade_storage=storage))
+    return app.test_client()
+
+
+@pytest.mark.parametrize("path", TRADE_ROUTES)
+def test_trade_routes_return_304_until_a_trade_is_saved(client, storage, path):
+    first = client.get(path)
+    assert first.status_code == 200
+    assert first.headers['ETag'] == f'"{storage.etag}"'
+    assert first.headers['Cache-Control'] == 'private, max-age=2'
+
+    with mock.patch.object(storage, 'get_daily_stats') as daily, \
+            mock.patch.object(storage, 'get_strategy_stats') as strategy:
+        cached = client.get(path, headers={'If-None-Match': first.headers['ETag']})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert cached.headers['Cache-Control'] == 'private, max-age=2'
+    daily.assert_not_called()  # Body is never built for a 304
+    strategy.assert_not_called()
+
+    storage.save_trade(_position('ETHUSDT', 1.0, 2))
+    fresh = client.get(path, headers={'If-None-Match': first.headers['ETag']})
+    assert fresh.status_code == 200
+    assert fresh.headers['ETag'] != first.headers['ETag']
+
+
+def test_other_api_gets_get_a_content_etag(client):
+    first = client.get('/api/health')
+    assert first.status_code == 200
+    assert first.headers['Cache-Control'] == 'private, max-age=2'
+    assert first.headers['ETag']
+
+    with mock.patch('api.routes.datetime') as clock:
+        clock.now.return_value.isoformat.return_value = first.get_json()['timestamp']
+        cached = client.get('/api/health', headers={'If-None-Match': first.headers['ETag']})
+    assert cached.status_code == 304
+
+
+def test_errors_are_not_cached():
+    app = flask.Flask(__name__)
+    setup_routes(app, SimpleNamespace(trade_storage=None))
+    response = app.test_client().get('/api/performance/daily')
+    assert response.status_code == 500
+    assert 'ETag' not in response.headers
+    assert 'Cache-Control' not in response.headers
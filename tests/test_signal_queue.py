@@ -0,0 +1,85 @@
+"""
+SignalQueue (monitor -> bot signal channel)
+"""
+import threading
+import time
+from queue import Empty
+
+import pytest
+
+from core.real_time_monitor import PriceUpdate, SignalQueue
+
+
+def _update(i: int) -> PriceUpdate:
+    return PriceUpdate(f"SYM{i}", 'scalping', 'TAKE_PROFIT', float(i))
+
+
+def test_fifo_order_and_drain():
+    queue = SignalQueue()
+    for i in range(5):
+        queue.put(_update(i))
+
+    assert queue.poll(timeout=0) == _update(0)
+    assert queue.drain(3) == [_update(1), _update(2), _update(3)]
+    assert queue.qsize() == 1
+    assert queue.drain(10) == [_update(4)]
+    assert queue.drain(10) == []
+
+
+def test_full_queue_drops_oldest():
+    queue = SignalQueue(maxlen=3)
+    for i in range(5):
+        queue.put(_update(i))
+
+    assert queue.drain(10) == [_update(2), _update(3), _update(4)]
+
+
+def test_poll_returns_default_on_timeout():
+    queue = SignalQueue()
+    sentinel = object()
+
+    start = time.monotonic()
+    assert queue.poll(timeout=0.05, default=sentinel) is sentinel
+    assert time.monotonic() - start >= 0.04
+    assert queue.poll(timeout=0) is None
+
+
+def test_get_raises_empty_but_returns_none_items():
+    queue = SignalQueue()
+    with pytest.raises(Empty):
+        queue.get(timeout=0.01)
+
+    queue.put(None)  # Stop sentinel is a valid item, not a timeout
+    assert queue.get(timeout=0.01) is None
+
+
+def test_poll_wakes_on_put_from_another_thread():
+    queue = SignalQueue()
+    timer = threading.Timer(0.05, queue.put, args=(_update(1),))
+    timer.start()
+
+    start = time.monotonic()
+    assert queue.poll(timeout=5.0) == _update(1)
+    assert time.monotonic() - start < 2.0  # Woken by put, not by the timeout
+    timer.join()
+
+
+def test_no_signal_lost_between_producer_and_consumer():
+    queue = SignalQueue(maxlen=100_000)
+    total = 5000
+
+    def produce():
+        for i in range(total):
+            queue.put(i)
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    received = []
+    while len(received) < total:
+        item = queue.poll(timeout=1.0, default=Empty)
+        assert item is not Empty, "consumer missed a wake-up"
+        received.append(item)
+        received.extend(queue.drain(64))
+    producer.join()
+
+    assert received == list(range(total))
@@ -0,0 +1,93 @@
+"""
+TradeStorage in-memory trade list and date/strategy indexes
+"""
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("sortedcontainers")
+
+from data.storage import TradeStorage
+
+
+def _position(symbol: str, strategy: str, pnl: float, day: int) -> SimpleNamespace:
+    entry_time = datetime(2024, 1, day, 12, 0, 0)
+    return SimpleNamespace(
+        symbol=symbol, strategy=strategy, action='BUY',
+        entry_price=100.0, exit_price=100.0 + pnl, quantity=1.0,
+        entry_time=entry_time, exit_time=entry_time,
+        pnl=pnl, pnl_pct=pnl, status='CLOSED', exit_reason='TAKE_PROFIT',
+        stop_loss=95.0, take_profit=110.0
+    )
+
+
+def _fill(storage: TradeStorage):
+    storage.save_trade(_position('BTCUSDT', 'scalping', 5.0, 1), {'net_profit': 4.5, 'total_costs': 0.5})
+    storage.save_trade(_position('ETHUSDT', 'scalping', -2.0, 1), {'net_profit': -2.5, 'total_costs': 0.5})
+    storage.save_trade(_position('BTCUSDT', 'swing', 3.0, 2))  # No profit_data: net falls back to pnl
+
+
+def _strip(daily):
+    return {date: dict(stats, trades=[t['symbol'] for t in stats['trades']]) for date, stats in daily.items()}
+
+
+def test_indexes_follow_saved_trades(tmp_path):
+    storage = TradeStorage(str(tmp_path / "trades.csv"))
+    _fill(storage)
+
+    trades = storage.get_all_trades()
+    assert [(t['_date'], t['_net']) for t in trades] == [
+        ('2024-01-01', 4.5), ('2024-01-01', -2.5), ('2024-01-02', 3.0)
+    ]
+
+    daily = storage.get_daily_stats()
+    assert list(daily) == ['2024-01-02', '2024-01-01']  # Newest first
+    day1 = daily['2024-01-01']
+    assert (day1['total_trades'], day1['winning_trades'], day1['losing_trades']) == (2, 1, 1)
+    assert day1['total_profit'] == pytest.approx(2.0)
+    assert day1['strategies_used'] == {'scalping'}
+    assert day1['symbols_traded'] == {'BTCUSDT', 'ETHUSDT'}
+
+    by_strategy = storage.get_strategy_stats()
+    assert set(by_strategy) == {'scalping', 'swing'}
+    scalping = by_strategy['scalping']
+    assert (scalping['total_trades'], scalping['winning_trades'], scalping['losing_trades']) == (2, 1, 1)
+    assert scalping['profit_sum'] == pytest.approx(4.5)
+    assert scalping['loss_sum'] == pytest.approx(-2.5)
+
+
+def test_reload_from_csv_matches_memory(tmp_path):
+    csv_path = str(tmp_path / "trades.csv")
+    storage = TradeStorage(csv_path)
+    _fill(storage)
+
+    reloaded = TradeStorage(csv_path)
+    assert reloaded.get_all_trades() == storage.get_all_trades()
+    assert _strip(reloaded.get_daily_stats()) == _strip(storage.get_daily_stats())
+    assert reloaded.get_strategy_stats() == storage.get_strategy_stats()
+
+
+def test_returned_stats_are_copies(tmp_path):
+    storage = TradeStorage(str(tmp_path / "trades.csv"))
+    _fill(storage)
+
+    daily = storage.get_daily_stats()
+    daily['2024-01-01']['trades'].clear()
+    daily['2024-01-01']['symbols_traded'].add('XRPUSDT')
+    storage.get_strategy_stats()['scalping']['total_trades'] = 0
+
+    assert len(storage.get_daily_stats()['2024-01-01']['trades']) == 2
+    assert 'XRPUSDT' not in storage.get_daily_stats()['2024-01-01']['symbols_traded']
+    assert storage.get_strategy_stats()['scalping']['total_trades'] == 2
+
+
+def test_etag_changes_on_save_and_restart(tmp_path):
+    csv_path = str(tmp_path / "trades.csv")
+    storage = TradeStorage(csv_path)
+    before = storage.etag
+    assert storage.etag == before  # Stable while nothing changes
+
+    storage.save_trade(_position('BTCUSDT', 'scalping', 1.0, 1))
+    assert storage.etag != before
+    assert TradeStorage(csv_path).etag != storage.etag  # Same version, new process
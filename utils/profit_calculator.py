@@ -1,7 +1,7 @@
 """
 Calculate ACTUAL profit after all costs (fees, slippage, spread)
 """
-from typing import Dict
+from typing import Dict, Tuple
 from core.fee_calculator import FeeCalculator
 from core.slippage_simulator import SlippageSimulator, SpreadSimulator
 from utils.validators import validate_price, safe_divide, safe_multiply
@@ -45,6 +45,56 @@ class ProfitCalculator:
                 'profit_pct': float
             }
         """
+        return self.calculate_net_profit_incremental(
+            symbol=symbol,
+            entry_price=entry_price,
+            exit_price=exit_price,
+            quantity=quantity,
+            action=action,
+            entry_costs=self.entry_costs_per_unit(symbol, entry_price, action, volatility),
+            volatility=volatility
+        )
+    
+    def entry_costs_per_unit(
+        self,
+        symbol: str,
+        entry_price: float,
+        action: str,
+        volatility: float = 0.0
+    ) -> Tuple[float, float, float]:
+        """
+        Entry-side costs for one unit of quantity: (fee, slippage, spread) in USD
+        
+        Every entry cost is linear in quantity, so this can be computed once at
+        open and scaled on each (partial) close.
+        """
+        try:
+            if not validate_price(entry_price):
+                return (0.0, 0.0, 0.0)
+            fee = self.fee_calc.calculate_entry_fee(entry_price)
+            slippage = abs(self.slippage_sim.calculate_slippage(symbol, entry_price, action, volatility))
+            spread = entry_price * self.spread_sim.get_spread(symbol)
+            return (fee, slippage, spread)
+        except Exception as e:
+            logger.error(f"[ERROR] Error calculating entry costs: {e}")
+            return (0.0, 0.0, 0.0)
+    
+    def calculate_net_profit_incremental(
+        self,
+        symbol: str,
+        entry_price: float,
+        exit_price: float,
+        quantity: float,
+        action: str,  # 'BUY' or 'SELL'
+        entry_costs: Tuple[float, float, float],
+        volatility: float = 0.0
+    ) -> Dict[str, float]:
+        """
+        Calculate net profit using entry costs cached at open (see entry_costs_per_unit)
+        
+        Only the exit side (fee and slippage) is computed here.
+        Returns the same dict as calculate_net_profit.
+        """
         try:
             # Validate inputs
             if not all(validate_price(p) for p in [entry_price, exit_price, quantity]):
@@ -52,16 +102,15 @@ class ProfitCalculator:
             
             # Position value
             position_value = quantity * entry_price
+            unit_fee, unit_slippage, unit_spread = entry_costs
             
-            # Calculate fees
-            entry_fee = self.fee_calc.calculate_entry_fee(position_value)
+            # Calculate fees (entry fee is 0 for values failing the sanity check, as before)
+            entry_fee = unit_fee * quantity if validate_price(position_value) else 0.0
             exit_value = quantity * exit_price
             exit_fee = self.fee_calc.calculate_exit_fee(exit_value)
             
             # Calculate slippage (in USD)
-            entry_slippage_usd = abs(self.slippage_sim.calculate_slippage(
-                symbol, entry_price, action, volatility
-            )) * quantity
+            entry_slippage_usd = unit_slippage * quantity
             
             exit_action = 'SELL' if action == 'BUY' else 'BUY'
             exit_slippage_usd = abs(self.slippage_sim.calculate_slippage(
@@ -69,8 +118,7 @@ class ProfitCalculator:
             )) * quantity
             
             # Calculate spread cost
-            spread = self.spread_sim.get_spread(symbol)
-            spread_cost = position_value * spread
+            spread_cost = unit_spread * quantity
             
             # Gross profit
             if action == 'BUY':
@@ -99,7 +99,8 @@ def ensure_min_length(data: list, min_length: int) -> bool:
     try:
         if data is None:
             return False
-        if not isinstance(data, (list, tuple)):
+        # Accept lists, tuples and NumPy arrays (anything sized except strings/dicts)
+        if isinstance(data, (str, bytes, dict)) or not hasattr(data, '__len__'):
             return False
         return len(data) >= min_length
     except Exception: